@@ -0,0 +1,229 @@
+# src/analysis/risk_engine.py
+"""
+ประเมินความเสี่ยงรายการเปลี่ยนแปลงด้วยคีย์เวิร์ด
+
+- รวมคีย์เวิร์ดทุกระดับเป็น regex ตัวเดียวแบบ trie (แยกกิ่งตามตัวอักษรที่ใช้ร่วมกัน ได้คำยาวสุดก่อน)
+  ครอบด้วย lookahead (?=(...)) → ลองทุกตำแหน่งของข้อความตัวพิมพ์เล็กในรอบเดียว คำที่ซ้อนกัน
+  (เช่น "ค่าปรับผิดนัด" มีทั้ง "ค่าปรับ" และ "รับผิด") จึงเจอครบ และคำที่เป็น prefix ของคำที่เจอ
+  ที่ตำแหน่งเดียวกันถูกนับด้วย → ผลตรงกับการเช็ค `kw in text` ทีละคำแบบเดิม
+  (เร็วกว่า alternation ธรรมดา + IGNORECASE เพราะแต่ละตำแหน่งเทียบแค่อักษรแรกของแต่ละกิ่ง)
+- ได้ระดับความเสี่ยง + คีย์เวิร์ดที่เจอ ของทุก change และระดับรวมของทั้งเอกสาร
+- คีย์เวิร์ดตั้งได้จากไฟล์ JSON (env RISK_KEYWORDS_FILE, ค่าเริ่มต้น data/risk_keywords.json)
+  {"HIGH": ["terminate", ...], "MEDIUM": ["payment", ...]}
+  ไฟล์ถูกอ่านใหม่อัตโนมัติเมื่อ mtime เปลี่ยน (ไม่ต้อง restart) — ไม่มีไฟล์ → ใช้ชุดในโค้ด
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from diff.diff_engine import Change
+
+logger = logging.getLogger(__name__)
+
+# คีย์เวิร์ดแบบง่าย ๆ ไว้ประเมินความเสี่ยง (ใช้เมื่อไม่มีไฟล์ตั้งค่า)
+DEFAULT_KEYWORDS: Dict[str, List[str]] = {
+    "HIGH": [
+        "terminate", "termination", "ยกเลิกสัญญา",
+        "liability", "รับผิด", "ชดใช้",
+        "penalty", "ค่าปรับ", "ความเสียหาย",
+        "confidential", "ความลับ", "ไม่เปิดเผย",
+    ],
+    "MEDIUM": [
+        "payment", "จ่ายเงิน", "ค่าใช้จ่าย",
+        "credit", "debit", "ดอกเบี้ย",
+        "scope", "ขอบเขตงาน",
+        "sla", "service level",
+    ],
+}
+
+KEYWORDS_FILE = os.getenv("RISK_KEYWORDS_FILE", "data/risk_keywords.json")
+
+
+@dataclass(frozen=True)
+class _KeywordSet:
+    """
+    คีย์เวิร์ดที่ compile แล้ว — ไม่แก้ไขหลังสร้าง ตอน reload สร้างชุดใหม่แล้วสลับทีเดียว
+    (thread อื่นที่กำลังให้คะแนนใช้ชุดเดิมต่อจนจบโดยไม่เห็นสถานะครึ่ง ๆ กลาง ๆ)
+    """
+    keywords: Dict[str, List[str]]
+    level_of: Dict[str, str]
+    regex: Optional["re.Pattern"]
+    lengths: Tuple[int, ...]   # ความยาวคีย์เวิร์ดที่มี (สั้น → ยาว) ใช้หาคำที่เป็น prefix
+
+    def hits(self, text: str) -> Set[str]:
+        if self.regex is None or not text:
+            return set()
+        found: Set[str] = set()
+        for longest in set(self.regex.findall(text.lower())):
+            for n in self.lengths:
+                if n > len(longest):
+                    break
+                if longest[:n] in self.level_of:
+                    found.add(longest[:n])
+        return found
+
+    def risk(self, hits: Iterable[str]) -> "ChangeRisk":
+        hits = sorted(hits)
+        high = sum(self.level_of[kw] == "HIGH" for kw in hits)
+        return ChangeRisk(level=classify(high, len(hits) - high), keywords=hits)
+
+
+@dataclass
+class ChangeRisk:
+    level: str
+    keywords: List[str]
+
+
+def classify(high_hits: int, med_hits: int) -> str:
+    """
+    กติกาเดิมของ summary_engine: HIGH ≥ 2 คำ → HIGH, HIGH 1 คำหรือ MEDIUM ≥ 2 คำ → MEDIUM
+    (นับคีย์เวิร์ดที่ไม่ซ้ำกัน)
+    """
+    if high_hits >= 2:
+        return "HIGH"
+    if high_hits == 1 or med_hits >= 2:
+        return "MEDIUM"
+    return "LOW"
+
+
+def trie_pattern(words: Iterable[str]) -> str:
+    """
+    regex ของชุดคำในรูป trie เช่น ["term", "terminate", "termination"] → term(?:inat(?:e|ion))?
+    """
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}  # จุดจบคำ
+
+    def build(node: Dict) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            # greedy → ได้คำที่ยาวกว่าก่อนเสมอ
+            return body + "?" if len(branches) == 1 and len(body) == 1 else "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+class RiskEngine:
+    def __init__(
+        self,
+        keywords: Optional[Dict[str, List[str]]] = None,
+        keywords_file: Optional[str] = KEYWORDS_FILE,
+    ):
+        """
+        keywords: ชุดคีย์เวิร์ดตายตัว (ไม่อ่านไฟล์) — ไม่ระบุ → อ่านจาก keywords_file / ชุดในโค้ด
+        """
+        self.keywords_file = None if keywords is not None else keywords_file
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._state = self._compile(keywords or DEFAULT_KEYWORDS)
+        self.reload_if_changed()
+
+    @property
+    def keywords(self) -> Dict[str, List[str]]:
+        return self._state.keywords
+
+    @staticmethod
+    def _compile(keywords: Dict[str, List[str]]) -> _KeywordSet:
+        level_of: Dict[str, str] = {}
+        for level in ("MEDIUM", "HIGH"):  # คำที่อยู่ทั้งสองระดับ → นับเป็น HIGH
+            for kw in keywords.get(level, []):
+                kw = kw.strip().lower()
+                if kw:
+                    level_of[kw] = level
+
+        pattern = trie_pattern(level_of)
+        return _KeywordSet(
+            keywords={
+                level: sorted(kw for kw, lv in level_of.items() if lv == level)
+                for level in ("HIGH", "MEDIUM")
+            },
+            level_of=level_of,
+            regex=re.compile(f"(?=({pattern}))") if pattern else None,
+            lengths=tuple(sorted({len(kw) for kw in level_of})),
+        )
+
+    def reload_if_changed(self) -> bool:
+        """
+        อ่านไฟล์คีย์เวิร์ดใหม่ถ้าถูกแก้ไข (เช็คแค่ mtime) — คืน True เมื่อโหลดใหม่
+        """
+        if not self.keywords_file:
+            return False
+        path = Path(self.keywords_file)
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+
+        with self._lock:
+            if mtime == self._mtime:
+                return False
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+                # สลับทั้งชุดด้วย assignment เดียว
+                self._state = self._compile({k.upper(): v for k, v in data.items()})
+            except (ValueError, AttributeError) as e:
+                # ไฟล์เสีย → ใช้ชุดเดิมต่อไป
+                logger.warning(f"[WARN] อ่าน {path} ไม่สำเร็จ: {e}")
+            else:
+                logger.info(f"[RISK] โหลดคีย์เวิร์ดจาก {path}")
+            self._mtime = mtime
+        return True
+
+    def settings(self) -> Dict:
+        return {"keywords": self.keywords}
+
+    def score_change(self, change: Change) -> ChangeRisk:
+        return self._score(self._state, change)
+
+    @staticmethod
+    def _score(state: _KeywordSet, change: Change) -> ChangeRisk:
+        return state.risk(state.hits(change.old_text or "") | state.hits(change.new_text or ""))
+
+    def assess(self, changes: List[Change]) -> Tuple[str, List[ChangeRisk]]:
+        """
+        ระดับความเสี่ยงรวม + ของแต่ละ change (ระดับรวมนับคีย์เวิร์ดที่ไม่ซ้ำจากทุก change)
+        """
+        self.reload_if_changed()
+        state = self._state  # อ่านครั้งเดียว → ทุก change ในรอบนี้ใช้คีย์เวิร์ดชุดเดียวกัน
+        per_change = [self._score(state, c) for c in changes]
+        all_hits: Set[str] = set()
+        for r in per_change:
+            all_hits.update(r.keywords)
+        return state.risk(all_hits).level, per_change
+
+    def annotate(self, changes: List[Change]) -> str:
+        """
+        ใส่ risk_level / risk_keywords ให้ทุก change แล้วคืนระดับความเสี่ยงรวม
+        """
+        overall, per_change = self.assess(changes)
+        for c, r in zip(changes, per_change):
+            c.risk_level = r.level
+            c.risk_keywords = r.keywords or None
+        return overall
+
+
+_default_engine: Optional[RiskEngine] = None
+
+
+def get_risk_engine() -> RiskEngine:
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = RiskEngine()
+    else:
+        _default_engine.reload_if_changed()
+    return _default_engine
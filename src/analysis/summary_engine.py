@@ -4,40 +4,22 @@ from collections import Counter
 from typing import List
 from diff.diff_engine import Change
 
+from .risk_engine import DEFAULT_KEYWORDS, get_risk_engine
 
-# คีย์เวิร์ดแบบง่าย ๆ ไว้ประเมินความเสี่ยง
-HIGH_RISK_KEYWORDS = [
-    "terminate", "termination", "ยกเลิกสัญญา",
-    "liability", "รับผิด", "ชดใช้",
-    "penalty", "ค่าปรับ", "ความเสียหาย",
-    "confidential", "ความลับ", "ไม่เปิดเผย",
-]
 
-MEDIUM_RISK_KEYWORDS = [
-    "payment", "จ่ายเงิน", "ค่าใช้จ่าย",
-    "credit", "debit", "ดอกเบี้ย",
-    "scope", "ขอบเขตงาน",
-    "sla", "service level",
-]
+# คีย์เวิร์ดแบบง่าย ๆ ไว้ประเมินความเสี่ยง (ชุดเริ่มต้น — ตั้งค่าเองได้ ดู analysis.risk_engine)
+HIGH_RISK_KEYWORDS = DEFAULT_KEYWORDS["HIGH"]
+MEDIUM_RISK_KEYWORDS = DEFAULT_KEYWORDS["MEDIUM"]
 
 
 def estimate_risk_level(changes: List[Change]) -> str:
     """
-    ประเมินระดับความเสี่ยงแบบง่าย ๆ จากข้อความที่เปลี่ยน
+    ประเมินระดับความเสี่ยงจากข้อความที่เปลี่ยน (ไม่แก้ไข change)
     คืนค่า: "LOW" / "MEDIUM" / "HIGH"
+    ถ้าต้องการระดับต่อ change ด้วย ใช้ get_risk_engine().annotate(changes)
     """
-    text_all = " ".join(
-        (c.new_text or "") + " " + (c.old_text or "") for c in changes
-    ).lower()
-
-    high_hits = sum(kw.lower() in text_all for kw in HIGH_RISK_KEYWORDS)
-    med_hits = sum(kw.lower() in text_all for kw in MEDIUM_RISK_KEYWORDS)
-
-    if high_hits >= 2:
-        return "HIGH"
-    if high_hits == 1 or med_hits >= 2:
-        return "MEDIUM"
-    return "LOW"
+    overall, _ = get_risk_engine().assess(changes)
+    return overall
 
 
 def build_summary_text(changes: List[Change]) -> str:
@@ -53,12 +35,14 @@ def build_summary_text(changes: List[Change]) -> str:
     added = type_counter.get("ADDED", 0)
     removed = type_counter.get("REMOVED", 0)
     modified = type_counter.get("MODIFIED", 0)
+    moved = type_counter.get("MOVED", 0)
 
     lines: List[str] = []
 
+    moved_part = f", ย้ายตำแหน่ง {moved} รายการ" if moved else ""
     lines.append(
         f"โดยรวมมีการเปลี่ยนแปลงจำนวน {total} รายการ "
-        f"(เพิ่ม {added} รายการ, ลบ {removed} รายการ, แก้ไข {modified} รายการ)"
+        f"(เพิ่ม {added} รายการ, ลบ {removed} รายการ, แก้ไข {modified} รายการ{moved_part})"
     )
 
     # ดึงตัวอย่าง section ที่แก้ไข/เพิ่ม
@@ -0,0 +1,257 @@
+# src/api/read_routes.py
+"""
+endpoint อ่านผลที่บันทึกไว้ (documents / versions / comparisons / changes)
+
+ทุก list ใช้ keyset pagination: ส่ง ?after_id=<next_after จากหน้าก่อน>&limit=N
+คืน {"items": [...], "next_after": id หรือ null เมื่อหมดแล้ว}
+
+change ทั้งหมดของ comparison แบบไม่ต้องแบ่งหน้า: /comparisons/{id}/changes/stream
+(NDJSON หรือ JSON ที่ stream ออกทีละ batch จาก SQLite)
+
+ค้นหาย่อหน้าข้ามทุกเอกสาร/version: /search?q=...&mode=text|similar|first
+"""
+
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from db.session import SessionLocal
+from db.ops import (
+    count_changes_by_type,
+    get_comparison,
+    iter_change_batches,
+    list_changes,
+    list_comparisons,
+    list_documents,
+    list_versions,
+)
+from search.paragraph_index import first_appearance, search_similar, search_text
+
+router = APIRouter()
+
+MAX_PAGE_SIZE = 500
+
+
+def _iso(dt) -> Optional[str]:
+    return dt.isoformat() if dt else None
+
+
+def _page(items: List[Any], next_after: Optional[int], to_dict) -> Dict[str, Any]:
+    return {"items": [to_dict(x) for x in items], "next_after": next_after}
+
+
+def document_to_dict(doc) -> Dict[str, Any]:
+    return {
+        "id": doc.id,
+        "name": doc.name,
+        "category": doc.category,
+        "created_at": _iso(doc.created_at),
+    }
+
+
+def version_to_dict(ver) -> Dict[str, Any]:
+    return {
+        "id": ver.id,
+        "document_id": ver.document_id,
+        "version_label": ver.version_label,
+        "file_path": ver.file_path,
+        "uploaded_by": ver.uploaded_by,
+        "uploaded_at": _iso(ver.uploaded_at),
+    }
+
+
+def comparison_to_dict(comp) -> Dict[str, Any]:
+    return {
+        "id": comp.id,
+        "document_id": comp.document_id,
+        "version_old_id": comp.version_old_id,
+        "version_new_id": comp.version_new_id,
+        "overall_risk_level": comp.overall_risk_level,
+        "summary_text": comp.summary_text,
+        "created_at": _iso(comp.created_at),
+    }
+
+
+def change_to_dict(ch) -> Dict[str, Any]:
+    return {
+        "id": ch.id,
+        "change_type": ch.change_type,
+        "section_label": ch.section_label,
+        "old_text": ch.old_text,
+        "new_text": ch.new_text,
+        "word_ops": json.loads(ch.word_ops) if ch.word_ops else None,
+        "risk_level": ch.risk_level,
+        "risk_keywords": json.loads(ch.risk_keywords) if ch.risk_keywords else None,
+        "ai_comment": ch.ai_comment,
+        "old_bbox": json.loads(ch.old_bbox) if ch.old_bbox else None,
+        "new_bbox": json.loads(ch.new_bbox) if ch.new_bbox else None,
+    }
+
+
+@router.get("/documents")
+def get_documents(
+    after_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    name_prefix: Optional[str] = None,
+):
+    db = SessionLocal()
+    try:
+        items, next_after = list_documents(db, after_id, limit, name_prefix)
+        return _page(items, next_after, document_to_dict)
+    finally:
+        db.close()
+
+
+@router.get("/documents/{document_id}/versions")
+def get_versions(
+    document_id: int,
+    after_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+):
+    db = SessionLocal()
+    try:
+        items, next_after = list_versions(db, document_id, after_id, limit)
+        return _page(items, next_after, version_to_dict)
+    finally:
+        db.close()
+
+
+@router.get("/comparisons")
+def get_comparisons(
+    document_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+):
+    db = SessionLocal()
+    try:
+        items, next_after = list_comparisons(db, document_id, after_id, limit)
+        return _page(items, next_after, comparison_to_dict)
+    finally:
+        db.close()
+
+
+@router.get("/comparisons/{comparison_id}")
+def get_comparison_detail(comparison_id: int):
+    db = SessionLocal()
+    try:
+        comp = get_comparison(db, comparison_id)
+        if comp is None:
+            return JSONResponse(
+                status_code=404, content={"error": f"ไม่พบ comparison: {comparison_id}"}
+            )
+        data = comparison_to_dict(comp)
+        data["change_counts"] = count_changes_by_type(db, comparison_id)
+        data["metrics"] = json.loads(comp.metrics_json) if comp.metrics_json else None
+        return data
+    finally:
+        db.close()
+
+
+@router.get("/comparisons/{comparison_id}/changes")
+def get_changes(
+    comparison_id: int,
+    after_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    change_type: Optional[str] = None,
+    risk_level: Optional[str] = None,
+):
+    db = SessionLocal()
+    try:
+        items, next_after = list_changes(
+            db, comparison_id, after_id, limit, change_type=change_type, risk_level=risk_level
+        )
+        return _page(items, next_after, change_to_dict)
+    finally:
+        db.close()
+
+
+STREAM_BATCH_SIZE = 1000
+
+
+@router.get("/comparisons/{comparison_id}/changes/stream")
+def stream_changes(
+    comparison_id: int,
+    format: str = Query("ndjson", pattern="^(ndjson|json)$"),
+    change_type: Optional[str] = None,
+    risk_level: Optional[str] = None,
+):
+    """
+    ส่ง change ทั้งหมดแบบ stream (อ่านจาก DB ทีละ batch ไม่โหลดทั้งหมดเข้า memory)
+      format=ndjson : หนึ่ง change ต่อบรรทัด (application/x-ndjson)
+      format=json   : {"comparison_id": id, "changes": [...]}
+    """
+    db = SessionLocal()
+    if get_comparison(db, comparison_id) is None:
+        db.close()
+        return JSONResponse(
+            status_code=404, content={"error": f"ไม่พบ comparison: {comparison_id}"}
+        )
+
+    batches = iter_change_batches(
+        db, comparison_id, STREAM_BATCH_SIZE, change_type=change_type, risk_level=risk_level
+    )
+
+    def ndjson():
+        try:
+            for batch in batches:
+                yield "".join(
+                    json.dumps(change_to_dict(ch), ensure_ascii=False) + "\n" for ch in batch
+                )
+        finally:
+            db.close()
+
+    def chunked_json():
+        try:
+            yield f'{{"comparison_id": {comparison_id}, "changes": ['
+            first = True
+            for batch in batches:
+                parts = [json.dumps(change_to_dict(ch), ensure_ascii=False) for ch in batch]
+                yield ("" if first else ",") + ",".join(parts)
+                first = False
+            yield "]}"
+        finally:
+            db.close()
+
+    if format == "json":
+        return StreamingResponse(chunked_json(), media_type="application/json")
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+@router.get("/search")
+def search_paragraphs(
+    q: str = Query(..., min_length=1),
+    mode: str = Query("text", pattern="^(text|similar|first)$"),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    document_id: Optional[int] = None,
+    min_jaccard: Optional[float] = Query(None, ge=0.0, le=1.0),
+):
+    """
+    mode=text    : ย่อหน้าที่มีทุกคำใน q (FTS5, เรียงตาม bm25)
+    mode=similar : ย่อหน้าที่เกือบซ้ำกับ q (MinHash, score = Jaccard โดยประมาณ)
+    mode=first   : version แรกของแต่ละเอกสารที่มีข้อความคล้าย q
+    """
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        if mode == "text":
+            items = search_text(db, q, limit, document_id)
+        elif mode == "similar":
+            items = search_similar(
+                db, q, limit, 0.5 if min_jaccard is None else min_jaccard, document_id
+            )
+        else:
+            items = first_appearance(db, q, 0.8 if min_jaccard is None else min_jaccard)
+            if document_id is not None:
+                items = [h for h in items if h["document_id"] == document_id]
+            items = items[:limit]
+    finally:
+        db.close()
+    return {
+        "query": q,
+        "mode": mode,
+        "items": items,
+        "took_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
@@ -1,26 +1,77 @@
 # src/api/server.py
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, UploadFile, File, Form
-from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from typing import List
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pathlib import Path
-import shutil
-import uuid
+import json
+import os
 
-from service.compare_service import run_compare
+from api.read_routes import router as read_router
+from db.session import SessionLocal
+from db.ops import count_jobs_by_status, get_job, list_referenced_file_paths
+from service.compare_service import find_memoized
+from service.job_queue import JobQueue, job_to_dict
+from storage.upload_store import StoredUpload, UploadStore
+from utils.log import setup_logging
+from utils.metrics import REGISTRY
 
-app = FastAPI(title="Document Versioning Compare API")
+# จำนวนงานเปรียบเทียบที่รันพร้อมกันได้ (ตั้งผ่าน env COMPARE_JOB_WORKERS)
+JOB_WORKERS = int(os.getenv("COMPARE_JOB_WORKERS", "2"))
 
-UPLOAD_DIR = Path("data/uploads")
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+job_queue = JobQueue(max_workers=JOB_WORKERS)
 
 
-def save_temp_file(upload: UploadFile) -> Path:
-    ext = Path(upload.filename).suffix or ".pdf"
-    tmp_name = f"{uuid.uuid4().hex}{ext}"
-    dest = UPLOAD_DIR / tmp_name
-    with dest.open("wb") as f:
-        shutil.copyfileobj(upload.file, f)
-    return dest
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_logging()
+    job_queue.start()
+    yield
+    job_queue.shutdown()
+
+
+app = FastAPI(title="Document Versioning Compare API", lifespan=lifespan)
+app.include_router(read_router)
+
+# ขนาดรวมสูงสุดของ data/uploads ก่อนลบไฟล์ที่ไม่ได้ใช้นานที่สุด (env UPLOAD_MAX_BYTES)
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+# จำนวน version ล่าสุดต่อเอกสารที่ gc ไม่ลบไฟล์ (env UPLOAD_KEEP_VERSIONS)
+UPLOAD_KEEP_VERSIONS = int(os.getenv("UPLOAD_KEEP_VERSIONS", "2"))
+
+
+def uploads_in_use() -> List[str]:
+    """
+    ไฟล์ที่ gc ห้ามลบ: ไฟล์ของ version ล่าสุดของแต่ละเอกสาร + ไฟล์ของงานที่ยังค้างในคิว
+    """
+    db = SessionLocal()
+    try:
+        return list_referenced_file_paths(db, keep_versions=UPLOAD_KEEP_VERSIONS)
+    finally:
+        db.close()
+
+
+upload_store = UploadStore("data/uploads", max_bytes=UPLOAD_MAX_BYTES, in_use=uploads_in_use)
+
+
+def save_upload(upload: UploadFile) -> StoredUpload:
+    """
+    stream ไฟล์ลง data/uploads/<sha256>.pdf — ไฟล์ที่เคยอัปโหลดแล้วจะไม่ถูกเก็บซ้ำ
+    """
+    ext = Path(upload.filename or "").suffix or ".pdf"
+    return upload_store.save_stream(upload.file, ext)
+
+
+async def save_uploads(uploads: List[UploadFile]) -> List[StoredUpload]:
+    # อ่าน/เขียนไฟล์เป็น I/O แบบ blocking → ทำใน threadpool ไม่ให้ event loop ค้าง
+    stored = [await run_in_threadpool(save_upload, u) for u in uploads]
+    await run_in_threadpool(upload_store.gc)
+    return stored
+
+
+def uploads_info(stored: List[StoredUpload]) -> List[dict]:
+    return [{"sha256": s.sha256, "size": s.size, "reused": s.reused} for s in stored]
 
 
 @app.post("/compare")
@@ -30,24 +81,141 @@ async def compare_documents(
     v2_label: str = Form("v2"),
     file_v1: UploadFile = File(...),
     file_v2: UploadFile = File(...),
+    force: bool = Form(False),
+    incremental: bool = Form(False),
+    ndjson: bool = Form(False),
 ):
     """
     รับไฟล์ PDF 2 เวอร์ชัน + ชื่อเอกสาร
-    แล้วเรียก run_compare() → คืนผล JSON
+    แล้วส่งงาน run_compare() เข้าคิว → คืน job_id ทันที
+    (ดูสถานะที่ GET /jobs/{job_id}, ผลลัพธ์ที่ GET /jobs/{job_id}/result)
+
+    ถ้าเคยเปรียบเทียบไฟล์คู่นี้ด้วยค่าตั้งค่าเดียวกันแล้ว → คืนผลเดิมทันที (from_cache=true)
+    force=true → เปรียบเทียบใหม่เสมอ
+    incremental=true → ต่อจาก comparison เดิมที่มีไฟล์ฝั่งหนึ่งตรงกัน (คิดใหม่เฉพาะหน้าที่เปลี่ยน)
+    ndjson=true → สร้าง report NDJSON เพิ่ม (ndjson_report_path ในผลลัพธ์)
+    """
+    try:
+        stored = await save_uploads([file_v1, file_v2])
+
+        if not force:
+            memo = await run_in_threadpool(
+                find_memoized, doc_name, v1_label, v2_label, stored[0].sha256, stored[1].sha256,
+                incremental=incremental, ndjson=ndjson,
+            )
+            if memo is not None:
+                return memo
+
+        job_id = job_queue.submit(
+            "compare",
+            {
+                "doc_name": doc_name,
+                "v1_path": str(stored[0].path),
+                "v2_path": str(stored[1].path),
+                "v1_label": v1_label,
+                "v2_label": v2_label,
+                "force": force,
+                "incremental": incremental,
+                "ndjson": ndjson,
+            },
+        )
+
+        return JSONResponse(
+            status_code=202,
+            content={"job_id": job_id, "status": "QUEUED", "uploads": uploads_info(stored)},
+        )
+
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+@app.post("/compare/batch")
+async def compare_batch(
+    doc_name: str = Form(...),
+    labels: str = Form(""),
+    cumulative: bool = Form(False),
+    files: List[UploadFile] = File(...),
+    ndjson: bool = Form(False),
+):
+    """
+    รับไฟล์ PDF หลายเวอร์ชัน (เรียงเก่า → ใหม่) แล้วส่งงานเทียบทั้ง chain เข้าคิว
+    labels: ชื่อเวอร์ชันคั่นด้วย comma เช่น "v1,v2,v3" (ไม่ใส่ = v1..vN)
     """
     try:
-        v1_path = save_temp_file(file_v1)
-        v2_path = save_temp_file(file_v2)
-
-        result = run_compare(
-            doc_name=doc_name,
-            v1_path=str(v1_path),
-            v2_path=str(v2_path),
-            v1_label=v1_label,
-            v2_label=v2_label,
+        label_list = [x.strip() for x in labels.split(",") if x.strip()] or None
+        if len(files) < 2:
+            return JSONResponse(status_code=400, content={"error": "ต้องมีอย่างน้อย 2 ไฟล์"})
+        if label_list is not None and len(label_list) != len(files):
+            return JSONResponse(
+                status_code=400, content={"error": "จำนวน labels ต้องเท่ากับจำนวนไฟล์"}
+            )
+
+        stored = await save_uploads(files)
+        job_id = job_queue.submit(
+            "batch_compare",
+            {
+                "doc_name": doc_name,
+                "paths": [str(s.path) for s in stored],
+                "labels": label_list,
+                "cumulative": cumulative,
+                "ndjson": ndjson,
+            },
         )
 
-        return result
+        return JSONResponse(
+            status_code=202,
+            content={"job_id": job_id, "status": "QUEUED", "uploads": uploads_info(stored)},
+        )
 
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    db = SessionLocal()
+    try:
+        job = get_job(db, job_id)
+        if job is None:
+            return JSONResponse(status_code=404, content={"error": f"ไม่พบงาน: {job_id}"})
+        return job_to_dict(job)
+    finally:
+        db.close()
+
+
+@app.get("/jobs/{job_id}/result")
+def job_result(job_id: str):
+    db = SessionLocal()
+    try:
+        job = get_job(db, job_id)
+        if job is None:
+            return JSONResponse(status_code=404, content={"error": f"ไม่พบงาน: {job_id}"})
+        if job.status == "FAILED":
+            return JSONResponse(status_code=500, content={"error": job.error, "job_id": job_id})
+        if job.status != "DONE":
+            # ยังไม่เสร็จ → ส่งสถานะกลับไปให้ poll ต่อ
+            return JSONResponse(status_code=202, content=job_to_dict(job))
+        return json.loads(job.result)
+    finally:
+        db.close()
+
+
+@app.get("/metrics")
+def metrics():
+    """
+    ค่าสะสมของ process นี้ในรูปแบบ Prometheus text
+    (เวลา wall/CPU ต่อขั้น, จำนวนหน้า/ย่อหน้า/OCR, จำนวนงานในคิวแยกตามสถานะ)
+    """
+    db = SessionLocal()
+    try:
+        counts = count_jobs_by_status(db)
+    finally:
+        db.close()
+
+    extra = [
+        ("jobs", {"status": status}, float(counts.get(status, 0)), "จำนวนงานในคิวแยกตามสถานะ")
+        for status in ("QUEUED", "RUNNING", "DONE", "FAILED")
+    ]
+    return PlainTextResponse(
+        REGISTRY.render(extra=extra), media_type="text/plain; version=0.0.4"
+    )
@@ -0,0 +1,79 @@
+# src/bench/accuracy.py
+"""
+วัดความแม่นของรายการ Change เทียบกับ ground truth (TruthEdit)
+
+ย่อหน้าที่ระบบแยกได้อาจใหญ่กว่าย่อหน้าจริง (เช่นทั้งหน้าเป็นย่อหน้าเดียว)
+จึงนับว่า "เจอ" เมื่อข้อความของการแก้ไขจริงอยู่ภายใน change ที่ตรวจพบ (ตัดช่องว่างออกก่อน)
+
+  recall            : สัดส่วนการแก้ไขจริงที่มี change ครอบคลุม
+  type_recall       : เหมือน recall แต่ change_type ต้องตรงด้วย
+  precision         : สัดส่วน change ที่ครอบคลุมการแก้ไขจริงอย่างน้อยหนึ่งรายการ
+  text_ratio        : ความยาวข้อความใน change ทั้งหมด / ความยาวข้อความที่แก้จริง
+                      (1.0 = ชี้ได้ตรงระดับย่อหน้า, ยิ่งมากยิ่งหยาบ)
+"""
+
+import re
+from typing import Dict, List, Optional
+
+from bench.synthetic import TruthEdit
+from diff.diff_engine import Change
+
+_WS = re.compile(r"\s+")
+
+
+def _norm(text: Optional[str]) -> str:
+    return _WS.sub("", text or "")
+
+
+def _covers(change: Change, edit: TruthEdit) -> bool:
+    old, new = _norm(change.old_text), _norm(change.new_text)
+    if edit.change_type == "ADDED":
+        return _norm(edit.new_text) in new
+    if edit.change_type == "REMOVED":
+        return _norm(edit.old_text) in old
+    if edit.change_type == "MODIFIED":
+        return _norm(edit.old_text) in old and _norm(edit.new_text) in new
+    # MOVED: ต้นทางหรือปลายทางถูกรายงานก็นับ
+    text = _norm(edit.old_text)
+    return text in old or text in new
+
+
+def score_changes(changes: List[Change], truth: List[TruthEdit]) -> Dict:
+    covered_by: List[List[int]] = [[] for _ in truth]
+    useful = [False] * len(changes)
+
+    for ci, change in enumerate(changes):
+        for ti, edit in enumerate(truth):
+            if _covers(change, edit):
+                covered_by[ti].append(ci)
+                useful[ci] = True
+
+    per_type: Dict[str, Dict[str, int]] = {}
+    found = typed = 0
+    for edit, hits in zip(truth, covered_by):
+        stat = per_type.setdefault(edit.change_type, {"expected": 0, "found": 0, "type_match": 0})
+        stat["expected"] += 1
+        if hits:
+            found += 1
+            stat["found"] += 1
+            if any(changes[ci].change_type == edit.change_type for ci in hits):
+                typed += 1
+                stat["type_match"] += 1
+
+    truth_chars = sum(len(_norm(e.old_text)) + len(_norm(e.new_text)) for e in truth)
+    change_chars = sum(len(_norm(c.old_text)) + len(_norm(c.new_text)) for c in changes)
+
+    recall = found / len(truth) if truth else 1.0
+    precision = sum(useful) / len(changes) if changes else (1.0 if not truth else 0.0)
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+
+    return {
+        "expected": len(truth),
+        "detected": len(changes),
+        "recall": round(recall, 4),
+        "type_recall": round(typed / len(truth), 4) if truth else 1.0,
+        "precision": round(precision, 4),
+        "f1": round(f1, 4),
+        "text_ratio": round(change_chars / truth_chars, 2) if truth_chars else None,
+        "by_type": per_type,
+    }
@@ -0,0 +1,114 @@
+# src/bench/bench_db.py
+"""
+วัดความเร็วการบันทึกผลเปรียบเทียบลง SQLite
+
+  legacy : get_or_create_document / create_document_version ×2 / create_comparison /
+           bulk_insert_changes (commit แยกทุกขั้น + ORM ทีละแถว, ไม่ตั้ง pragma)
+  bulk   : save_comparison (transaction เดียว + Core executemany, WAL + pragma ที่ตั้งไว้)
+
+วิธีใช้ (รันจาก root ของ repo):
+  PYTHONPATH=src python -m bench.bench_db --rows 10000
+
+ใช้ไฟล์ฐานข้อมูลชั่วคราว ไม่แตะ data/versioning.db
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from sqlalchemy.orm import sessionmaker
+
+from bench.synthetic import random_paragraph
+from db.session import Base, make_engine
+from db import models  # noqa: F401
+from db.ops import (
+    get_or_create_document,
+    create_document_version,
+    create_comparison,
+    bulk_insert_changes,
+    save_comparison,
+)
+
+
+def make_change_rows(n: int, seed: int) -> List[Dict]:
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        change_type = rng.choice(["ADDED", "REMOVED", "MODIFIED"])
+        rows.append(
+            {
+                "change_type": change_type,
+                "section_label": f"page {i // 20 + 1}",
+                "old_text": random_paragraph(rng) if change_type != "ADDED" else None,
+                "new_text": random_paragraph(rng) if change_type != "REMOVED" else None,
+                "risk_level": None,
+                "ai_comment": None,
+            }
+        )
+    return rows
+
+
+def _session(db_path: Path, tune_sqlite: bool):
+    engine = make_engine(f"sqlite:///{db_path}", tune_sqlite=tune_sqlite)
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+
+def run_legacy(db_path: Path, rows: List[Dict]) -> float:
+    engine, db = _session(db_path, tune_sqlite=False)
+    try:
+        t0 = time.perf_counter()
+        doc = get_or_create_document(db, "bench")
+        ver1 = create_document_version(db, doc, "v1", "v1.pdf")
+        ver2 = create_document_version(db, doc, "v2", "v2.pdf")
+        comp = create_comparison(db, doc, ver1, ver2, "LOW", "bench")
+        bulk_insert_changes(db, comp, rows)
+        db.commit()
+        return time.perf_counter() - t0
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def run_bulk(db_path: Path, rows: List[Dict]) -> float:
+    engine, db = _session(db_path, tune_sqlite=True)
+    try:
+        t0 = time.perf_counter()
+        save_comparison(db, "bench", "v1", "v1.pdf", "v2", "v2.pdf", "LOW", "bench", rows)
+        return time.perf_counter() - t0
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def run(n_rows: int, repeat: int, seed: int) -> None:
+    rows = make_change_rows(n_rows, seed)
+    print(f"{'path':>7} {'best(s)':>9} {'rows/sec':>11}")
+
+    results = {}
+    for name, fn in (("legacy", run_legacy), ("bulk", run_bulk)):
+        times = []
+        for _ in range(repeat):
+            with tempfile.TemporaryDirectory() as tmp:
+                times.append(fn(Path(tmp) / "bench.db", rows))
+        best = min(times)
+        results[name] = best
+        print(f"{name:>7} {best:>9.3f} {n_rows / best:>11,.0f}")
+
+    print(f"speedup: {results['legacy'] / results['bulk']:.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.rows, args.repeat, args.seed)
+
+
+if __name__ == "__main__":
+    main()
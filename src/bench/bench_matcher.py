@@ -0,0 +1,76 @@
+# src/bench/bench_matcher.py
+"""
+วัดความเร็ว ParagraphMatcher โหมด indexed เทียบกับ bruteforce (all-pairs)
+
+วิธีใช้ (รันจาก root ของ repo):
+  PYTHONPATH=src python -m bench.bench_matcher --sizes 1000 5000 20000
+
+bruteforce เป็น O(N·M) จึงรันจริงเฉพาะขนาด <= --bruteforce-max
+ขนาดที่ใหญ่กว่านั้นจะประมาณเวลาจากจำนวนคู่ที่ต้องเทียบแทน
+"""
+
+import argparse
+import time
+
+from bench.synthetic import make_paragraph_pair
+from matching.paragraph_matcher import ParagraphMatcher
+
+
+def _signature(matches):
+    return [
+        (
+            (m.old.page_number, m.old.index) if m.old else None,
+            (m.new.page_number, m.new.index) if m.new else None,
+            m.similarity,
+        )
+        for m in matches
+    ]
+
+
+def run(sizes, bruteforce_max: int, threshold: float, seed: int) -> None:
+    print(f"{'size':>7} {'indexed(s)':>11} {'ratio calls':>12} {'brute(s)':>10} {'speedup':>8}  identical")
+    for n in sizes:
+        old_paras, new_paras = make_paragraph_pair(n, seed=seed)
+
+        indexed = ParagraphMatcher(threshold=threshold, mode="indexed")
+        t0 = time.perf_counter()
+        fast = indexed.match(old_paras, new_paras)
+        t_fast = time.perf_counter() - t0
+
+        if n <= bruteforce_max:
+            brute = ParagraphMatcher(threshold=threshold, mode="bruteforce")
+            t0 = time.perf_counter()
+            slow = brute.match(old_paras, new_paras)
+            t_slow = time.perf_counter() - t0
+            identical = "yes" if _signature(fast) == _signature(slow) else "NO"
+            brute_col = f"{t_slow:10.2f}"
+        else:
+            # ประมาณจากเวลาเฉลี่ยต่อ ratio() ของขนาดเล็ก × จำนวนคู่ของ greedy
+            sample_old, sample_new = old_paras[:200], new_paras[:200]
+            probe = ParagraphMatcher(threshold=threshold, mode="bruteforce")
+            t0 = time.perf_counter()
+            probe.match(sample_old, sample_new)
+            per_call = (time.perf_counter() - t0) / max(probe.full_comparisons, 1)
+            pairs = len(old_paras) * len(new_paras) // 2
+            t_slow = per_call * pairs
+            identical = "n/a"
+            brute_col = f"~{t_slow:9.0f}"
+
+        print(
+            f"{n:>7} {t_fast:>11.2f} {indexed.full_comparisons:>12} {brute_col} "
+            f"{t_slow / max(t_fast, 1e-9):>7.0f}x  {identical}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--bruteforce-max", type=int, default=1000)
+    parser.add_argument("--threshold", type=float, default=0.6)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.sizes, args.bruteforce_max, args.threshold, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# src/bench/bench_ocr.py
+"""
+microbenchmark ความเร็ว OCR (หน้า/วินาที) ต่อ backend ของ OCREngine
+
+- subprocess : tesseract ทีละหน้า (แบบเดิมของ pytesseract — process ใหม่ + โหลด traineddata ทุกหน้า)
+- batch      : tesseract ครั้งเดียวต่อชุด --batch-size หน้า
+- tesserocr  : libtesseract ใน process (ข้ามถ้าไม่ได้ติดตั้ง tesserocr)
+- ต่อท้าย "xN" = process pool N worker ที่สร้าง engine ครั้งเดียวต่อ worker (--workers)
+
+รูปหน้าเอกสาร render ไว้ก่อนจาก PDF สังเคราะห์ (bench.synthetic_pdf) → วัดเฉพาะเวลา OCR
+
+วิธีใช้ (รันจาก root ของ repo):
+  PYTHONPATH=src python -m bench.bench_ocr --pages 20 --backends subprocess batch tesserocr
+  PYTHONPATH=src python -m bench.bench_ocr --pages 40 --workers 4 --tesseract-cmd /usr/bin/tesseract
+"""
+
+import argparse
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+import fitz  # PyMuPDF
+
+from PIL import Image
+
+from bench.synthetic import make_revision
+from bench.synthetic_pdf import write_pdf
+from ingestion.ocr_engine import OCREngine, has_tesserocr
+from ingestion.pdf_loader_ocr import render_page
+
+_pool_engine: Optional[OCREngine] = None
+
+
+def _init_pool(lang: str, backend: str, tesseract_cmd: Optional[str]) -> None:
+    global _pool_engine
+    _pool_engine = OCREngine(lang=lang, backend=backend, tesseract_cmd=tesseract_cmd)
+
+
+def _pool_ocr(images: List[Image.Image]) -> List[str]:
+    return _pool_engine.ocr_images(images)
+
+
+def make_images(pages: int, dpi: int, lang: str, font_file: Optional[str]) -> List[Image.Image]:
+    paragraphs, _, _ = make_revision(pages * 5, seed=0, lang=lang)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "ocr_bench.pdf"
+        write_pdf(path, paragraphs, font_file=font_file)
+        with fitz.open(path) as doc:
+            return [render_page(doc.load_page(i), dpi) for i in range(min(pages, len(doc)))]
+
+
+def bench_backend(
+    images: List[Image.Image],
+    backend: str,
+    lang: str,
+    tesseract_cmd: Optional[str],
+    batch_size: int,
+    workers: int,
+) -> float:
+    """
+    คืนเวลา (วินาที) ที่ใช้ OCR ทุกรูป
+    """
+    if workers <= 1:
+        engine = OCREngine(lang=lang, backend=backend, tesseract_cmd=tesseract_cmd, batch_size=batch_size)
+        engine.ocr_image(images[0])  # warm-up (tesserocr โหลดโมเดลตอนใช้ครั้งแรก)
+        t0 = time.perf_counter()
+        engine.ocr_images(images)
+        elapsed = time.perf_counter() - t0
+        engine.close()
+        return elapsed
+
+    chunk = batch_size if backend == "batch" else 1
+    with ProcessPoolExecutor(workers, initializer=_init_pool, initargs=(lang, backend, tesseract_cmd)) as pool:
+        list(pool.map(_pool_ocr, [images[:1]] * workers))  # warm-up ทุก worker
+        t0 = time.perf_counter()
+        list(pool.map(_pool_ocr, [images[i:i + chunk] for i in range(0, len(images), chunk)]))
+        return time.perf_counter() - t0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--dpi", type=int, default=200)
+    parser.add_argument("--backends", nargs="+", default=["subprocess", "batch", "tesserocr"])
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=1, help="> 1 → วัดแบบ process pool เพิ่มด้วย")
+    parser.add_argument("--ocr-lang", default="tha+eng")
+    parser.add_argument("--lang", choices=["en", "th", "mixed"], default="en", help="ภาษาของข้อความสังเคราะห์")
+    parser.add_argument("--font-file", default=None, help="ฟอนต์ .ttf ที่มีอักษรไทย (จำเป็นเมื่อ --lang th/mixed)")
+    parser.add_argument("--tesseract-cmd", default=None)
+    args = parser.parse_args()
+
+    images = make_images(args.pages, args.dpi, args.lang, args.font_file)
+    print(f"OCR {len(images)} หน้า @ {args.dpi} dpi, lang={args.ocr_lang}\n")
+    print(f"{'backend':<16} {'sec':>8} {'หน้า/วินาที':>12} {'เทียบ subprocess':>17}")
+
+    baseline: Optional[float] = None
+    for backend in args.backends:
+        if backend == "tesserocr" and not has_tesserocr():
+            print(f"{backend:<16} (ข้าม — ไม่ได้ติดตั้ง tesserocr)")
+            continue
+        for workers in sorted({1, args.workers}):
+            name = backend if workers == 1 else f"{backend} x{workers}"
+            try:
+                elapsed = bench_backend(
+                    images, backend, args.ocr_lang, args.tesseract_cmd, args.batch_size, workers
+                )
+            except Exception as e:
+                print(f"{name:<16} (ล้มเหลว: {e})")
+                continue
+            rate = len(images) / elapsed
+            if backend == "subprocess" and workers == 1:
+                baseline = rate
+            speedup = f"{rate / baseline:.2f}x" if baseline else "-"
+            print(f"{name:<16} {elapsed:>8.2f} {rate:>12.2f} {speedup:>17}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+# src/bench/bench_pipeline.py
+"""
+benchmark ทั้ง pipeline ด้วยเอกสารสังเคราะห์ (bench.synthetic_pdf) ที่รู้ ground truth
+
+ต่อขนาด (จำนวนหน้า) × ชนิดเอกสาร (text / image):
+  1) สร้าง PDF V1/V2 ตามอัตราการแก้ไข (insert / delete / modify / move)
+  2) run_compare(force=True) แบบ cold (ฐานข้อมูล + cache ใหม่) → เวลาแต่ละขั้นจาก metrics
+  3) วัดแยก ParagraphMatcher.match / DiffEngine.build_changes / ReportBuilder (ดีที่สุดจาก --repeat รอบ)
+  4) วัดความแม่นของ change ที่ได้เทียบกับ ground truth (bench.accuracy)
+
+ผลทั้งหมดเขียนเป็น JSON (--out) เพื่อเทียบย้อนหลัง; --baseline <ไฟล์ผลเก่า> พิมพ์ส่วนต่าง
+
+วิธีใช้ (รันจาก root ของ repo):
+  PYTHONPATH=src python -m bench.bench_pipeline --pages 10 100 --variants text
+  PYTHONPATH=src python -m bench.bench_pipeline --pages 10 500 2000 --variants text image \\
+      --lang mixed --font-file /usr/share/fonts/truetype/noto/NotoSansThai-Regular.ttf \\
+      --out bench_results/pipeline.json --baseline bench_results/pipeline_prev.json
+
+รันในโฟลเดอร์ชั่วคราว (--workdir) ไม่แตะ data/versioning.db / data/outputs ของ repo
+variant image ต้องมี tesseract ติดตั้งไว้ ไม่งั้นทุกหน้าจะ OCR ไม่สำเร็จ (ดู counters.ocr_errors)
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from bench.accuracy import score_changes
+from bench.synthetic_pdf import make_pdf_pair
+from cache.extraction_cache import ExtractionCache
+from db.init_db import init_db
+from db.session import SessionLocal, make_engine
+from diff.diff_engine import DiffEngine
+from ingestion.paragraph_splitter import ParagraphSplitter
+from ingestion.pdf_loader_ocr import PDFLoaderWithOCR
+from report.report_builder import ReportBuilder
+from service.compare_service import make_matcher, run_compare, save_reports
+from service.extraction import load_and_split
+from utils.log import setup_logging
+
+
+def _best_of(repeat: int, fn: Callable[[], object]) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=10,
+            cwd=Path(__file__).resolve().parent,
+        )
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_key(run: Dict) -> str:
+    s = run["settings"]
+    return f"{s['lang']}/{s['variant']}/{s['pages']}p/s{s['seed']}/{run['match_mode']}"
+
+
+def bench_one(args, pages: int, variant: str, workdir: Path) -> Dict:
+    pair = make_pdf_pair(
+        workdir / "pdfs",
+        pages,
+        seed=args.seed,
+        modify_rate=args.modify_rate,
+        delete_rate=args.delete_rate,
+        insert_rate=args.insert_rate,
+        move_rate=args.move_rate,
+        lang=args.lang,
+        image_only=(variant == "image"),
+        paras_per_page=args.paras_per_page,
+        font_file=args.font_file,
+    )
+    doc_name = pair.v1_path.stem[: -len("_v1")]
+
+    # ทั้ง pipeline แบบ cold (cache ของ workdir ยังไม่มีไฟล์คู่นี้)
+    t0 = time.perf_counter()
+    result = run_compare(
+        doc_name,
+        str(pair.v1_path),
+        str(pair.v2_path),
+        ocr_workers=args.ocr_workers,
+        use_cache=True,
+        match_mode=args.match_mode,
+        force=True,
+    )
+    total = time.perf_counter() - t0
+
+    # ย่อหน้าของทั้งสองไฟล์ (ได้จาก cache ที่ run_compare เพิ่งเขียน)
+    with ExtractionCache() as cache:
+        loader = PDFLoaderWithOCR(workers=args.ocr_workers, cache=cache)
+        splitter = ParagraphSplitter()
+        paras_v1 = load_and_split(loader, splitter, str(pair.v1_path), cache).paragraphs
+        paras_v2 = load_and_split(loader, splitter, str(pair.v2_path), cache).paragraphs
+
+    matcher = make_matcher(args.match_mode)
+    matches = matcher.match(paras_v1, paras_v2)
+    engine = DiffEngine()
+    changes = engine.build_changes(matches)
+    reporter = ReportBuilder(str(workdir / "micro_outputs"))
+
+    micro = {
+        "match_sec": _best_of(args.repeat, lambda: make_matcher(args.match_mode).match(paras_v1, paras_v2)),
+        "diff_sec": _best_of(args.repeat, lambda: engine.build_changes(matches)),
+        "report_sec": _best_of(
+            args.repeat,
+            lambda: save_reports(reporter, doc_name, "v1", "v2", changes, None, None),
+        ),
+        "match_comparisons": matcher.full_comparisons,
+    }
+
+    return {
+        "settings": pair.settings,
+        "match_mode": args.match_mode,
+        "pages_v1": pair.pages_v1,
+        "pages_v2": pair.pages_v2,
+        "paragraphs_truth": [pair.paragraphs_v1, pair.paragraphs_v2],
+        "paragraphs_extracted": [len(paras_v1), len(paras_v2)],
+        "changes_count": result["changes_count"],
+        "total_sec": round(total, 4),
+        "pages_per_sec": round((pair.pages_v1 + pair.pages_v2) / total, 2) if total > 0 else None,
+        "stages": result["metrics"]["stages"],
+        "counters": result["metrics"]["counters"],
+        "micro": {k: round(v, 6) if isinstance(v, float) else v for k, v in micro.items()},
+        "accuracy": score_changes(changes, pair.truth),
+    }
+
+
+def print_run(run: Dict, baseline: Optional[Dict[str, Dict]] = None) -> None:
+    acc = run["accuracy"]
+    line = (
+        f"{run_key(run):<28} total={run['total_sec']:>8.2f}s "
+        f"match={run['micro']['match_sec']:>7.3f}s diff={run['micro']['diff_sec']:>6.3f}s "
+        f"report={run['micro']['report_sec']:>6.3f}s  "
+        f"recall={acc['recall']:.2f} precision={acc['precision']:.2f} f1={acc['f1']:.2f}"
+    )
+    old = (baseline or {}).get(run_key(run))
+    if old:
+        ratio = run["total_sec"] / old["total_sec"] if old["total_sec"] else float("nan")
+        line += f"  | vs baseline: {ratio:.2f}x time, f1 {acc['f1'] - old['accuracy']['f1']:+.2f}"
+    print(line)
+
+    errors = run["counters"].get("ocr_errors", 0)
+    if errors:
+        print(f"   ⚠️ OCR ไม่สำเร็จ {errors:g} หน้า (ติดตั้ง tesseract แล้วหรือยัง?)")
+
+
+def load_baseline(path: Optional[str]) -> Optional[Dict[str, Dict]]:
+    if not path:
+        return None
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    return {run_key(r): r for r in data["runs"]}
+
+
+def run(args) -> Dict:
+    out_path = Path(args.out).resolve() if args.out else None
+    baseline = load_baseline(args.baseline)
+
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="docver_bench_")).resolve()
+    (workdir / "data").mkdir(parents=True, exist_ok=True)
+    print(f"📁 workdir: {workdir}")
+
+    # ฐานข้อมูลแยกของ benchmark (SQLAlchemy แปลง path สัมพัทธ์ตอนสร้าง engine → ต้อง bind ใหม่)
+    engine = make_engine(f"sqlite:///{workdir / 'data' / 'versioning.db'}")
+    SessionLocal.configure(bind=engine)
+    init_db(engine)
+
+    # path สัมพัทธ์ที่เหลือ (data/cache, data/outputs) → อยู่ใน workdir
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        runs: List[Dict] = []
+        for variant in args.variants:
+            for pages in args.pages:
+                r = bench_one(args, pages, variant, workdir)
+                runs.append(r)
+                print_run(r, baseline)
+    finally:
+        os.chdir(cwd)
+        engine.dispose()
+
+    data = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        },
+        "runs": runs,
+    }
+
+    if out_path is not None:
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"📝 ผล benchmark: {out_path}")
+    return data
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--variants", nargs="+", choices=["text", "image"], default=["text"])
+    parser.add_argument("--lang", choices=["en", "th", "mixed"], default="en")
+    parser.add_argument("--font-file", default=None, help="ฟอนต์ .ttf ที่มีอักษรไทย (จำเป็นเมื่อ --lang th/mixed)")
+    parser.add_argument("--modify-rate", type=float, default=0.05)
+    parser.add_argument("--delete-rate", type=float, default=0.02)
+    parser.add_argument("--insert-rate", type=float, default=0.02)
+    parser.add_argument("--move-rate", type=float, default=0.01)
+    parser.add_argument("--paras-per-page", type=int, default=5)
+    parser.add_argument("--match-mode", choices=["indexed", "align", "bruteforce"], default="indexed")
+    parser.add_argument("--ocr-workers", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", default=None, help="โฟลเดอร์ทำงาน (ไม่ระบุ = สร้างใน temp)")
+    parser.add_argument("--out", default=f"bench_results/pipeline_{datetime.now():%Y%m%d_%H%M%S}.json")
+    parser.add_argument("--baseline", default=None, help="ไฟล์ผล JSON เก่าที่ต้องการเทียบ")
+    parser.add_argument("--verbose", action="store_true", help="แสดง log ของ pipeline")
+    args = parser.parse_args()
+
+    if args.lang != "en" and not args.font_file:
+        parser.error("--lang th/mixed ต้องระบุ --font-file ที่มีอักษรไทย")
+
+    setup_logging("INFO" if args.verbose else "WARNING")
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
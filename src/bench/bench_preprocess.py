@@ -0,0 +1,145 @@
+# src/bench/bench_preprocess.py
+"""
+วัดผลการเตรียมภาพก่อน OCR (ingestion.preprocess) — ความเร็ว / ขนาดภาพ / ความแม่น
+
+ต่อชุดค่าตั้งค่า (rgb@200 = แบบเดิมก่อนมี preprocess):
+  - prep ms   : เวลา render + วิเคราะห์ + เตรียมภาพ ต่อหน้า
+  - MP, MB    : ขนาดภาพที่ส่งเข้า OCR ต่อหน้า (ล้านพิกเซล, หน่วยความจำ)
+  - ocr s     : เวลา OCR ต่อหน้า (--ocr, ต้องมี tesseract)
+  - sim       : ความคล้ายข้อความ OCR กับข้อความอ้างอิง (difflib ratio หลังตัดช่องว่าง)
+                อ้างอิง = text layer ของหน้า (ไฟล์ใน --pdf) หรือข้อความต้นฉบับ (ไฟล์สังเคราะห์)
+
+ไฟล์สังเคราะห์ (--synthetic N หน้า) เป็นภาพสแกนที่ --scan-dpi และหมุนเอียง --skew องศา
+
+วิธีใช้ (รันจาก root ของ repo):
+  PYTHONPATH=src python -m bench.bench_preprocess
+  PYTHONPATH=src python -m bench.bench_preprocess --pdf data/samples/17087276-3.pdf --synthetic 5 --skew 2 --ocr
+"""
+
+import argparse
+import glob
+import io
+import time
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+from PIL import Image
+
+from bench.synthetic import make_revision
+from ingestion.ocr_engine import OCREngine
+from ingestion.preprocess import PLAIN, OCRPreprocess, prepare_page_image
+
+CONFIGS: Dict[str, OCRPreprocess] = {
+    "rgb@200": OCRPreprocess(grayscale=False, adaptive_dpi=False, crop=False, deskew=False),
+    "gray@200": PLAIN,              # ค่าเริ่มต้นของ PDFLoaderWithOCR
+    "gray+crop": OCRPreprocess(adaptive_dpi=False, deskew=False),
+    "gray+crop+dpi": OCRPreprocess(deskew=False),
+    "full": OCRPreprocess(),        # gray + crop + dpi + deskew
+    "full+binarize": OCRPreprocess(binarize=True),
+}
+
+
+@dataclass
+class BenchPage:
+    page: "fitz.Page"
+    reference: str
+
+
+def _squash(text: str) -> str:
+    return "".join(text.split())
+
+
+def synthetic_scan(pages: int, scan_dpi: int, skew: float) -> Tuple["fitz.Document", List[str]]:
+    """
+    PDF ภาพล้วน (จำลองเอกสารสแกน) + ข้อความต้นฉบับของแต่ละหน้า
+    """
+    paragraphs, _, _ = make_revision(pages * 4, seed=0, lang="en")
+    scanned = fitz.open()
+    references: List[str] = []
+    for start in range(0, len(paragraphs), 4):
+        src = fitz.open()
+        page = src.new_page(width=595, height=842)
+        text = "\n\n".join(paragraphs[start:start + 4])
+        page.insert_textbox(fitz.Rect(60, 60, 535, 782), text, fontsize=10)
+        pix = page.get_pixmap(dpi=scan_dpi, colorspace=fitz.csGRAY)
+        img = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+        if skew:
+            img = img.rotate(skew, resample=Image.BILINEAR, fillcolor=255)
+        buf = io.BytesIO()
+        img.save(buf, "PNG")
+        out = scanned.new_page(width=595, height=842)
+        out.insert_image(out.rect, stream=buf.getvalue())
+        references.append(text)
+        src.close()
+    return scanned, references
+
+
+def collect_pages(pdfs: List[str], synthetic: int, scan_dpi: int, skew: float) -> List[BenchPage]:
+    pages: List[BenchPage] = []
+    for path in pdfs:
+        doc = fitz.open(path)
+        for page in doc:
+            reference = page.get_text("text") or ""
+            if _squash(reference):
+                pages.append(BenchPage(page, reference))
+    if synthetic:
+        doc, references = synthetic_scan(synthetic, scan_dpi, skew)
+        for page, reference in zip(doc, references):
+            pages.append(BenchPage(page, reference))
+    return pages
+
+
+def run(pages: List[BenchPage], dpi: int, engine: Optional[OCREngine]) -> None:
+    header = f"{'config':<18} {'prep ms':>8} {'MP':>6} {'MB':>6}"
+    if engine is not None:
+        header += f" {'ocr s':>7} {'sim':>6}"
+    print(header)
+
+    for name, pre in CONFIGS.items():
+        prep = pixels = nbytes = ocr_sec = sim = 0.0
+        for item in pages:
+            t0 = time.perf_counter()
+            img, _ = prepare_page_image(item.page, dpi, pre)
+            prep += time.perf_counter() - t0
+            pixels += img.width * img.height
+            nbytes += img.width * img.height * len(img.getbands())
+            if engine is not None:
+                t0 = time.perf_counter()
+                text = engine.ocr_image(img)
+                ocr_sec += time.perf_counter() - t0
+                sim += SequenceMatcher(None, _squash(item.reference), _squash(text), autojunk=False).ratio()
+        n = len(pages)
+        line = f"{name:<18} {prep / n * 1000:>8.1f} {pixels / n / 1e6:>6.2f} {nbytes / n / 2**20:>6.2f}"
+        if engine is not None:
+            line += f" {ocr_sec / n:>7.2f} {sim / n:>6.1%}"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", nargs="*", default=sorted(glob.glob("data/samples/*.pdf")))
+    parser.add_argument("--synthetic", type=int, default=5, help="จำนวนหน้าสแกนสังเคราะห์ (0 = ไม่ใช้)")
+    parser.add_argument("--scan-dpi", type=int, default=150)
+    parser.add_argument("--skew", type=float, default=1.5, help="มุมเอียงของหน้าสแกนสังเคราะห์ (องศา)")
+    parser.add_argument("--dpi", type=int, default=200, help="dpi เมื่อไม่ใช้ adaptive")
+    parser.add_argument("--ocr", action="store_true", help="OCR จริงเพื่อวัดเวลา/ความแม่น (ต้องมี tesseract)")
+    parser.add_argument("--ocr-lang", default="tha+eng")
+    parser.add_argument("--tesseract-cmd", default=None)
+    args = parser.parse_args()
+
+    pages = collect_pages(args.pdf, args.synthetic, args.scan_dpi, args.skew)
+    if not pages:
+        parser.error("ไม่มีหน้าให้วัด (ระบุ --pdf หรือ --synthetic)")
+    print(f"{len(pages)} หน้า (ไฟล์: {len(args.pdf)}, สังเคราะห์: {args.synthetic})\n")
+
+    engine = None
+    if args.ocr:
+        engine = OCREngine(lang=args.ocr_lang, tesseract_cmd=args.tesseract_cmd)
+    run(pages, args.dpi, engine)
+
+
+if __name__ == "__main__":
+    main()
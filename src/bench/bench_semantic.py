@@ -0,0 +1,140 @@
+# src/bench/bench_semantic.py
+"""
+วัดผลการจับคู่ย่อหน้าที่ "เขียนใหม่" (สลับลำดับวรรค + เปลี่ยนคำบางส่วน จน ratio < threshold)
+เทียบ ParagraphMatcher แบบเดิม กับ semantic=True (เวกเตอร์ char n-gram TF-IDF)
+
+วิธีใช้ (รันจาก root ของ repo):
+  PYTHONPATH=src python -m bench.bench_semantic --sizes 1000 5000 --reword-rate 0.1
+
+recall   = สัดส่วนย่อหน้าที่เขียนใหม่ที่ถูกจับคู่กับย่อหน้าเดิมของมันถูกตัว
+false    = จำนวนคู่ที่ semantic จับผิดตัว (ย่อหน้าลบ/เพิ่มจริงถูกจับคู่กัน หรือจับสลับตัว)
+"""
+
+import argparse
+import random
+import time
+from typing import List, Tuple
+
+from bench.synthetic import ENGLISH_WORDS, THAI_VOCABULARY
+from embedding.vectorizer import HashedNgramVectorizer
+from ingestion.paragraph_splitter import Paragraph
+from matching.paragraph_matcher import ParagraphMatcher
+
+
+def _words(rng: random.Random, thai: bool) -> List[str]:
+    vocab = THAI_VOCABULARY if thai else ENGLISH_WORDS
+    return [rng.choice(vocab) for _ in range(rng.randint(20, 60))]
+
+
+def reword(rng: random.Random, words: List[str], thai: bool, change_rate: float = 0.2) -> List[str]:
+    """
+    สลับลำดับวรรค (แบ่ง 3 ช่วง) แล้วแทนที่คำราว change_rate — ความหมายคงเดิมโดยประมาณ
+    """
+    vocab = THAI_VOCABULARY if thai else ENGLISH_WORDS
+    cut1, cut2 = sorted(rng.sample(range(1, len(words)), 2))
+    clauses = [words[:cut1], words[cut1:cut2], words[cut2:]]
+    rng.shuffle(clauses)
+    out = [w for clause in clauses for w in clause]
+    return [rng.choice(vocab) if rng.random() < change_rate else w for w in out]
+
+
+def make_reworded_pair(
+    n: int, seed: int, reword_rate: float, delete_rate: float = 0.02, insert_rate: float = 0.02
+) -> Tuple[List[Paragraph], List[Paragraph], List[Tuple[int, int]]]:
+    """
+    คืน (old, new, truth) — truth = คู่ (index old, index new) ของย่อหน้าที่เขียนใหม่
+    """
+    rng = random.Random(seed)
+    old_texts: List[str] = []
+    new_texts: List[str] = []
+    truth: List[Tuple[int, int]] = []
+
+    for i in range(n):
+        thai = rng.random() < 0.6
+        words = _words(rng, thai)
+        sep = "" if thai else " "
+        old_texts.append(sep.join(words))
+        r = rng.random()
+        if r < delete_rate:
+            continue
+        if r < delete_rate + reword_rate:
+            truth.append((i, len(new_texts)))
+            new_texts.append(sep.join(reword(rng, words, thai)))
+        else:
+            new_texts.append(old_texts[-1])
+        if rng.random() < insert_rate:
+            new_texts.append(sep.join(_words(rng, rng.random() < 0.6)))
+
+    def to_paras(texts: List[str]) -> List[Paragraph]:
+        return [Paragraph(page_number=i // 20 + 1, index=i % 20, text=t) for i, t in enumerate(texts)]
+
+    return to_paras(old_texts), to_paras(new_texts), truth
+
+
+def _score(matches, old_paras, new_paras, truth) -> Tuple[float, int]:
+    old_pos = {id(p): i for i, p in enumerate(old_paras)}
+    new_pos = {id(p): j for j, p in enumerate(new_paras)}
+    pairs = {
+        old_pos[id(m.old)]: new_pos[id(m.new)] for m in matches if m.old is not None and m.new is not None
+    }
+    truth_map = dict(truth)
+    hit = sum(pairs.get(i) == j for i, j in truth)
+    # คู่ที่ไม่ใช่ "เหมือนเดิม" และไม่ตรงกับ truth = จับผิด
+    wrong = sum(
+        1 for i, j in pairs.items()
+        if i in truth_map and truth_map[i] != j
+        or i not in truth_map and old_paras[i].text != new_paras[j].text
+    )
+    return (hit / len(truth) if truth else 1.0), wrong
+
+
+def run(sizes, reword_rate: float, seed: int, threshold: float, semantic_threshold: float) -> None:
+    print(
+        f"{'size':>7} {'reworded':>9} {'lexical(s)':>11} {'recall':>7} "
+        f"{'semantic(s)':>12} {'recall':>7} {'false':>6} {'pairs':>6}"
+    )
+    for n in sizes:
+        old_paras, new_paras, truth = make_reworded_pair(n, seed, reword_rate)
+
+        lexical = ParagraphMatcher(threshold=threshold)
+        t0 = time.perf_counter()
+        base = lexical.match(old_paras, new_paras)
+        t_lex = time.perf_counter() - t0
+        recall_lex, _ = _score(base, old_paras, new_paras, truth)
+
+        semantic = ParagraphMatcher(
+            threshold=threshold, semantic=True, semantic_threshold=semantic_threshold
+        )
+        t0 = time.perf_counter()
+        sem = semantic.match(old_paras, new_paras)
+        t_sem = time.perf_counter() - t0
+        recall_sem, wrong = _score(sem, old_paras, new_paras, truth)
+
+        print(
+            f"{n:>7} {len(truth):>9} {t_lex:>11.2f} {recall_lex:>7.1%} "
+            f"{t_sem:>12.2f} {recall_sem:>7.1%} {wrong:>6} {semantic.semantic_matches:>6}"
+        )
+
+    # ความเร็ว encode ล้วน (ไม่มี cache) ต่อย่อหน้า
+    old_paras, new_paras, _ = make_reworded_pair(max(sizes), seed, reword_rate)
+    vec = HashedNgramVectorizer()
+    t0 = time.perf_counter()
+    vec.encode([p.text for p in old_paras], [p.text for p in new_paras])
+    t_enc = time.perf_counter() - t0
+    total = len(old_paras) + len(new_paras)
+    print(f"\nencode {total} ย่อหน้า: {t_enc:.2f}s ({t_enc / total * 1e6:.0f} µs/ย่อหน้า)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--reword-rate", type=float, default=0.1)
+    parser.add_argument("--threshold", type=float, default=0.6)
+    parser.add_argument("--semantic-threshold", type=float, default=0.75)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.sizes, args.reword_rate, args.seed, args.threshold, args.semantic_threshold)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# src/bench/bench_word_diff.py
+"""
+วัดความเร็ว diff ภายในย่อหน้า: word_opcodes (Myers บน token) เทียบกับ
+difflib.SequenceMatcher บนตัวอักษร (autojunk=False) ที่ย่อหน้ายาว ๆ แก้ไม่กี่จุด
+
+วิธีใช้ (รันจาก root ของ repo):
+  PYTHONPATH=src python -m bench.bench_word_diff --words 100 500 2000 --edits 3
+"""
+
+import argparse
+import random
+import time
+from difflib import SequenceMatcher
+
+from bench.synthetic import modify_paragraph, random_paragraph
+from diff.word_diff import tokenize, word_opcodes
+
+
+def _best_of(repeat: int, fn) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def run(word_counts, edits: int, repeat: int, seed: int, char_max: int) -> None:
+    print(
+        f"{'lang':>4} {'words':>6} {'chars':>7} {'tokens':>7} {'myers(ms)':>10} "
+        f"{'difflib(ms)':>12} {'speedup':>8}  ops"
+    )
+    for lang in ("th", "en"):
+        for n in word_counts:
+            rng = random.Random(seed)
+            old = random_paragraph(rng, n, n, lang)
+            new = modify_paragraph(rng, old, edits)
+
+            t_myers = _best_of(repeat, lambda: word_opcodes(old, new))
+            ops = word_opcodes(old, new)
+
+            if len(old) <= char_max:
+                t_difflib = _best_of(
+                    repeat,
+                    lambda: SequenceMatcher(None, old, new, autojunk=False).get_opcodes(),
+                )
+                difflib_col = f"{t_difflib * 1000:12.2f}"
+                speedup = f"{t_difflib / max(t_myers, 1e-9):7.0f}x"
+            else:
+                difflib_col = f"{'skip':>12}"
+                speedup = f"{'-':>8}"
+
+            print(
+                f"{lang:>4} {n:>6} {len(old):>7} {len(tokenize(old)):>7} "
+                f"{t_myers * 1000:>10.2f} {difflib_col} {speedup}  {len(ops)}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, nargs="+", default=[100, 500, 2000, 5000])
+    parser.add_argument("--edits", type=int, default=3, help="จำนวนจุดที่แก้ในย่อหน้า")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--difflib-max-chars", type=int, default=30000,
+        help="ข้าม SequenceMatcher เมื่อย่อหน้ายาวกว่านี้ (ช้ามาก)",
+    )
+    args = parser.parse_args()
+    run(args.words, args.edits, args.repeat, args.seed, args.difflib_max_chars)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# src/bench/synthetic.py
+
+import random
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from ingestion.paragraph_splitter import Paragraph
+
+
+# คำไทย/อังกฤษสำหรับประกอบประโยคสัญญาแบบสุ่ม
+THAI_WORDS = [
+    "สัญญา", "ผู้ว่าจ้าง", "ผู้รับจ้าง", "ค่าปรับ", "ชำระเงิน", "ภายใน", "วัน",
+    "นับแต่", "วันที่", "ได้รับ", "หนังสือ", "แจ้ง", "ความลับ", "ข้อมูล", "บริษัท",
+    "ตกลง", "ยินยอม", "รับผิด", "ความเสียหาย", "ขอบเขตงาน", "ระยะเวลา", "ตาม",
+    "ข้อ", "เงื่อนไข", "การ", "ยกเลิก", "ทั้งนี้", "โดย", "และ", "หรือ",
+]
+
+ENGLISH_WORDS = [
+    "the", "contractor", "shall", "pay", "within", "days", "of", "notice",
+    "agreement", "party", "liability", "payment", "service", "level", "scope",
+    "confidential", "information", "terminate", "penalty", "and", "or", "to",
+]
+
+
+THAI_CONSONANTS = "กขคงจฉชซญดตถทธนบปผพฟภมยรลวศสหอฮ"
+THAI_VOWELS = ["ะ", "า", "ิ", "ี", "ุ", "ู", "ั", "ำ", "เ", "แ", "โ", "ไ", "่", "้", ""]
+
+
+def _make_vocabulary(size: int = 3000, seed: int = 1234) -> List[str]:
+    """
+    คำไทยเทียม ๆ จำนวนมาก เพื่อให้ย่อหน้าสุ่มมีความหลากหลายใกล้เอกสารจริง
+    (เอกสารจริงมีคำศัพท์หลายพันคำ ไม่ใช่แค่ไม่กี่สิบคำ)
+    """
+    rng = random.Random(seed)
+    vocab = list(THAI_WORDS)
+    while len(vocab) < size:
+        syllables = rng.randint(1, 3)
+        vocab.append(
+            "".join(rng.choice(THAI_CONSONANTS) + rng.choice(THAI_VOWELS) for _ in range(syllables))
+        )
+    return vocab
+
+
+THAI_VOCABULARY = _make_vocabulary()
+
+
+def random_paragraph(
+    rng: random.Random, min_words: int = 15, max_words: int = 60, lang: str = "mixed"
+) -> str:
+    """
+    lang: "mixed" (ไทย ~60% / อังกฤษ ~40%), "th" หรือ "en"
+    """
+    n = rng.randint(min_words, max_words)
+    thai = rng.random() < 0.6 if lang == "mixed" else lang == "th"
+    if thai:
+        return "".join(rng.choice(THAI_VOCABULARY) for _ in range(n))
+    return " ".join(rng.choice(ENGLISH_WORDS) for _ in range(n))
+
+
+def modify_paragraph(rng: random.Random, text: str, edits: int = 2) -> str:
+    chars = list(text)
+    for _ in range(edits):
+        if not chars:
+            break
+        pos = rng.randrange(len(chars))
+        chars[pos:pos + rng.randint(1, 5)] = list(str(rng.randint(1, 999)))
+    return "".join(chars)
+
+
+def make_paragraph_pair(
+    n: int,
+    seed: int = 0,
+    modify_rate: float = 0.05,
+    delete_rate: float = 0.02,
+    insert_rate: float = 0.02,
+) -> Tuple[List[Paragraph], List[Paragraph]]:
+    """
+    สร้างย่อหน้า V1/V2 จำนวนประมาณ n ย่อหน้า โดย V2 มีการแก้/ลบ/เพิ่มตามอัตราที่กำหนด
+    """
+    rng = random.Random(seed)
+    old_texts = [random_paragraph(rng) for _ in range(n)]
+
+    new_texts: List[str] = []
+    for text in old_texts:
+        r = rng.random()
+        if r < delete_rate:
+            continue
+        if r < delete_rate + modify_rate:
+            text = modify_paragraph(rng, text)
+        new_texts.append(text)
+        if rng.random() < insert_rate:
+            new_texts.append(random_paragraph(rng))
+
+    def to_paras(texts: List[str]) -> List[Paragraph]:
+        return [
+            Paragraph(page_number=i // 20 + 1, index=i % 20, text=t)
+            for i, t in enumerate(texts)
+        ]
+
+    return to_paras(old_texts), to_paras(new_texts)
+
+
+@dataclass
+class TruthEdit:
+    """
+    การแก้ไขที่ใส่ลงไปจริง (ground truth) สำหรับวัดความแม่นของผลเปรียบเทียบ
+    """
+    change_type: str  # ADDED / REMOVED / MODIFIED / MOVED
+    old_text: Optional[str]
+    new_text: Optional[str]
+
+
+def make_revision(
+    n: int,
+    seed: int = 0,
+    modify_rate: float = 0.05,
+    delete_rate: float = 0.02,
+    insert_rate: float = 0.02,
+    move_rate: float = 0.0,
+    lang: str = "mixed",
+    min_words: int = 15,
+    max_words: int = 60,
+) -> Tuple[List[str], List[str], List[TruthEdit]]:
+    """
+    เหมือน make_paragraph_pair แต่คืนข้อความล้วน + รายการ TruthEdit ของทุกการแก้ไข
+    move_rate: สัดส่วนย่อหน้าที่ถูกย้ายไปตำแหน่งอื่น (เนื้อหาเหมือนเดิม)
+    """
+    rng = random.Random(seed)
+
+    def para() -> str:
+        return random_paragraph(rng, min_words, max_words, lang)
+
+    old_texts = [para() for _ in range(n)]
+    truth: List[TruthEdit] = []
+
+    new_texts: List[str] = []
+    moved: List[str] = []
+    for text in old_texts:
+        r = rng.random()
+        if r < delete_rate:
+            truth.append(TruthEdit("REMOVED", text, None))
+            continue
+        if r < delete_rate + move_rate:
+            moved.append(text)
+            continue
+        if r < delete_rate + move_rate + modify_rate:
+            new_text = modify_paragraph(rng, text)
+            truth.append(TruthEdit("MODIFIED", text, new_text))
+            text = new_text
+        new_texts.append(text)
+        if rng.random() < insert_rate:
+            added = para()
+            truth.append(TruthEdit("ADDED", None, added))
+            new_texts.append(added)
+
+    # ย่อหน้าที่ย้าย → แทรกกลับที่ตำแหน่งสุ่ม
+    for text in moved:
+        new_texts.insert(rng.randint(0, len(new_texts)), text)
+        truth.append(TruthEdit("MOVED", text, text))
+
+    return old_texts, new_texts, truth
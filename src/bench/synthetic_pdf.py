@@ -0,0 +1,144 @@
+# src/bench/synthetic_pdf.py
+"""
+สร้างไฟล์ PDF คู่ V1/V2 จากข้อความสุ่ม (bench.synthetic) พร้อม ground truth
+
+- text  : หน้ามี text layer ปกติ
+- image : หน้าเป็นรูปภาพล้วน (render จากหน้า text แล้วฝังเป็นภาพ) → ต้อง OCR
+
+ฟอนต์ในตัวของ PyMuPDF ไม่มีอักษรไทย → ถ้าจะใส่ภาษาไทยต้องส่ง font_file
+(เช่น NotoSansThai-Regular.ttf / THSarabunNew.ttf)
+"""
+
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+import fitz  # PyMuPDF
+
+from bench.synthetic import TruthEdit, make_revision
+
+logger = logging.getLogger(__name__)
+
+PAGE_MARGIN = 50
+
+
+@dataclass
+class SyntheticPair:
+    v1_path: Path
+    v2_path: Path
+    truth: List[TruthEdit]
+    paragraphs_v1: int
+    paragraphs_v2: int
+    pages_v1: int = 0
+    pages_v2: int = 0
+    settings: dict = field(default_factory=dict)
+
+
+def write_pdf(
+    path: Path,
+    paragraphs: List[str],
+    paras_per_page: int = 5,
+    fontsize: float = 8,
+    font_file: Optional[str] = None,
+    image_only: bool = False,
+    dpi: int = 150,
+) -> int:
+    """
+    เขียนย่อหน้าลง PDF (หน้า A4 ละ paras_per_page ย่อหน้า คั่นด้วยบรรทัดว่าง) → คืนจำนวนหน้า
+    """
+    doc = fitz.open()
+    font_args = {"fontname": "bench", "fontfile": font_file} if font_file else {}
+
+    for start in range(0, max(len(paragraphs), 1), paras_per_page):
+        page = doc.new_page(width=595, height=842)
+        rect = fitz.Rect(PAGE_MARGIN, PAGE_MARGIN, 595 - PAGE_MARGIN, 842 - PAGE_MARGIN)
+        text = "\n\n".join(paragraphs[start:start + paras_per_page])
+        if page.insert_textbox(rect, text, fontsize=fontsize, **font_args) < 0:
+            logger.warning(f"[WARN] ข้อความล้นหน้า {page.number + 1} ของ {path.name} (ลด paras_per_page)")
+
+    if image_only:
+        # หน้าเป็นภาพล้วน (ไม่มี text layer) — จำลองเอกสารสแกน
+        scanned = fitz.open()
+        for page in doc:
+            pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+            out = scanned.new_page(width=page.rect.width, height=page.rect.height)
+            out.insert_image(out.rect, pixmap=pix)
+        doc.close()
+        doc = scanned
+
+    pages = doc.page_count
+    doc.save(str(path), garbage=3, deflate=True)
+    doc.close()
+    return pages
+
+
+def make_pdf_pair(
+    out_dir: Path,
+    pages: int,
+    seed: int = 0,
+    modify_rate: float = 0.05,
+    delete_rate: float = 0.02,
+    insert_rate: float = 0.02,
+    move_rate: float = 0.01,
+    lang: str = "en",
+    image_only: bool = False,
+    paras_per_page: int = 5,
+    font_file: Optional[str] = None,
+    dpi: int = 150,
+) -> SyntheticPair:
+    """
+    สร้าง V1 ประมาณ pages หน้า และ V2 ที่แก้ไขตามอัตราที่กำหนด ไว้ใน out_dir
+    """
+    if lang != "en" and not font_file:
+        raise ValueError("ข้อความภาษาไทยต้องระบุ font_file ที่มีอักษรไทย")
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    old_texts, new_texts, truth = make_revision(
+        pages * paras_per_page,
+        seed=seed,
+        modify_rate=modify_rate,
+        delete_rate=delete_rate,
+        insert_rate=insert_rate,
+        move_rate=move_rate,
+        lang=lang,
+        min_words=10,
+        max_words=40,
+    )
+
+    variant = "image" if image_only else "text"
+    stem = f"synthetic_{lang}_{pages}p_{variant}_s{seed}"
+    v1_path = out_dir / f"{stem}_v1.pdf"
+    v2_path = out_dir / f"{stem}_v2.pdf"
+
+    kwargs = dict(
+        paras_per_page=paras_per_page, font_file=font_file, image_only=image_only, dpi=dpi
+    )
+    pages_v1 = write_pdf(v1_path, old_texts, **kwargs)
+    pages_v2 = write_pdf(v2_path, new_texts, **kwargs)
+
+    return SyntheticPair(
+        v1_path=v1_path,
+        v2_path=v2_path,
+        truth=truth,
+        paragraphs_v1=len(old_texts),
+        paragraphs_v2=len(new_texts),
+        pages_v1=pages_v1,
+        pages_v2=pages_v2,
+        settings={
+            "pages": pages,
+            "seed": seed,
+            "lang": lang,
+            "variant": variant,
+            "paras_per_page": paras_per_page,
+            "rates": {
+                "modify": modify_rate,
+                "delete": delete_rate,
+                "insert": insert_rate,
+                "move": move_rate,
+            },
+        },
+    )
+
@@ -0,0 +1,146 @@
+# src/cache/extraction_cache.py
+
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+DEFAULT_CACHE_PATH = "data/cache/extraction.db"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# เกินขนาด → ลบจนเหลือสัดส่วนนี้ของ max_bytes (ไม่ต้องลบทุกครั้งที่ put หลัง cache เต็ม)
+EVICT_TO_RATIO = 0.9
+
+
+class ExtractionCache:
+    """
+    cache ถาวรของผลการดึงข้อความ (SQLite ไฟล์เดียวในเครื่อง)
+
+    เก็บเป็นคู่ (kind, key) → JSON เช่น
+      - "page"  : ข้อความของหน้าเดียว key = hash เนื้อหาหน้า + ค่าตั้งค่า loader
+      - "doc"   : รายการ page key ของทั้งไฟล์ key = hash ไฟล์ + ค่าตั้งค่า loader
+      - "paras" : ย่อหน้าที่แยกแล้วของทั้งไฟล์
+
+    เกินขนาด max_bytes → ลบรายการที่ไม่ได้ใช้นานที่สุดก่อน (LRU) จนเหลือ EVICT_TO_RATIO
+    ขนาดรวมนับสะสมในตัว object (อ่าน SUM ครั้งเดียวตอนเปิด) → put ไม่ต้อง scan ทั้งตาราง
+    ใช้แบบ context manager ได้ (with ExtractionCache() as cache: ...) → ปิด connection เสมอ
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (kind, key)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_entries_last_access ON entries (last_access)"
+        )
+        self._conn.commit()
+        self._total = self._sum_size()
+
+    def __enter__(self) -> "ExtractionCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _sum_size(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def get(self, kind: str, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM entries WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+            if row is None:
+                self.misses[kind] += 1
+                return None
+            self._conn.execute(
+                "UPDATE entries SET last_access = ? WHERE kind = ? AND key = ?",
+                (time.time(), kind, key),
+            )
+            self._conn.commit()
+        self.hits[kind] += 1
+        return json.loads(row[0])
+
+    def get_many(self, kind: str, keys: List[str]) -> Dict[str, Any]:
+        """
+        ดึงหลาย key ในครั้งเดียว คืนเฉพาะที่เจอ
+        """
+        found: Dict[str, Any] = {}
+        for key in dict.fromkeys(keys):
+            value = self.get(kind, key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def put(self, kind: str, key: str, value: Any) -> None:
+        raw = json.dumps(value, ensure_ascii=False)
+        size = len(raw.encode("utf-8"))
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT size FROM entries WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (kind, key, value, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (kind, key, raw, size, time.time()),
+            )
+            self._total += size - (old[0] if old else 0)
+            if self._total > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        # process/object อื่นที่ใช้ไฟล์เดียวกันอาจเพิ่ม/ลบไปแล้ว → นับใหม่เฉพาะตอนที่จะลบ
+        self._total = self._sum_size()
+        target = int(self.max_bytes * EVICT_TO_RATIO)
+        if self._total <= self.max_bytes:
+            return
+
+        # อ่านทีละแถวตาม index ของ last_access จนพอ (ไม่ fetch ทั้งตาราง)
+        to_delete = []
+        for kind, key, size in self._conn.execute(
+            "SELECT kind, key, size FROM entries ORDER BY last_access"
+        ):
+            if self._total <= target:
+                break
+            to_delete.append((kind, key))
+            self._total -= size
+        self._conn.executemany("DELETE FROM entries WHERE kind = ? AND key = ?", to_delete)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        return {
+            "hits": dict(self.hits),
+            "misses": dict(self.misses),
+            "entries": entries,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1,11 +1,79 @@
 # src/db/init_db.py
 
+import logging
+
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError, OperationalError
+
 from .session import engine, Base
 from . import models  # noqa: F401
+from .models import FTS_TABLE
+
+logger = logging.getLogger(__name__)
+
+
+def ensure_columns(bind=engine) -> None:
+    """
+    create_all ไม่เพิ่มคอลัมน์ใหม่ให้ตารางเดิม → ALTER TABLE ADD COLUMN เฉพาะคอลัมน์ที่ยังไม่มี
+    (รองรับเฉพาะคอลัมน์ที่ nullable หรือมีค่า default ตามข้อจำกัดของ SQLite)
+    """
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            have = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in have:
+                    continue
+                col_type = column.type.compile(dialect=bind.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}"))
+                logger.info(f"[DB] เพิ่มคอลัมน์ {table.name}.{column.name}")
+
+
+def ensure_indexes(bind=engine) -> None:
+    """
+    create_all ไม่เพิ่ม index ให้ตารางที่มีอยู่แล้ว → สร้าง index ที่ยังขาดในฐานข้อมูลเก่าให้ครบ
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=bind, checkfirst=True)
+            except IntegrityError as e:
+                # เช่น documents.name ซ้ำจากข้อมูลเก่า → ต้องรวมแถวซ้ำเองก่อน
+                logger.warning(f"[WARN] สร้าง index {index.name} ไม่สำเร็จ: {e.orig}")
+
+
+def ensure_fts(bind=engine) -> bool:
+    """
+    ตาราง FTS5 แบบ external content (ชี้ไปที่ version_paragraphs) สำหรับค้นหาข้ามเอกสาร
+    tokenizer trigram → ค้นภาษาไทยที่ไม่มีช่องว่างได้; SQLite เก่าที่ไม่มี trigram → unicode61
+    ไม่มี FTS5 เลย → คืน False (search.paragraph_index ค้นด้วย LIKE แทน)
+    """
+    if bind.dialect.name != "sqlite":
+        return False
+    for tokenizer in ("trigram", "unicode61"):
+        try:
+            with bind.begin() as conn:
+                conn.execute(
+                    text(
+                        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                        f"text, content='version_paragraphs', content_rowid='id', "
+                        f"tokenize='{tokenizer}')"
+                    )
+                )
+            return True
+        except OperationalError as e:
+            logger.warning(f"[WARN] สร้าง {FTS_TABLE} (tokenize={tokenizer}) ไม่สำเร็จ: {e.orig}")
+    return False
 
 
-def init_db():
-    Base.metadata.create_all(bind=engine)
+def init_db(bind=engine):
+    Base.metadata.create_all(bind=bind)
+    ensure_columns(bind)
+    ensure_indexes(bind)
+    ensure_fts(bind)
 
 
 if __name__ == "__main__":
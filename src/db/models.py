@@ -7,6 +7,9 @@ from sqlalchemy import (
     Text,
     ForeignKey,
     DateTime,
+    Float,
+    Index,
+    LargeBinary,
 )
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -18,7 +21,7 @@ class Document(Base):
     __tablename__ = "documents"
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String(255), nullable=False)
+    name = Column(String(255), nullable=False, unique=True, index=True)
     category = Column(String(50), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -28,13 +31,23 @@ class Document(Base):
 
 class DocumentVersion(Base):
     __tablename__ = "document_versions"
+    __table_args__ = (
+        Index("ix_document_versions_doc_sha", "document_id", "file_sha256"),
+        # หา version ที่ index ไฟล์เดียวกันไว้แล้ว (ข้ามเอกสาร/label)
+        Index("ix_document_versions_sha", "file_sha256"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False)
+    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False, index=True)
     version_label = Column(String(100), nullable=False)
     file_path = Column(String(500), nullable=False)
+    file_sha256 = Column(String(64), nullable=True)   # ใช้หา version เดิมเมื่ออัปโหลดไฟล์ซ้ำ
     uploaded_by = Column(String(100), nullable=True)
     uploaded_at = Column(DateTime, default=datetime.utcnow)
+    # จำนวนย่อหน้าที่อยู่ในดัชนีค้นหาข้ามเอกสาร (None = ยังไม่ได้ index)
+    paragraphs_indexed = Column(Integer, nullable=True)
+    # JSON [[content_hash, จำนวนย่อหน้า], ...] ต่อหน้า — ใช้เทียบแบบ incremental
+    page_fingerprints = Column(Text, nullable=True)
 
     document = relationship("Document", back_populates="versions")
     comparisons_old = relationship(
@@ -53,7 +66,7 @@ class Comparison(Base):
     __tablename__ = "comparisons"
 
     id = Column(Integer, primary_key=True, index=True)
-    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False)
+    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False, index=True)
     version_old_id = Column(Integer, ForeignKey("document_versions.id"), nullable=False)
     version_new_id = Column(Integer, ForeignKey("document_versions.id"), nullable=False)
 
@@ -61,6 +74,17 @@ class Comparison(Base):
     overall_risk_level = Column(String(20), nullable=True)
     summary_text = Column(Text, nullable=True)
 
+    # memoization: key จาก hash ไฟล์ทั้งสอง + ค่าตั้งค่า → ผลลัพธ์ที่คืนให้ caller (JSON)
+    result_key = Column(String(64), nullable=True, index=True)
+    result_json = Column(Text, nullable=True)
+    metrics_json = Column(Text, nullable=True)   # เวลา/ตัวนับต่อขั้นของรอบที่สร้างผลนี้
+
+    # การจับคู่ย่อหน้าทั้งหมด (รวมคู่ที่ไม่เปลี่ยน) สำหรับเทียบแบบ incremental รอบถัดไป
+    # JSON [[old index | -1, new index | -1, similarity, moved], ...]
+    match_json = Column(Text, nullable=True)
+    # hash ของค่าตั้งค่า loader/splitter/matcher/diff (ไม่รวมไฟล์) → ใช้ต่อได้เฉพาะค่าตั้งค่าเดียวกัน
+    settings_key = Column(String(16), nullable=True, index=True)
+
     document = relationship("Document", back_populates="comparisons")
     version_old = relationship("DocumentVersion", foreign_keys=[version_old_id])
     version_new = relationship("DocumentVersion", foreign_keys=[version_new_id])
@@ -70,17 +94,89 @@ class Comparison(Base):
 
 class ChangeItem(Base):
     __tablename__ = "changes"
+    __table_args__ = (
+        # filter ตามประเภท/ระดับความเสี่ยงภายใน comparison เดียว + keyset ตาม id
+        # (SQLite ต่อท้ายทุก index ด้วย rowid = id อยู่แล้ว จึงไม่ต้องเรียงใหม่)
+        Index("ix_changes_comparison_type", "comparison_id", "change_type"),
+        Index("ix_changes_comparison_risk", "comparison_id", "risk_level"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    comparison_id = Column(Integer, ForeignKey("comparisons.id"), nullable=False)
+    comparison_id = Column(Integer, ForeignKey("comparisons.id"), nullable=False, index=True)
 
-    change_type = Column(String(20), nullable=False)  # ADDED / REMOVED / MODIFIED
+    change_type = Column(String(20), nullable=False)  # ADDED / REMOVED / MODIFIED / MOVED
     section_label = Column(String(255), nullable=True)
 
     old_text = Column(Text, nullable=True)
     new_text = Column(Text, nullable=True)
+    # JSON ของ Change.word_ops: [[tag, old_start, old_end, new_start, new_end], ...]
+    word_ops = Column(Text, nullable=True)
 
     risk_level = Column(String(20), nullable=True)
+    # JSON list ของคีย์เวิร์ดความเสี่ยงที่เจอใน change นี้
+    risk_keywords = Column(Text, nullable=True)
     ai_comment = Column(Text, nullable=True)
+    # JSON [x0, y0, x1, y1] ของย่อหน้าเดิม/ใหม่บนหน้านั้น (null เมื่อมาจาก OCR)
+    old_bbox = Column(Text, nullable=True)
+    new_bbox = Column(Text, nullable=True)
 
     comparison = relationship("Comparison", back_populates="changes")
+
+
+# ตาราง FTS5 ของ version_paragraphs.text (สร้างด้วย SQL ดิบใน init_db.ensure_fts)
+FTS_TABLE = "paragraph_fts"
+
+
+class VersionParagraph(Base):
+    """
+    ย่อหน้าของแต่ละ version สำหรับค้นหาข้ามเอกสาร (ดู search.paragraph_index)
+    ข้อความถูก index ใน FTS5 (paragraph_fts) ด้วย rowid = id
+    """
+
+    __tablename__ = "version_paragraphs"
+
+    id = Column(Integer, primary_key=True)
+    version_id = Column(Integer, ForeignKey("document_versions.id"), nullable=False, index=True)
+    page_number = Column(Integer, nullable=False)
+    para_index = Column(Integer, nullable=False)
+    text = Column(Text, nullable=False)
+    # sha1 ของข้อความที่ normalize แล้ว → หาข้อที่ตรงกันเป๊ะ / version แรกที่มีข้อนี้
+    text_sha1 = Column(String(40), nullable=False, index=True)
+    # MinHash signature (uint32 × num_perm) สำหรับประมาณ Jaccard
+    minhash = Column(LargeBinary, nullable=True)
+
+
+class ParagraphBand(Base):
+    """
+    LSH bucket ของ MinHash: ย่อหน้าที่มี band เดียวกันอย่างน้อยหนึ่งวง = candidate ใกล้เคียง
+    primary key (band_key, paragraph_id) แบบ WITHOUT ROWID → ตารางเป็น B-tree เดียว
+    ค้นตาม band_key ได้จาก primary key ตรง ๆ ไม่ต้องมี index แยก
+    """
+
+    __tablename__ = "paragraph_bands"
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    band_key = Column(Integer, primary_key=True, autoincrement=False)   # hash 63 bit ของ (band, ค่าใน band)
+    paragraph_id = Column(
+        Integer, ForeignKey("version_paragraphs.id"), primary_key=True, autoincrement=False
+    )
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(String(32), primary_key=True)           # uuid hex
+    kind = Column(String(50), nullable=False)           # เช่น "compare"
+    status = Column(String(20), nullable=False, index=True)  # QUEUED / RUNNING / DONE / FAILED
+    stage = Column(String(50), nullable=True)           # ขั้นตอนที่กำลังทำอยู่
+    progress = Column(Float, nullable=False, default=0.0)  # 0.0 - 1.0
+
+    params = Column(Text, nullable=False)               # JSON
+    result = Column(Text, nullable=True)                # JSON (เมื่อ DONE)
+    error = Column(Text, nullable=True)
+
+    comparison_id = Column(Integer, ForeignKey("comparisons.id"), nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
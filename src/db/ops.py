@@ -1,20 +1,44 @@
 # src/db/ops.py
 
-from typing import Optional, List
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional, List
+from sqlalchemy import func, insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from .models import Document, DocumentVersion, Comparison, ChangeItem
+from .models import Document, DocumentVersion, Comparison, ChangeItem, Job
 
 
-def get_or_create_document(db: Session, name: str, category: Optional[str] = None) -> Document:
+def _save(db: Session, obj, commit: bool):
+    """
+    commit=True  → commit + refresh ทันที (พฤติกรรมเดิม)
+    commit=False → แค่ flush ให้ได้ id แล้วปล่อยให้ caller commit ทีเดียวตอนจบ transaction
+    """
+    db.add(obj)
+    if commit:
+        db.commit()
+        db.refresh(obj)
+    else:
+        db.flush()
+    return obj
+
+
+def get_or_create_document(
+    db: Session, name: str, category: Optional[str] = None, commit: bool = True
+) -> Document:
     doc = db.query(Document).filter(Document.name == name).first()
     if doc:
         return doc
-    doc = Document(name=name, category=category)
-    db.add(doc)
-    db.commit()
-    db.refresh(doc)
-    return doc
+    try:
+        # savepoint: ถ้า job อื่นสร้างชื่อเดียวกันตัดหน้า (unique index) → ใช้แถวนั้นแทน
+        with db.begin_nested():
+            doc = Document(name=name, category=category)
+            db.add(doc)
+    except IntegrityError:
+        return db.query(Document).filter(Document.name == name).one()
+    return _save(db, doc, commit)
 
 
 def create_document_version(
@@ -23,6 +47,7 @@ def create_document_version(
     version_label: str,
     file_path: str,
     uploaded_by: Optional[str] = None,
+    commit: bool = True,
 ) -> DocumentVersion:
     ver = DocumentVersion(
         document_id=document.id,
@@ -30,10 +55,44 @@ def create_document_version(
         file_path=file_path,
         uploaded_by=uploaded_by,
     )
-    db.add(ver)
-    db.commit()
-    db.refresh(ver)
-    return ver
+    return _save(db, ver, commit)
+
+
+def get_or_create_version(
+    db: Session,
+    document: Document,
+    version_label: str,
+    file_path: str,
+    file_sha256: Optional[str] = None,
+    commit: bool = True,
+) -> DocumentVersion:
+    """
+    ไฟล์เนื้อหาเดิม (hash เดียวกัน) + label เดิมของเอกสารเดียวกัน → ใช้แถว version เดิม
+    """
+    if file_sha256:
+        ver = (
+            db.query(DocumentVersion)
+            .filter(
+                DocumentVersion.document_id == document.id,
+                DocumentVersion.file_sha256 == file_sha256,
+                DocumentVersion.version_label == version_label,
+            )
+            .order_by(DocumentVersion.id)
+            .first()
+        )
+        if ver:
+            if ver.file_path != file_path and not os.path.exists(ver.file_path):
+                # ไฟล์เดิมถูก gc ลบไปแล้ว → ใช้ไฟล์ที่เพิ่งได้มาแทน
+                ver.file_path = file_path
+                _save(db, ver, commit)
+            return ver
+    ver = DocumentVersion(
+        document_id=document.id,
+        version_label=version_label,
+        file_path=file_path,
+        file_sha256=file_sha256,
+    )
+    return _save(db, ver, commit)
 
 
 def create_comparison(
@@ -43,6 +102,7 @@ def create_comparison(
     version_new: DocumentVersion,
     overall_risk_level: Optional[str],
     summary_text: Optional[str],
+    commit: bool = True,
 ) -> Comparison:
     comp = Comparison(
         document_id=document.id,
@@ -51,10 +111,7 @@ def create_comparison(
         overall_risk_level=overall_risk_level,
         summary_text=summary_text,
     )
-    db.add(comp)
-    db.commit()
-    db.refresh(comp)
-    return comp
+    return _save(db, comp, commit)
 
 
 def bulk_insert_changes(
@@ -81,10 +138,302 @@ def bulk_insert_changes(
             section_label=ch.get("section_label"),
             old_text=ch.get("old_text"),
             new_text=ch.get("new_text"),
+            word_ops=ch.get("word_ops"),
             risk_level=ch.get("risk_level"),
+            risk_keywords=ch.get("risk_keywords"),
             ai_comment=ch.get("ai_comment"),
+            old_bbox=ch.get("old_bbox"),
+            new_bbox=ch.get("new_bbox"),
         )
         db.add(item)
         items.append(item)
     db.commit()
     return items
+
+
+_CHANGE_COLUMNS = (
+    "change_type", "section_label", "old_text", "new_text", "word_ops",
+    "risk_level", "risk_keywords", "ai_comment", "old_bbox", "new_bbox",
+)
+
+
+def insert_changes(db: Session, comparison_id: int, changes: List[dict]) -> int:
+    """
+    insert รายการเปลี่ยนแปลงด้วย Core executemany (ไม่สร้าง ORM object ทีละแถว และไม่ commit)
+    changes: รูปแบบเดียวกับ bulk_insert_changes — คืนจำนวนแถวที่ insert
+    """
+    if not changes:
+        return 0
+    rows = [
+        {"comparison_id": comparison_id, **{col: ch.get(col) for col in _CHANGE_COLUMNS}}
+        for ch in changes
+    ]
+    db.execute(insert(ChangeItem.__table__), rows)
+    return len(rows)
+
+
+def save_comparison(
+    db: Session,
+    doc_name: str,
+    old_label: str,
+    old_path: str,
+    new_label: str,
+    new_path: str,
+    overall_risk_level: Optional[str],
+    summary_text: Optional[str],
+    changes: List[dict],
+    category: Optional[str] = None,
+    old_sha256: Optional[str] = None,
+    new_sha256: Optional[str] = None,
+) -> int:
+    """
+    บันทึกผลเปรียบเทียบทั้งชุด (document, 2 versions, comparison, changes)
+    ส่ง sha256 ของไฟล์มาด้วย → ใช้แถว version เดิมถ้าเคยบันทึกไฟล์นี้แล้ว
+    ใน transaction เดียว → commit/fsync ครั้งเดียว; error กลางทาง = rollback ทั้งหมด
+    คืน comparison id
+    """
+    try:
+        doc = get_or_create_document(db, doc_name, category=category, commit=False)
+        ver_old = get_or_create_version(db, doc, old_label, old_path, old_sha256, commit=False)
+        ver_new = get_or_create_version(db, doc, new_label, new_path, new_sha256, commit=False)
+        comp = create_comparison(
+            db, doc, ver_old, ver_new, overall_risk_level, summary_text, commit=False
+        )
+        comp_id = comp.id
+        insert_changes(db, comp_id, changes)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return comp_id
+
+
+def find_comparison_result(db: Session, result_key: str) -> Optional[Comparison]:
+    """
+    comparison ล่าสุดที่บันทึกผลไว้ด้วย key นี้ (ใช้ตอบซ้ำโดยไม่ต้องเปรียบเทียบใหม่)
+    """
+    return (
+        db.query(Comparison)
+        .filter(Comparison.result_key == result_key, Comparison.result_json.isnot(None))
+        .order_by(Comparison.id.desc())
+        .first()
+    )
+
+
+def set_comparison_result(
+    db: Session,
+    comparison_id: int,
+    result_key: str,
+    result: Dict[str, Any],
+    metrics: Optional[Dict[str, Any]] = None,
+) -> None:
+    db.query(Comparison).filter(Comparison.id == comparison_id).update(
+        {
+            "result_key": result_key,
+            "result_json": json.dumps(result, ensure_ascii=False),
+            "metrics_json": json.dumps(metrics, ensure_ascii=False) if metrics else None,
+        }
+    )
+    db.commit()
+
+
+def save_match_state(
+    db: Session,
+    comparison_id: int,
+    settings_key: str,
+    matches: List[list],
+    page_fingerprints: Dict[int, List[list]],
+) -> None:
+    """
+    เก็บผลจับคู่ทั้งหมดของ comparison + page fingerprints ของ version (ที่ยังไม่มี)
+    ไว้ให้รอบถัดไปเทียบแบบ incremental ต่อได้ — page_fingerprints: version id → fingerprints
+    """
+    db.query(Comparison).filter(Comparison.id == comparison_id).update(
+        {"match_json": json.dumps(matches), "settings_key": settings_key}
+    )
+    for version_id, fps in page_fingerprints.items():
+        db.query(DocumentVersion).filter(
+            DocumentVersion.id == version_id, DocumentVersion.page_fingerprints.is_(None)
+        ).update({"page_fingerprints": json.dumps(fps)})
+    db.commit()
+
+
+def create_job(db: Session, job_id: str, kind: str, params: Dict[str, Any]) -> Job:
+    job = Job(
+        id=job_id,
+        kind=kind,
+        status="QUEUED",
+        progress=0.0,
+        params=json.dumps(params, ensure_ascii=False),
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def get_job(db: Session, job_id: str) -> Optional[Job]:
+    return db.query(Job).filter(Job.id == job_id).first()
+
+
+def list_job_ids(db: Session, status: str) -> List[str]:
+    rows = (
+        db.query(Job.id)
+        .filter(Job.status == status)
+        .order_by(Job.created_at)
+        .all()
+    )
+    return [r[0] for r in rows]
+
+
+# params ของงานที่เก็บ path ไฟล์อัปโหลด ("compare" / "batch_compare")
+_JOB_PATH_KEYS = ("v1_path", "v2_path", "paths")
+
+
+def list_referenced_file_paths(db: Session, keep_versions: int = 2) -> List[str]:
+    """
+    path ไฟล์ที่ต้องเก็บไว้: ไฟล์ของ keep_versions version ล่าสุดของแต่ละเอกสาร
+    + path ใน params ของงานที่ยังไม่จบ (QUEUED / RUNNING — งานค้างถูกรันต่อหลัง restart)
+
+    version ที่เก่ากว่านั้นลบไฟล์ได้ — อัปโหลดไฟล์เนื้อหาเดิมอีกครั้ง → get_or_create_version
+    ชี้ file_path ของแถวเดิมไปยังไฟล์ใหม่
+    """
+    rank = (
+        func.row_number()
+        .over(partition_by=DocumentVersion.document_id, order_by=DocumentVersion.id.desc())
+        .label("rank")
+    )
+    latest = db.query(DocumentVersion.file_path, rank).subquery()
+    paths = [
+        r[0] for r in db.query(latest.c.file_path).filter(latest.c.rank <= keep_versions).distinct()
+    ]
+    rows = db.query(Job.params).filter(Job.status.in_(("QUEUED", "RUNNING"))).all()
+    for (params,) in rows:
+        data = json.loads(params)
+        for key in _JOB_PATH_KEYS:
+            value = data.get(key)
+            if isinstance(value, str):
+                paths.append(value)
+            elif isinstance(value, list):
+                paths += [v for v in value if isinstance(v, str)]
+    return paths
+
+
+def count_jobs_by_status(db: Session) -> Dict[str, int]:
+    rows = db.query(Job.status, func.count(Job.id)).group_by(Job.status).all()
+    return {status: n for status, n in rows}
+
+
+def update_job(db: Session, job_id: str, **fields) -> None:
+    """
+    อัปเดตเฉพาะ field ที่ส่งมา เช่น update_job(db, id, status="RUNNING", stage="match")
+    result ที่เป็น dict จะถูกแปลงเป็น JSON ให้
+    """
+    if "result" in fields and fields["result"] is not None:
+        fields["result"] = json.dumps(fields["result"], ensure_ascii=False)
+    if fields.get("status") == "RUNNING" and "started_at" not in fields:
+        fields["started_at"] = datetime.utcnow()
+    if fields.get("status") in ("DONE", "FAILED") and "finished_at" not in fields:
+        fields["finished_at"] = datetime.utcnow()
+
+    db.query(Job).filter(Job.id == job_id).update(fields)
+    db.commit()
+
+
+# ---------- อ่านข้อมูลแบบแบ่งหน้า (keyset) ----------
+
+
+def _keyset_page(query, id_column, after_id: Optional[int], limit: int):
+    """
+    แบ่งหน้าด้วย "id > after_id ORDER BY id LIMIT n" (ไม่ใช้ OFFSET → หน้าลึก ๆ ก็เร็วเท่าหน้าแรก)
+    คืน (items, next_after) — next_after เป็น None เมื่อถึงหน้าสุดท้าย
+    """
+    if after_id is not None:
+        query = query.filter(id_column > after_id)
+    items = query.order_by(id_column).limit(limit + 1).all()
+    if len(items) > limit:
+        items = items[:limit]
+        return items, items[-1].id
+    return items, None
+
+
+def list_documents(
+    db: Session,
+    after_id: Optional[int] = None,
+    limit: int = 50,
+    name_prefix: Optional[str] = None,
+):
+    query = db.query(Document)
+    if name_prefix:
+        query = query.filter(Document.name.startswith(name_prefix, autoescape=True))
+    return _keyset_page(query, Document.id, after_id, limit)
+
+
+def list_versions(db: Session, document_id: int, after_id: Optional[int] = None, limit: int = 50):
+    query = db.query(DocumentVersion).filter(DocumentVersion.document_id == document_id)
+    return _keyset_page(query, DocumentVersion.id, after_id, limit)
+
+
+def list_comparisons(
+    db: Session,
+    document_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+    limit: int = 50,
+):
+    query = db.query(Comparison)
+    if document_id is not None:
+        query = query.filter(Comparison.document_id == document_id)
+    return _keyset_page(query, Comparison.id, after_id, limit)
+
+
+def get_comparison(db: Session, comparison_id: int) -> Optional[Comparison]:
+    return db.query(Comparison).filter(Comparison.id == comparison_id).first()
+
+
+def list_changes(
+    db: Session,
+    comparison_id: int,
+    after_id: Optional[int] = None,
+    limit: int = 100,
+    change_type: Optional[str] = None,
+    risk_level: Optional[str] = None,
+):
+    query = db.query(ChangeItem).filter(ChangeItem.comparison_id == comparison_id)
+    if change_type:
+        query = query.filter(ChangeItem.change_type == change_type)
+    if risk_level:
+        query = query.filter(ChangeItem.risk_level == risk_level)
+    return _keyset_page(query, ChangeItem.id, after_id, limit)
+
+
+def iter_change_batches(
+    db: Session,
+    comparison_id: int,
+    batch_size: int = 1000,
+    change_type: Optional[str] = None,
+    risk_level: Optional[str] = None,
+) -> Iterator[List[ChangeItem]]:
+    """
+    ไล่อ่าน change ทั้งหมดของ comparison ทีละ batch (keyset ตาม id) สำหรับ stream ออกไป
+    object ของ batch ก่อนหน้าถูก expunge ออกจาก session → หน่วยความจำไม่โตตามจำนวน change
+    """
+    after_id = None
+    while True:
+        items, after_id = list_changes(
+            db, comparison_id, after_id, batch_size, change_type=change_type, risk_level=risk_level
+        )
+        if items:
+            yield items
+        db.expunge_all()
+        if after_id is None:
+            return
+
+
+def count_changes_by_type(db: Session, comparison_id: int) -> Dict[str, int]:
+    rows = (
+        db.query(ChangeItem.change_type, func.count())
+        .filter(ChangeItem.comparison_id == comparison_id)
+        .group_by(ChangeItem.change_type)
+        .all()
+    )
+    return {change_type: n for change_type, n in rows}
@@ -1,16 +1,44 @@
 # src/db/session.py
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 DATABASE_URL = "sqlite:///./data/versioning.db"
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False},  # สำหรับ SQLite
-)
+# ค่าที่ตั้งทุกครั้งที่เปิด connection ใหม่ของ SQLite
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",      # อ่านได้ระหว่างเขียน + fsync น้อยลง
+    "synchronous": "NORMAL",    # ปลอดภัยเมื่อใช้ WAL (อาจเสียแค่ transaction ล่าสุดถ้าไฟดับ)
+    "temp_store": "MEMORY",
+    "cache_size": -64000,       # ~64 MB page cache
+    "busy_timeout": 30000,      # รอ lock สูงสุด 30 วินาที (หลาย job เขียนพร้อมกัน)
+}
+
+
+def make_engine(url: str = DATABASE_URL, tune_sqlite: bool = True) -> Engine:
+    """
+    สร้าง engine; ถ้าเป็น SQLite และ tune_sqlite=True จะตั้ง SQLITE_PRAGMAS ให้ทุก connection
+    """
+    is_sqlite = url.startswith("sqlite")
+    eng = create_engine(
+        url,
+        connect_args={"check_same_thread": False} if is_sqlite else {},  # สำหรับ SQLite
+    )
+
+    if is_sqlite and tune_sqlite:
+        @event.listens_for(eng, "connect")
+        def _set_sqlite_pragmas(dbapi_conn, _record):
+            cur = dbapi_conn.cursor()
+            for name, value in SQLITE_PRAGMAS.items():
+                cur.execute(f"PRAGMA {name}={value}")
+            cur.close()
+
+    return eng
+
+
+engine = make_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
-
@@ -1,57 +1,109 @@
 # src/diff/diff_engine.py
 
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Dict, List, Optional
 from matching.paragraph_matcher import ParagraphMatch
 from ingestion.paragraph_splitter import Paragraph
 
+from .word_diff import MAX_EDITS, word_opcodes
+
 
 @dataclass
 class Change:
-    change_type: str  # ADDED / REMOVED / MODIFIED
+    change_type: str  # ADDED / REMOVED / MODIFIED / MOVED
     section_label: str
     old_text: Optional[str]
     new_text: Optional[str]
+    # ช่วงที่ต่างระดับคำ (offset ตัวอักษร) ของ MODIFIED / MOVED — ดู diff.word_diff
+    word_ops: Optional[List[list]] = None
+    # หน้าที่ใช้กรอง/เรียงใน report (หน้าของเวอร์ชันใหม่ ยกเว้น REMOVED ใช้หน้าเดิม)
+    page: Optional[int] = None
+    # ใส่โดย analysis.risk_engine หลังสร้าง change list
+    risk_level: Optional[str] = None
+    risk_keywords: Optional[List[str]] = None
+    # ตำแหน่งบนหน้าของย่อหน้าเดิม/ใหม่ [x0, y0, x1, y1] (pt) — None เมื่อมาจาก OCR ทั้งหน้า
+    old_bbox: Optional[List[float]] = None
+    new_bbox: Optional[List[float]] = None
 
 
 class DiffEngine:
+    # คู่ที่คล้ายกันมากกว่านี้ถือว่าไม่เปลี่ยน ไม่ใส่ใน change list
+    unchanged_threshold: float = 0.95
+    # Myers ระดับคำ: เกินจำนวน edit นี้ → highlight ทั้งช่วงกลางที่ต่างเป็นก้อนเดียว
+    word_diff_max_edits: int = MAX_EDITS
+
+    def settings(self) -> Dict:
+        return {
+            "unchanged_threshold": self.unchanged_threshold,
+            "word_diff_max_edits": self.word_diff_max_edits,
+        }
+
+    @staticmethod
+    def _label(p: Paragraph) -> str:
+        """
+        "หมวด ๒ การลา › ข้อ ๕ (page 3)" เมื่อ splitter หา section ได้ ไม่งั้น "page 3"
+        """
+        if p.section:
+            return f"{p.section} (page {p.page_number})"
+        return f"page {p.page_number}"
+
     def build_changes(self, matches: List[ParagraphMatch]) -> List[Change]:
         changes: List[Change] = []
 
         for m in matches:
+            # กรณีย้ายตำแหน่ง (อาจแก้ไขด้วย) — มาจาก ParagraphMatcher โหมด align
+            if m.old and m.new and m.moved:
+                change_type = "MOVED"
+                section_label = f"{self._label(m.old)} → {self._label(m.new)}"
+                page = m.new.page_number
+                old_text = m.old.text
+                new_text = m.new.text
+
             # กรณีแก้ไข
-            if m.old and m.new:
-                if m.similarity > 0.95:
+            elif m.old and m.new:
+                if m.similarity > self.unchanged_threshold:
                     # เหมือนเดิม ไม่ต้องใส่ใน change list
                     continue
                 change_type = "MODIFIED"
-                section_label = f"page {m.new.page_number}"
+                section_label = self._label(m.new)
+                page = m.new.page_number
                 old_text = m.old.text
                 new_text = m.new.text
 
             # กรณีถูกลบ
             elif m.old and not m.new:
                 change_type = "REMOVED"
-                section_label = f"page {m.old.page_number}"
+                section_label = self._label(m.old)
+                page = m.old.page_number
                 old_text = m.old.text
                 new_text = None
 
             # กรณีเพิ่มใหม่
             elif m.new and not m.old:
                 change_type = "ADDED"
-                section_label = f"page {m.new.page_number}"
+                section_label = self._label(m.new)
+                page = m.new.page_number
                 old_text = None
                 new_text = m.new.text
             else:
                 # safety
                 continue
 
+            # คำนวณครั้งเดียวตอนสร้าง change → report / DB ใช้ต่อได้เลย
+            word_ops = None
+            if old_text is not None and new_text is not None and old_text != new_text:
+                word_ops = word_opcodes(old_text, new_text, self.word_diff_max_edits)
+
             changes.append(
                 Change(
                     change_type=change_type,
                     section_label=section_label,
                     old_text=old_text,
                     new_text=new_text,
+                    word_ops=word_ops,
+                    page=page,
+                    old_bbox=m.old.bbox if m.old else None,
+                    new_bbox=m.new.bbox if m.new else None,
                 )
             )
 
@@ -0,0 +1,217 @@
+# src/diff/word_diff.py
+"""
+diff ระดับคำภายในย่อหน้า (ใช้กับ change ประเภท MODIFIED / MOVED)
+
+- tokenize : แยก token แบบไม่สูญเสียข้อมูล ("".join(tokens) == text)
+             คำภาษาอังกฤษ / ตัวเลข / ช่องว่าง เป็น token ละชิ้น
+             ภาษาไทยไม่มีช่องว่างระหว่างคำ → ตัดเป็นกลุ่มพยางค์ (สระหน้า + พยัญชนะ + สระบน/ล่าง/วรรณยุกต์)
+             ไม่ต้องพึ่งพจนานุกรม แต่ละเอียดพอให้ highlight ตรงจุดที่แก้
+- Myers O((N+M)·D) บน token (ตัด prefix/suffix ที่เหมือนกันก่อน) แทน SequenceMatcher บนตัวอักษร
+  ถ้าจำนวน edit เกิน max_edits → ยอมแพ้ คืน replace ก้อนเดียวของช่วงกลางที่ต่างกัน
+
+ผลเก็บแบบ compact เป็น offset ตัวอักษร เฉพาะช่วงที่ต่าง:
+  [[tag, old_start, old_end, new_start, new_end], ...]   tag: "r" แทนที่ / "d" ลบ / "i" เพิ่ม
+→ report / DB render highlight ได้จากข้อความเดิมโดยไม่ต้องคำนวณใหม่ (render_inline)
+"""
+
+import html
+import re
+from typing import List, Optional, Sequence, Tuple
+
+# opcode ระดับ token แบบ difflib: (tag, i1, i2, j1, j2) โดย tag เป็น "e" / "r" / "d" / "i"
+Opcode = Tuple[str, int, int, int, int]
+
+MAX_EDITS = 1000
+
+_TOKEN_RE = re.compile(
+    r"\s+"
+    r"|[0-9๐-๙]+(?:[.,:/][0-9๐-๙]+)*"            # ตัวเลข (รวม 1,000.50 / 12/03 / เลขไทย)
+    r"|[A-Za-z]+(?:['’][A-Za-z]+)*"
+    r"|[เแโใไ]?[ก-ฮ][ัิ-ฺ็-๎]*[ะาำๅ]?"  # กลุ่มพยางค์ไทย
+    r"|.",
+    re.DOTALL,
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text or "")
+
+
+def _myers_blocks(a: Sequence[str], b: Sequence[str], max_edits: int) -> Optional[List[Tuple[int, int, int]]]:
+    """
+    matching blocks (i, j, size) ของ a กับ b ด้วย Myers (greedy, เก็บ trace ไว้ backtrack)
+    คืน None ถ้าต้องใช้ edit มากกว่า max_edits
+    """
+    n, m = len(a), len(b)
+    max_d = min(max_edits, n + m)
+    offset = max_d + 1
+    v = [0] * (2 * max_d + 3)
+    trace: List[List[int]] = []
+
+    for d in range(max_d + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                trace.append(v[offset - d:offset + d + 1])
+                return _backtrack(trace, n, m)
+        # trace[d] เก็บค่า x ปลายทางของทุก diagonal k ∈ [-d, d] (index = k + d)
+        trace.append(v[offset - d:offset + d + 1])
+
+    return None
+
+
+def _backtrack(trace: List[List[int]], n: int, m: int) -> List[Tuple[int, int, int]]:
+    x, y = n, m
+    blocks: List[Tuple[int, int, int]] = []
+
+    def diagonal(stop_x: int, stop_y: int) -> None:
+        nonlocal x, y
+        size = min(x - stop_x, y - stop_y)
+        if size > 0:
+            x -= size
+            y -= size
+            blocks.append((x, y, size))
+
+    for d in range(len(trace) - 1, 0, -1):
+        prev = trace[d - 1]
+        k = x - y
+        if k == -d or (k != d and prev[k - 1 + d - 1] < prev[k + 1 + d - 1]):
+            prev_k = k + 1   # มาจากการเพิ่ม b[prev_y]
+        else:
+            prev_k = k - 1   # มาจากการลบ a[prev_x]
+        prev_x = prev[prev_k + d - 1]
+        prev_y = prev_x - prev_k
+        diagonal(prev_x + (prev_k == k - 1), prev_y + (prev_k == k + 1))
+        x, y = prev_x, prev_y
+
+    diagonal(0, 0)
+    blocks.reverse()
+    return blocks
+
+
+def _blocks_to_opcodes(blocks: List[Tuple[int, int, int]], n: int, m: int) -> List[Opcode]:
+    ops: List[Opcode] = []
+    i = j = 0
+    for ai, bj, size in blocks + [(n, m, 0)]:
+        if i < ai and j < bj:
+            ops.append(("r", i, ai, j, bj))
+        elif i < ai:
+            ops.append(("d", i, ai, j, j))
+        elif j < bj:
+            ops.append(("i", i, i, j, bj))
+        i, j = ai + size, bj + size
+        if size:
+            ops.append(("e", ai, i, bj, j))
+    return ops
+
+
+def _offsets(tokens: Sequence[str]) -> List[int]:
+    """
+    offset ตัวอักษรเริ่มต้นของแต่ละ token (+ ความยาวรวมต่อท้าย)
+    """
+    pos = [0]
+    for tok in tokens:
+        pos.append(pos[-1] + len(tok))
+    return pos
+
+
+def _merge_small_gaps(ops: List[Opcode], a: Sequence[str], b: Sequence[str]) -> List[Opcode]:
+    """
+    ช่วงที่เหมือนกันสั้น ๆ คั่นกลางระหว่างสองช่วงที่ต่าง → รวมเป็นช่วงเดียว
+    (ช่องว่างล้วน หรือยาวไม่เกินช่วงที่ต่างทั้งสองข้าง แบบ semantic cleanup ของ diff-match-patch)
+    เช่น "หนังสือ" → "ใบแจ้งหนี้" ไม่แตกเป็นสามก้อนเพราะบังเอิญมี "ง" ตรงกัน
+    """
+
+    pa, pb = _offsets(a), _offsets(b)
+
+    def edit_len(op: Opcode) -> int:
+        _, i1, i2, j1, j2 = op
+        return max(pa[i2] - pa[i1], pb[j2] - pb[j1])
+
+    merged: List[Opcode] = []
+    for idx, op in enumerate(ops):
+        tag, i1, i2, j1, j2 = op
+        if tag == "e" and merged and merged[-1][0] != "e" and idx + 1 < len(ops):
+            gap = pa[i2] - pa[i1]
+            if all(not tok.strip() for tok in a[i1:i2]) or gap <= min(
+                edit_len(merged[-1]), edit_len(ops[idx + 1])
+            ):
+                tag = "r"
+        if merged and tag != "e" and merged[-1][0] != "e":
+            _, pi1, _, pj1, _ = merged[-1]
+            tag = "r" if (i2 > pi1 and j2 > pj1) else ("d" if i2 > pi1 else "i")
+            merged[-1] = (tag, pi1, i2, pj1, j2)
+        else:
+            merged.append((tag, i1, i2, j1, j2))
+    return merged
+
+
+def token_opcodes(a: Sequence[str], b: Sequence[str], max_edits: int = MAX_EDITS) -> List[Opcode]:
+    """
+    opcode ระดับ token (รวม "e") ครอบคลุมทั้งสองลำดับ
+    """
+    n, m = len(a), len(b)
+
+    # prefix / suffix ที่เหมือนกัน (กรณีทั่วไป: แก้ไม่กี่คำในย่อหน้ายาว)
+    pre = 0
+    while pre < n and pre < m and a[pre] == b[pre]:
+        pre += 1
+    suf = 0
+    while suf < n - pre and suf < m - pre and a[n - 1 - suf] == b[m - 1 - suf]:
+        suf += 1
+
+    mid_a, mid_b = a[pre:n - suf], b[pre:m - suf]
+    blocks = [(0, 0, pre)] if pre else []
+    inner = _myers_blocks(mid_a, mid_b, max_edits)
+    if inner is not None:
+        blocks += [(i + pre, j + pre, size) for i, j, size in inner]
+    if suf:
+        blocks.append((n - suf, m - suf, suf))
+
+    return _merge_small_gaps(_blocks_to_opcodes(blocks, n, m), a, b)
+
+
+def word_opcodes(old_text: str, new_text: str, max_edits: int = MAX_EDITS) -> List[List]:
+    """
+    ช่วงที่ต่างกันระหว่าง old_text กับ new_text แบบ compact (offset ตัวอักษร ไม่รวมช่วงที่เหมือน)
+    """
+    a, b = tokenize(old_text), tokenize(new_text)
+    pa, pb = _offsets(a), _offsets(b)
+    return [
+        [tag, pa[i1], pa[i2], pb[j1], pb[j2]]
+        for tag, i1, i2, j1, j2 in token_opcodes(a, b, max_edits)
+        if tag != "e"
+    ]
+
+
+def _text_html(text: str) -> str:
+    return html.escape(text).replace("\n", "<br>")
+
+
+def render_inline(old_text: str, new_text: str, ops: List[List]) -> Tuple[str, str]:
+    """
+    HTML ของข้อความเก่า/ใหม่ ที่ครอบช่วงที่ลบด้วย <del> และช่วงที่เพิ่มด้วย <ins>
+    """
+    old_text, new_text = old_text or "", new_text or ""
+    old_parts: List[str] = []
+    new_parts: List[str] = []
+    oi = ni = 0
+    for _tag, o1, o2, n1, n2 in ops:
+        old_parts.append(_text_html(old_text[oi:o1]))
+        new_parts.append(_text_html(new_text[ni:n1]))
+        if o2 > o1:
+            old_parts.append(f"<del>{_text_html(old_text[o1:o2])}</del>")
+        if n2 > n1:
+            new_parts.append(f"<ins>{_text_html(new_text[n1:n2])}</ins>")
+        oi, ni = o2, n2
+    old_parts.append(_text_html(old_text[oi:]))
+    new_parts.append(_text_html(new_text[ni:]))
+    return "".join(old_parts), "".join(new_parts)
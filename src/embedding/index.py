@@ -0,0 +1,50 @@
+# src/embedding/index.py
+"""
+ค้นหาเวกเตอร์ที่ใกล้ที่สุด top-k ด้วยการคูณ matrix ทีละก้อน (exact, ไม่ใช่ ANN)
+เวกเตอร์ normalize แล้ว → dot product = cosine similarity
+
+ขนาดเอกสารจริง (หลักหมื่นย่อหน้า × 4096 มิติ) คูณ matrix ด้วย BLAS ได้ในไม่กี่วินาที
+จึงยังไม่ต้องใช้ ANN index ที่ต้องพึ่งไลบรารีเพิ่มและให้ผลไม่ครบ
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+
+
+class VectorIndex:
+    # จำนวน query ต่อการคูณหนึ่งครั้ง → matrix ผลคูณชั่วคราวไม่เกิน CHUNK × จำนวนเวกเตอร์
+    CHUNK = 1024
+
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def top_k(self, queries: np.ndarray, k: int, min_score: float = 0.0) -> List[List[Tuple[int, float]]]:
+        """
+        คืน (index, cosine) ที่ใกล้ที่สุดไม่เกิน k ตัวของแต่ละ query เรียงจากมากไปน้อย
+        ตัดตัวที่ cosine < min_score ทิ้ง
+        """
+        results: List[List[Tuple[int, float]]] = []
+        n = len(self.vectors)
+        if n == 0 or k <= 0:
+            return [[] for _ in range(len(queries))]
+        k = min(k, n)
+
+        for start in range(0, len(queries), self.CHUNK):
+            sims = queries[start:start + self.CHUNK] @ self.vectors.T
+            if k < n:
+                part = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+            else:
+                part = np.broadcast_to(np.arange(n), (len(sims), n))
+            top = np.take_along_axis(sims, part, axis=1)
+            order = np.argsort(-top, axis=1, kind="stable")
+            for ids, scores in zip(
+                np.take_along_axis(part, order, axis=1), np.take_along_axis(top, order, axis=1)
+            ):
+                results.append(
+                    [(int(i), float(s)) for i, s in zip(ids, scores) if s >= min_score]
+                )
+        return results
@@ -0,0 +1,47 @@
+# src/embedding/semantic.py
+"""
+จับคู่ย่อหน้าที่ "ความหมายใกล้กัน" แต่ถ้อยคำต่างกันจน string similarity ต่ำกว่า threshold
+(เช่น เขียนข้อสัญญาใหม่ทั้งประโยค) — ใช้เป็นขั้นเสริมกับย่อหน้าที่ ParagraphMatcher จับคู่ไม่ได้
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+from .index import VectorIndex
+from .vectorizer import HashedNgramVectorizer, get_vectorizer
+
+
+def semantic_pairs(
+    old_texts: Sequence[str],
+    new_texts: Sequence[str],
+    min_cosine: float = 0.75,
+    top_k: int = 5,
+    vectorizer: Optional[HashedNgramVectorizer] = None,
+) -> List[Tuple[int, int, float]]:
+    """
+    คืนคู่ (index ฝั่ง old, index ฝั่ง new, cosine) แบบหนึ่งต่อหนึ่ง
+    เลือกแบบ greedy จากคู่ที่ cosine สูงสุดก่อน (เสมอกัน → index ต่ำกว่าก่อน)
+    เรียงผลตาม index ฝั่ง old
+    """
+    if not old_texts or not new_texts:
+        return []
+    vectorizer = vectorizer or get_vectorizer()
+    old_vecs, new_vecs = vectorizer.encode(old_texts, new_texts)
+
+    candidates = [
+        (score, i, j)
+        for i, hits in enumerate(VectorIndex(new_vecs).top_k(old_vecs, top_k, min_cosine))
+        for j, score in hits
+    ]
+    candidates.sort(key=lambda c: (-c[0], c[1], c[2]))
+
+    used_old, used_new = set(), set()
+    pairs: List[Tuple[int, int, float]] = []
+    for score, i, j in candidates:
+        if i in used_old or j in used_new:
+            continue
+        used_old.add(i)
+        used_new.add(j)
+        pairs.append((i, j, score))
+
+    pairs.sort()
+    return pairs
@@ -0,0 +1,121 @@
+# src/embedding/vectorizer.py
+"""
+เวกเตอร์ของย่อหน้าแบบ offline ล้วน (ไม่มีโมเดล ไม่ต่อเน็ต): hashed character n-gram TF-IDF
+
+- ทำ normalize (ตัวพิมพ์เล็ก + ยุบช่องว่าง) แล้วตัด n-gram ของตัวอักษรหลายขนาด (ค่าเริ่มต้น 2–4)
+  ภาษาไทยไม่มีช่องว่างระหว่างคำ → n-gram ตัวอักษรจับรากคำ/พยางค์ที่ใช้ร่วมกันได้แม้เรียงประโยคใหม่
+- hash n-gram ลง dim ช่องด้วย rolling hash บน code point (numpy ทั้งก้อน ไม่วน Python ทีละ n-gram)
+- TF แบบ sublinear (1 + log tf) ของแต่ละย่อหน้า cache ไว้ตาม hash ของข้อความ
+  IDF คิดจากชุดย่อหน้าที่ encode พร้อมกัน (เช่น V1 + V2) แล้ว normalize L2 → dot product = cosine
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# TF แบบ sparse ของย่อหน้าหนึ่ง: (index ช่อง hash, ค่า 1 + log tf)
+SparseTF = Tuple[np.ndarray, np.ndarray]
+
+_HASH_BASE = np.uint64(1_000_003)
+
+
+def normalize_text(text: str) -> str:
+    return " ".join((text or "").lower().split())
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class HashedNgramVectorizer:
+    def __init__(
+        self,
+        dim: int = 4096,
+        ngram_range: Tuple[int, int] = (2, 4),
+        cache_size: int = 200_000,
+    ):
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.cache_size = cache_size
+        # hash ของข้อความ → SparseTF (LRU) — ย่อหน้าที่เคยเห็นแล้วไม่ต้องตัด n-gram ใหม่
+        self._cache: "OrderedDict[str, SparseTF]" = OrderedDict()
+        self.cache_hits = 0
+
+    def settings(self) -> Dict:
+        return {"dim": self.dim, "ngram_range": list(self.ngram_range)}
+
+    def _term_freqs(self, text: str) -> SparseTF:
+        text = f" {normalize_text(text)} "
+        codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        lo, hi = self.ngram_range
+
+        hashes = []
+        rolling = np.zeros(len(codes), dtype=np.uint64)
+        for n in range(1, hi + 1):
+            # rolling[i] = hash ของ codes[i:i+n] (ล้น uint64 ได้ ถือเป็น mod 2^64)
+            if n == 1:
+                rolling = codes.copy()
+            else:
+                rolling = rolling[:-1] * _HASH_BASE + codes[n - 1:]
+            if n >= lo and len(rolling):
+                # ผสมความยาว n เข้าไป กัน n-gram ต่างขนาดชนช่องเดียวกันเป็นระบบ
+                hashes.append((rolling ^ np.uint64(n * 0x9E3779B97F4A7C15 & 0xFFFFFFFFFFFFFFFF)))
+
+        if not hashes:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        buckets = (np.concatenate(hashes) >> np.uint64(17)) % np.uint64(self.dim)
+        idx, counts = np.unique(buckets.astype(np.int64), return_counts=True)
+        return idx, (1.0 + np.log(counts)).astype(np.float32)
+
+    def term_freqs(self, text: str) -> SparseTF:
+        key = text_key(text)
+        tf = self._cache.get(key)
+        if tf is not None:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return tf
+        tf = self._term_freqs(text)
+        self._cache[key] = tf
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return tf
+
+    def encode(self, *corpora: Sequence[str]) -> List[np.ndarray]:
+        """
+        encode หลายชุดข้อความพร้อมกัน (IDF คิดจากทุกชุดรวมกัน)
+        คืน matrix float32 (จำนวนข้อความ × dim) ที่แต่ละแถวยาว 1 ต่อชุด
+        """
+        tfs = [[self.term_freqs(t) for t in texts] for texts in corpora]
+        n_docs = sum(len(rows) for rows in tfs)
+
+        df = np.zeros(self.dim, dtype=np.float32)
+        for rows in tfs:
+            for idx, _ in rows:
+                df[idx] += 1.0
+        idf = np.log((1.0 + n_docs) / (1.0 + df)).astype(np.float32) + 1.0
+
+        matrices = []
+        for rows in tfs:
+            mat = np.zeros((len(rows), self.dim), dtype=np.float32)
+            for r, (idx, vals) in enumerate(rows):
+                mat[r, idx] = vals
+            mat *= idf
+            norms = np.linalg.norm(mat, axis=1, keepdims=True)
+            np.divide(mat, norms, out=mat, where=norms > 0)
+            matrices.append(mat)
+        return matrices
+
+
+_default_vectorizer = None
+
+
+def get_vectorizer() -> HashedNgramVectorizer:
+    """
+    ตัวเดียวต่อ process → cache ของย่อหน้าใช้ข้ามการเปรียบเทียบได้ (เช่น V1 ของรอบก่อน)
+    """
+    global _default_vectorizer
+    if _default_vectorizer is None:
+        _default_vectorizer = HashedNgramVectorizer()
+    return _default_vectorizer
@@ -0,0 +1,67 @@
+# src/ingestion/fingerprint.py
+
+import hashlib
+import re
+from typing import Iterator, Set
+
+import fitz  # PyMuPDF
+
+
+_REF_RE = re.compile(rb"(\d+)\s+0\s+R")
+
+
+def _xobject_refs(doc: "fitz.Document", xref: int) -> Iterator[int]:
+    """
+    xref ของ XObject ใน /Resources /XObject ของ object นี้ (หน้า หรือ Form XObject)
+    """
+    kind, value = doc.xref_get_key(xref, "Resources/XObject")
+    if kind == "xref":
+        # dict ของ XObject เป็น object แยก → อ่าน dict นั้นแทน
+        value = doc.xref_object(int(value.split()[0]), compressed=True)
+    elif kind != "dict":
+        return
+    for ref in _REF_RE.findall(value.encode()):
+        yield int(ref)
+
+
+def _hash_xobjects(doc: "fitz.Document", xref: int, h: "hashlib._Hash", seen: Set[int]) -> None:
+    """
+    content stream ของ XObject ทุกตัวที่หน้า/ฟอร์มนี้อ้างถึง รวมถึงฟอร์มซ้อนฟอร์ม
+    (หน้าที่วาดทุกอย่างผ่าน "/fzFrm0 Do" มี content stream ของหน้าเหมือนกันหมด)
+    """
+    for ref in _xobject_refs(doc, xref):
+        if ref in seen:
+            continue
+        seen.add(ref)
+        h.update(b"xobj")
+        h.update(doc.xref_stream_raw(ref) or b"")
+        if doc.xref_get_key(ref, "Subtype")[1] == "/Form":
+            _hash_xobjects(doc, ref, h, seen)
+
+
+def page_content_hash(page: "fitz.Page") -> str:
+    """
+    hash ของเนื้อหาที่มีผลต่อข้อความที่ดึงได้จากหน้านี้:
+    content stream (รวม Form XObject ทุกชั้น), ขนาด/การหมุนหน้า, ข้อมูลรูปภาพ และชนิดฟอนต์ + ToUnicode
+
+    หน้าที่เหมือนกันทุกไบต์ในไฟล์ต่างเวอร์ชันจะได้ hash เดียวกัน
+    """
+    doc = page.parent
+    h = hashlib.sha256()
+    h.update(repr((tuple(page.rect), page.rotation)).encode())
+    h.update(page.read_contents())
+    _hash_xobjects(doc, page.xref, h, set())
+
+    for img in page.get_images(full=True):
+        h.update(b"img")
+        h.update(doc.xref_stream_raw(img[0]) or b"")
+
+    for font in page.get_fonts(full=True):
+        xref, _, font_type, basefont, _, encoding = font[:6]
+        # ไม่ใช้เลข xref และ prefix ของ subset font (เช่น "ABCDEE+") เพราะเปลี่ยนทุกครั้งที่ save
+        h.update(repr((font_type, basefont.split("+")[-1], encoding)).encode())
+        kind, value = doc.xref_get_key(xref, "ToUnicode")
+        if kind == "xref":
+            h.update(doc.xref_stream_raw(int(value.split()[0])) or b"")
+
+    return h.hexdigest()
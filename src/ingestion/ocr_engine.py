@@ -1,25 +1,198 @@
 # src/ingestion/ocr_engine.py
+"""
+ตัวห่อเรียก Tesseract OCR แบบเลือก backend ได้
+
+- "subprocess" : เรียก tesseract ทีละรูป (แบบเดิมของ pytesseract.image_to_string) → ทุกรูปเปิด
+                 process ใหม่ เขียนไฟล์รูปชั่วคราว และโหลด traineddata (tha+eng) ใหม่ทุกครั้ง
+- "batch"      : เรียก tesseract ครั้งเดียวต่อชุดรูป (ส่งไฟล์รายชื่อรูปเป็น input)
+                 → โหลดโมเดลภาษาครั้งเดียวต่อชุด ผลแต่ละรูปคั่นด้วย form feed (\\f)
+- "tesserocr"  : เรียก libtesseract ใน process เดียวกัน (pip install tesserocr)
+                 โหลดโมเดลครั้งเดียวต่อ thread แล้วใช้ซ้ำ (PyTessBaseAPI ใช้ข้าม thread ไม่ได้
+                 → แยก instance ต่อ thread เช่น thread V1/V2 ของ extract_pair)
+                 ใช้คู่กับ process pool ของ PDFLoaderWithOCR (workers > 1) → pool ถาวรที่แต่ละ
+                 worker โหลดโมเดลครั้งเดียว
+- "auto"       : tesserocr ถ้าติดตั้งไว้ ไม่งั้น batch (ค่าเริ่มต้น)
+
+⚠️ เปลี่ยนค่าเริ่มต้น: เดิม OCR ผ่าน pytesseract ทีละหน้า ตอนนี้ไม่ใช้ pytesseract แล้ว
+(เอาออกจาก requirements.txt) ค่าเริ่มต้น "auto" → tesserocr หรือ batch (เรียกโปรแกรม tesseract
+ครั้งเดียวต่อ OCR_BATCH_SIZE หน้า) ต้องการพฤติกรรมแบบเดิม (process ละหน้า) → OCR_BACKEND=subprocess
+ทุก backend ยังต้องมีโปรแกรม tesseract + traineddata tha/eng ในเครื่อง ยกเว้น tesserocr ที่ลิงก์ libtesseract
+
+ตำแหน่ง tesseract: ระบุ tesseract_cmd ตรง ๆ หรือ env TESSERACT_CMD
+ไม่ระบุ → หาใน PATH (Windows ลองโฟลเดอร์ติดตั้งมาตรฐานด้วย)
+ทุก backend ที่เรียกโปรแกรม tesseract ใช้ path ของ engine นั้นเอง (ไม่ตั้งค่า global ของ pytesseract
+ซึ่งจะไปเปลี่ยน path ของ engine อื่นใน process เดียวกันด้วย)
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from typing import List, Optional
 
 from PIL import Image
-import pytesseract
 
-# 👇 ชี้ path ไปหา tesseract.exe ของคุณ
-pytesseract.pytesseract.tesseract_cmd = r"D:\Tesseract OCR\tesseract.exe"
+OCR_BACKEND = os.getenv("OCR_BACKEND", "auto")
+OCR_BATCH_SIZE = int(os.getenv("OCR_BATCH_SIZE", "8"))
+BACKENDS = ("auto", "subprocess", "batch", "tesserocr")
+
+_WINDOWS_CANDIDATES = (
+    r"C:\Program Files\Tesseract-OCR\tesseract.exe",
+    r"C:\Program Files (x86)\Tesseract-OCR\tesseract.exe",
+)
+
+
+def resolve_tesseract_cmd(tesseract_cmd: Optional[str] = None) -> str:
+    """
+    ลำดับ: ค่าที่ส่งมา → env TESSERACT_CMD → PATH → โฟลเดอร์มาตรฐานของ Windows → "tesseract"
+    """
+    cmd = tesseract_cmd or os.getenv("TESSERACT_CMD")
+    if cmd:
+        return cmd
+    found = shutil.which("tesseract")
+    if found:
+        return found
+    if os.name == "nt":
+        for candidate in _WINDOWS_CANDIDATES:
+            if os.path.exists(candidate):
+                return candidate
+    return "tesseract"
+
+
+def has_tesserocr() -> bool:
+    try:
+        import tesserocr  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _clean(text: str) -> str:
+    return text.replace("\r", " ").strip()
 
 
 class OCREngine:
     """
     ตัวห่อเรียก Tesseract OCR
     ตอนนี้เน้นอ่านข้อความภาษาไทย + อังกฤษ
+
+    ocr_image()  → OCR รูปเดียว
+    ocr_images() → OCR หลายรูปในครั้งเดียว (backend "batch" ได้ประโยชน์จริง
+                   ส่วน backend อื่นวนทีละรูป) — ขนาดชุดที่แนะนำอยู่ใน batch_size
     """
 
-    def __init__(self, lang: str = "tha+eng"):
+    def __init__(
+        self,
+        lang: str = "tha+eng",
+        backend: Optional[str] = None,
+        tesseract_cmd: Optional[str] = None,
+        tessdata_dir: Optional[str] = None,
+        batch_size: Optional[int] = None,
+    ):
+        backend = backend or OCR_BACKEND
+        if backend not in BACKENDS:
+            raise ValueError(f"ไม่รู้จัก OCR backend: {backend}")
+        if backend == "auto":
+            backend = "tesserocr" if has_tesserocr() else "batch"
+
         self.lang = lang
+        self.backend = backend
+        self.tesseract_cmd = resolve_tesseract_cmd(tesseract_cmd)
+        self.tessdata_dir = tessdata_dir
+        self.batch_size = max(1, batch_size or OCR_BATCH_SIZE) if backend == "batch" else 1
+        # tesserocr.PyTessBaseAPI ต่อ thread (สร้างเมื่อ thread นั้นใช้ครั้งแรก)
+        self._local = threading.local()
+        self._apis: List = []  # ทุก instance ที่สร้าง → ปิดให้หมดใน close()
+        self._apis_lock = threading.Lock()
+
+    # --- tesserocr: โมเดลโหลดครั้งเดียวต่อ thread ---
+
+    def _tesserocr_api(self):
+        api = getattr(self._local, "api", None)
+        if api is None:
+            import tesserocr
+
+            kwargs = {"lang": self.lang}
+            if self.tessdata_dir:
+                kwargs["path"] = self.tessdata_dir
+            api = tesserocr.PyTessBaseAPI(**kwargs)
+            self._local.api = api
+            with self._apis_lock:
+                self._apis.append(api)
+        return api
+
+    def _ocr_tesserocr(self, image: Image.Image) -> str:
+        api = self._tesserocr_api()
+        api.SetImage(image)
+        return api.GetUTF8Text()
+
+    # --- subprocess / batch: เรียกโปรแกรม tesseract ---
+
+    def _ocr_batch(self, images: List[Image.Image]) -> List[str]:
+        """
+        รูปเดียว → ส่งไฟล์รูปตรง ๆ (backend "subprocess"), หลายรูป → ไฟล์รายชื่อรูป
+        """
+        with tempfile.TemporaryDirectory(prefix="ocr_batch_") as tmp:
+            paths = []
+            for n, image in enumerate(images):
+                path = os.path.join(tmp, f"{n:05d}.png")
+                image.save(path, compress_level=1)  # บีบอัดน้อย → เขียนเร็ว
+                paths.append(path)
+            if len(paths) == 1:
+                source = paths[0]
+            else:
+                source = os.path.join(tmp, "images.txt")
+                with open(source, "w", encoding="utf-8") as f:
+                    f.write("\n".join(paths) + "\n")
+
+            cmd = [self.tesseract_cmd, source, "stdout", "-l", self.lang]
+            if self.tessdata_dir:
+                cmd += ["--tessdata-dir", self.tessdata_dir]
+            proc = subprocess.run(cmd, capture_output=True, check=False)
+
+        if proc.returncode != 0:
+            raise RuntimeError(
+                f"tesseract ล้มเหลว (code {proc.returncode}): "
+                f"{proc.stderr.decode('utf-8', 'replace').strip()[:300]}"
+            )
+        # tesseract ปิดท้ายผลของทุกรูปด้วย \f → ชิ้นสุดท้ายหลัง split เป็นค่าว่าง
+        texts = proc.stdout.decode("utf-8", "replace").split("\f")[: len(images)]
+        if len(texts) != len(images):
+            raise RuntimeError(f"tesseract คืนผล {len(texts)} หน้า จากรูป {len(images)} รูป")
+        return texts
+
+    # --- API หลัก ---
 
     def ocr_image(self, image: Image.Image) -> str:
-        text = pytesseract.image_to_string(image, lang=self.lang)
-        text = text.replace("\r", " ").strip()
-        return text
+        if self.backend == "tesserocr":
+            text = self._ocr_tesserocr(image)
+        else:
+            text = self._ocr_batch([image])[0]
+        return _clean(text)
+
+    def ocr_images(self, images: List[Image.Image]) -> List[str]:
+        """
+        OCR หลายรูป → ข้อความตามลำดับเดิม (error ของชุดโยนออกไปทั้งชุด)
+        """
+        if not images:
+            return []
+        if self.backend == "batch":
+            texts: List[str] = []
+            for start in range(0, len(images), self.batch_size):
+                texts += self._ocr_batch(images[start:start + self.batch_size])
+            return [_clean(t) for t in texts]
+        return [self.ocr_image(image) for image in images]
+
+    def close(self) -> None:
+        """
+        ปิด PyTessBaseAPI ทุก thread — เรียกเมื่อไม่มี thread ไหนใช้ engine นี้แล้ว
+        """
+        with self._apis_lock:
+            apis, self._apis = self._apis, []
+        for api in apis:
+            api.End()
+        self._local = threading.local()
 
     def is_text_enough(self, text: str, min_chars: int = 30) -> bool:
         return len(text.strip()) >= min_chars
@@ -1,7 +1,34 @@
 # src/ingestion/paragraph_splitter.py
 
-from dataclasses import dataclass
-from typing import List, Dict
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# บรรทัดจาก PDFLoaderWithOCR (คีย์ "lines"): [x0, y0, x1, y1, ขนาดฟอนต์ | None, ตัวหนา 0/1, ข้อความ]
+X0, Y0, X1, Y1, SIZE, BOLD, TEXT = range(7)
+
+_DIGITS = r"[0-9๐-๙]"
+# หัวข้อระดับหมวด (เริ่ม section ใหม่)
+HEADING_RE = re.compile(
+    rf"^\s*(หมวด(ที่)?|ส่วนที่|บทที่|ภาค(ที่)?|ภาคผนวก|chapter|part|appendix)\s*({_DIGITS}+|[ivxlc]+\b|[ก-ฮ]\b)?",
+    re.IGNORECASE,
+)
+# เลขข้อ/มาตรา ต้นย่อหน้า: "ข้อ ๕", "มาตรา 3/1", "Section 2", "1.", "1.1", "2.3.4)"
+CLAUSE_RE = re.compile(
+    rf"^\s*((ข้อ|มาตรา|article|section|clause)\s*{_DIGITS}+(/{_DIGITS}+)?(\.{_DIGITS}+)*"
+    rf"|{_DIGITS}+(\.{_DIGITS}+)+\.?|{_DIGITS}+[.)])(?=\s|$)",
+    re.IGNORECASE,
+)
+# ข้อย่อย "(1)", "(ก)", "ก.", "•" → ย่อหน้าใหม่แต่อยู่ใต้ข้อเดิม
+ITEM_RE = re.compile(rf"^\s*(\(({_DIGITS}+|[ก-ฮa-z])\)|[ก-ฮ][.)]\s|[•●▪◦\-–]\s)", re.IGNORECASE)
+# เลขหน้าที่หัว/ท้ายกระดาษ: "3", "- 3 -", "หน้า 3", "Page 3 of 10", "3/10"
+# (ฟอนต์ไทยบางไฟล์ถอดสระ/วรรณยุกต์หลุดที่ เช่น "หนา ๒๒๗่" → ยอมให้มีวรรณยุกต์ค้างท้าย)
+PAGE_NUMBER_RE = re.compile(
+    rf"^\s*[-–]?\s*((หน้?า|page)\s*)?{_DIGITS}+[่-๋]?\s*((/|of|จาก)\s*{_DIGITS}+)?\s*[-–]?\s*$",
+    re.IGNORECASE,
+)
+# จบประโยคแน่นอน → ย่อหน้าไม่ต่อข้ามหน้า
+TERMINAL_RE = re.compile(r"[.!?:;。”\"')\]]\s*$")
 
 
 @dataclass
@@ -9,31 +36,335 @@ class Paragraph:
     page_number: int   # 👈 ให้ชื่อฟิลด์ตรงกับ diff_engine
     index: int
     text: str
+    # ขอบเขตบนหน้าแรกของย่อหน้า [x0, y0, x1, y1] (pt) — None เมื่อมาจาก OCR ทั้งหน้า
+    bbox: Optional[List[float]] = None
+    # หมวด/ข้อที่ย่อหน้านี้อยู่ เช่น "หมวด ๒ การลา › ข้อ ๕" — None ถ้าไม่พบ
+    section: Optional[str] = None
+
+
+@dataclass
+class _Block:
+    """
+    ย่อหน้าระหว่างประกอบจากบรรทัด
+    """
+    lines: List[List] = field(default_factory=list)
+    heading: bool = False
+    clause: Optional[str] = None
+    # ขอบซ้าย/ขวาของคอลัมน์ที่ย่อหน้านี้อยู่
+    left: float = 0.0
+    right: float = 0.0
+
+    @property
+    def text(self) -> str:
+        out: List[str] = []
+        prev = None
+        for line in self.lines:
+            if prev is not None:
+                # ชิ้นบนบรรทัดเดียวกัน (เช่น "ข้อ ๕" กับเนื้อความ) → ต่อด้วยช่องว่าง
+                out.append(" " if _same_row(prev, line) else "\n")
+            out.append(line[TEXT].strip())
+            prev = line
+        return "".join(out).strip()
+
+    @property
+    def bbox(self) -> List[float]:
+        return [
+            round(min(l[X0] for l in self.lines), 1),
+            round(min(l[Y0] for l in self.lines), 1),
+            round(max(l[X1] for l in self.lines), 1),
+            round(max(l[Y1] for l in self.lines), 1),
+        ]
+
+
+def _same_row(a: List, b: List) -> bool:
+    height = max(a[Y1] - a[Y0], 1.0)
+    return abs(b[Y0] - a[Y0]) < 0.3 * height and b[X0] >= a[X1] - 1.0
+
+
+def _page_number(line: List, lines: List[List]) -> bool:
+    """
+    บรรทัดเป็นเลขหน้า: ตรง PAGE_NUMBER_RE และไม่มีบรรทัดอื่นอยู่แถวเดียวกัน
+    """
+    if not PAGE_NUMBER_RE.match(line[TEXT]):
+        return False
+    return not any(
+        other is not line
+        and min(other[Y1], line[Y1]) - max(other[Y0], line[Y0])
+        > 0.5 * min(other[Y1] - other[Y0], line[Y1] - line[Y0])
+        for other in lines
+    )
+
+
+def _median(values: List[float]) -> float:
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2] if ordered else 0.0
 
 
 class ParagraphSplitter:
     """
-    รับรายการเพจจาก PDFLoader (list ของ dict: {"page": int, "text": str})
+    รับรายการเพจจาก PDFLoader (list ของ dict: {"page": int, "text": str, "lines": [...]})
     แล้วแตกเป็นย่อหน้า ๆ
+
+    หน้าที่มี "lines" (text layer จาก get_text("dict")) → แยกตามรูปเอกสาร:
+      - ช่องว่างแนวตั้งระหว่างบรรทัด > para_gap × ความสูงบรรทัด
+      - บรรทัดก่อนหน้าสั้น (จบย่อหน้า) / บรรทัดใหม่ย่อหน้าเข้า / ขึ้นคอลัมน์ใหม่
+      - หัวข้อ (ฟอนต์ใหญ่กว่าเนื้อความ ≥ heading_ratio หรือตัวหนาทั้งบรรทัดแบบสั้น)
+      - เลขข้อ/มาตรา/หัวข้อย่อยต้นบรรทัด (1.1, ข้อ ๕, มาตรา 3, (1), ก.)
+      - ย่อหน้าสุดท้ายของหน้าที่ยังไม่จบประโยค ต่อกับย่อหน้าแรกของหน้าถัดไป
+      - หัว/ท้ายกระดาษ (แถบ margin_ratio บน/ล่างของหน้าที่เว้นห่างจากเนื้อความ) แยกเป็นย่อหน้าของ
+        ตัวเองและไม่ขวางการต่อย่อหน้าข้ามหน้า — เลขหน้าที่อยู่เดี่ยว ๆ ในหัว/ท้ายกระดาษถูกตัดทิ้ง
+        (ไม่ให้เป็น change ปลอมเมื่อหน้าเลื่อน)
+    แต่ละย่อหน้ามี bbox และ section (หมวดล่าสุด › ข้อล่าสุด)
+
+    หน้าที่ไม่มี "lines" (OCR ทั้งหน้า) หรือ layout=False → แบ่งด้วยบรรทัดว่าง "\\n\\n" แบบเดิม
     """
 
+    def __init__(
+        self,
+        layout: bool = True,
+        para_gap: float = 0.5,
+        heading_ratio: float = 1.15,
+        indent_pt: float = 10.0,
+        margin_ratio: float = 0.12,
+    ):
+        self.layout = layout
+        self.para_gap = para_gap
+        self.heading_ratio = heading_ratio
+        self.indent_pt = indent_pt
+        self.margin_ratio = margin_ratio
+
+    def settings(self) -> Dict:
+        """
+        ค่าตั้งค่าที่มีผลต่อย่อหน้าที่ได้ (ใช้เป็นส่วนหนึ่งของ cache key)
+        """
+        return {
+            "name": type(self).__name__,
+            "layout": self.layout,
+            "para_gap": self.para_gap,
+            "heading_ratio": self.heading_ratio,
+            "indent_pt": self.indent_pt,
+            "margin_ratio": self.margin_ratio,
+        }
+
     def split(self, pages: List[Dict]) -> List[Paragraph]:
-        paragraphs: List[Paragraph] = []
+        return list(self.iter_split(pages))
+
+    def iter_split(self, pages: Iterable[Dict]) -> Iterator[Paragraph]:
+        """
+        เหมือน split() แต่รับ/คืนแบบ stream — ใช้ต่อกับ PDFLoaderWithOCR.iter_load ได้
+        (ถือย่อหน้าสุดท้ายของหน้า + หัว/ท้ายกระดาษไว้จนกว่าหน้าถัดไปมาถึง เพื่อต่อย่อหน้าข้ามหน้า)
+        """
+        heading: Optional[str] = None
+        clause: Optional[str] = None
+        # held[0] = ย่อหน้าท้ายเนื้อความที่อาจต่อหน้าถัดไป ตามด้วยหัว/ท้ายกระดาษที่ออกหลังมัน
+        held: List[Paragraph] = []
+        carry_open = False
 
         for page in pages:
             page_no = page.get("page", 0)
-            raw_text = page.get("text", "") or ""
-
-            # แบ่งย่อหน้าด้วย "\n\n" แล้วตัดช่องว่างส่วนเกิน
-            blocks = [b.strip() for b in raw_text.split("\n\n") if b.strip()]
+            lines = page.get("lines") if self.layout else None
 
-            for idx, block in enumerate(blocks):
-                paragraphs.append(
-                    Paragraph(
+            if not lines:
+                yield from held
+                held, carry_open = [], False
+                raw_text = page.get("text", "") or ""
+                # แบ่งย่อหน้าด้วย "\n\n" แล้วตัดช่องว่างส่วนเกิน
+                blocks = [b.strip() for b in raw_text.split("\n\n") if b.strip()]
+                for idx, block in enumerate(blocks):
+                    clause_match = CLAUSE_RE.match(block)
+                    if clause_match:
+                        clause = clause_match.group(1).strip()
+                    yield Paragraph(
                         page_number=page_no,   # 👈 ใช้ page_number
                         index=idx,
                         text=block,
+                        section=self._section(heading, clause),
                     )
+                continue
+
+            head, body, foot = self._blocks(lines, page.get("size"))
+            if body and held and carry_open and self._continues(body[0]):
+                held[0].text = f"{held[0].text}\n{body[0].text}"
+                carry_open = self._open_end(body[0])
+                body = body[1:]
+                if not body:
+                    # ทั้งหน้าเป็นส่วนต่อของย่อหน้าเดียว → ยังถือไว้ต่อ
+                    held.extend(self._margin_paragraphs(head + foot, page_no, 0, heading, clause))
+                    continue
+
+            yield from held
+            held, carry_open = [], False
+            out = self._margin_paragraphs(head, page_no, 0, heading, clause)
+            for block in body:
+                text = block.text
+                if block.heading:
+                    heading, clause = " ".join(text.split())[:60], None
+                elif block.clause:
+                    clause = block.clause
+                out.append(Paragraph(
+                    page_number=page_no,
+                    index=len(out),
+                    text=text,
+                    bbox=block.bbox,
+                    section=self._section(heading, clause),
+                ))
+            if body:
+                carry_open = not body[-1].heading and self._open_end(body[-1])
+                held = [out.pop()]
+            held.extend(self._margin_paragraphs(foot, page_no, len(out) + len(held), heading, clause))
+            yield from out
+
+        yield from held
+
+    def _margin_paragraphs(
+        self, blocks: List[_Block], page_no: int, start: int, heading: Optional[str], clause: Optional[str]
+    ) -> List[Paragraph]:
+        """
+        หัว/ท้ายกระดาษ → ย่อหน้าปกติ แต่ไม่เปลี่ยน section และไม่ต่อข้ามหน้า
+        """
+        return [
+            Paragraph(
+                page_number=page_no,
+                index=start + n,
+                text=block.text,
+                bbox=block.bbox,
+                section=self._section(heading, clause),
+            )
+            for n, block in enumerate(blocks)
+        ]
+
+    @staticmethod
+    def _section(heading: Optional[str], clause: Optional[str]) -> Optional[str]:
+        parts = [p for p in (heading, clause) if p]
+        return " › ".join(parts) if parts else None
+
+    @staticmethod
+    def _open_end(block: _Block) -> bool:
+        """
+        ย่อหน้ายังไม่จบ: บรรทัดสุดท้ายยาวเกือบเต็มคอลัมน์และไม่ลงท้ายด้วยเครื่องหมายจบประโยค
+        """
+        last = block.lines[-1]
+        return not TERMINAL_RE.search(last[TEXT]) and last[X1] >= block.right - 0.15 * (block.right - block.left)
+
+    def _continues(self, block: _Block) -> bool:
+        """
+        ย่อหน้าแรกของหน้าเป็นส่วนต่อของย่อหน้าท้ายหน้าก่อน: ไม่ใช่หัวข้อ/ข้อใหม่/ข้อย่อย และไม่ย่อหน้าเข้า
+        """
+        first = block.lines[0]
+        return (
+            not block.heading
+            and not block.clause
+            and not ITEM_RE.match(first[TEXT])
+            and first[X0] <= block.left + self.indent_pt
+        )
+
+    def _blocks(
+        self, lines: List[List], size: Optional[List[float]]
+    ) -> Tuple[List[_Block], List[_Block], List[_Block]]:
+        """
+        บรรทัดของหน้า → (หัวกระดาษ, เนื้อความ, ท้ายกระดาษ)
+
+        หัว/ท้ายกระดาษ = บรรทัดในแถบ margin_ratio บน/ล่างของหน้า (ต้องรู้ "size") ที่เว้นห่างจาก
+        เนื้อความมากกว่าช่องว่างระหว่างย่อหน้า และไม่ใช่หัวข้อ — PDF มักวาดหัวกระดาษทีหลังเนื้อความ
+        จึงแยกออกมาก่อน ไม่ให้ขวางการต่อย่อหน้าข้ามหน้า
+        """
+        lines = [l for l in lines if l[TEXT].strip()]
+        if not lines:
+            return [], [], []
+
+        sized = [(l[SIZE], len(l[TEXT])) for l in lines if l[SIZE]]
+        body_size = _median([s for s, n in sized for _ in range(min(n, 200))]) if sized else 0.0
+        line_height = _median([l[Y1] - l[Y0] for l in lines]) or 1.0
+        # ขอบคอลัมน์ของแต่ละบรรทัด = จากบรรทัดที่ช่วงแนวนอนซ้อนกับมัน (หน้าหลายคอลัมน์แยกกันเอง)
+        columns: Dict[int, Tuple[float, float]] = {}
+        for line in lines:
+            peers = [l for l in lines if l[X0] < line[X1] and l[X1] > line[X0]]
+            columns[id(line)] = (
+                _median([l[X0] for l in peers]),
+                sorted(l[X1] for l in peers)[round(0.9 * (len(peers) - 1))],
+            )
+
+        def width(line: List) -> float:
+            left, right = columns[id(line)]
+            return max(right - left, 1.0)
+
+        def is_heading(line: List) -> bool:
+            text = line[TEXT].strip()
+            if len(text) > 80:
+                return False
+            if HEADING_RE.match(text):
+                return True
+            # หัวข้อตามรูปแบบตัวอักษรต้องไม่ยาวเต็มคอลัมน์ (บรรทัดเนื้อความตัวใหญ่/ตัวหนาทั้งบรรทัดไม่นับ)
+            if line[X1] - line[X0] > 0.6 * width(line):
+                return False
+            if body_size and line[SIZE] and line[SIZE] >= body_size * self.heading_ratio:
+                return True
+            return bool(line[BOLD]) and not CLAUSE_RE.match(text)
+
+        head_lines: List[List] = []
+        foot_lines: List[List] = []
+        body_lines = lines
+        if size:
+            top, bottom = size[1] * self.margin_ratio, size[1] * (1 - self.margin_ratio)
+            gap = self.para_gap * line_height
+            head = [l for l in lines if l[Y0] <= top and not is_heading(l)]
+            rest = [l for l in lines if not any(l is h for h in head)]
+            if head and (not rest or min(l[Y0] for l in rest) - max(l[Y1] for l in head) > gap):
+                head_lines, body_lines = head, rest
+            foot = [l for l in body_lines if l[Y1] >= bottom and not is_heading(l)]
+            rest = [l for l in body_lines if not any(l is f for f in foot)]
+            if foot and (not rest or min(l[Y0] for l in foot) - max(l[Y1] for l in rest) > gap):
+                foot_lines, body_lines = foot, rest
+            # เลขหน้าเปลี่ยนทุกครั้งที่หน้าเลื่อน → ตัดทิ้ง ไม่ให้เป็น change ปลอม
+            # เฉพาะบรรทัดในหัว/ท้ายกระดาษที่อยู่เดี่ยว ๆ ในแถว (ตัวเลขที่อยู่แถวเดียวกับข้อความอื่น
+            # เช่น "ค่าธรรมเนียม ... 5000" เป็นเนื้อหา ห้ามทิ้ง)
+            head_lines = [l for l in head_lines if not _page_number(l, head_lines)]
+            foot_lines = [l for l in foot_lines if not _page_number(l, foot_lines)]
+
+        def group(lines: List[List], detect: bool) -> List[_Block]:
+            blocks: List[_Block] = []
+            current: Optional[_Block] = None
+            prev: Optional[List] = None
+            for line in lines:
+                text = line[TEXT].strip()
+                left, right = columns[id(line)]
+                heading = detect and is_heading(line)
+                clause = CLAUSE_RE.match(text) if detect else None
+                if (
+                    clause and prev is not None
+                    and line[Y0] - prev[Y1] <= self.para_gap * line_height
+                    and line[X0] <= left + self.indent_pt
+                    and prev[X1] >= columns[id(prev)][1] - 0.2 * width(prev)
+                    and not TERMINAL_RE.search(prev[TEXT])
+                ):
+                    clause = None  # บรรทัดก่อนเต็มบรรทัดและยังไม่จบ → "มาตรา ๔๓" ที่ขึ้นบรรทัดใหม่เป็นการอ้างถึง ไม่ใช่ข้อใหม่
+
+                if prev is not None and _same_row(prev, line):
+                    current.lines.append(line)
+                    prev = line
+                    continue
+
+                new_block = (
+                    current is None
+                    or heading != current.heading
+                    or bool(clause)
+                    or bool(ITEM_RE.match(text))
+                    or line[Y0] - prev[Y1] > self.para_gap * line_height           # เว้นบรรทัด
+                    or line[Y0] < prev[Y0] - 0.5 * line_height                       # ขึ้นคอลัมน์ใหม่
+                    or (not heading and line[X0] > prev[X0] + self.indent_pt         # ย่อหน้าเข้า
+                        and line[X0] > left + self.indent_pt)
+                    or (not heading and prev[X1] < columns[id(prev)][1] - 0.2 * width(prev))  # บรรทัดก่อนสั้น
                 )
+                if new_block:
+                    current = _Block(
+                        heading=heading,
+                        clause=clause.group(1).strip() if clause else None,
+                        left=left,
+                        right=right,
+                    )
+                    blocks.append(current)
+                current.lines.append(line)
+                prev = line
+            return blocks
 
-        return paragraphs
+        return group(head_lines, False), group(body_lines, True), group(foot_lines, False)
@@ -1,11 +1,185 @@
 # src/ingestion/pdf_loader_ocr.py
 
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import asdict
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
 import fitz  # PyMuPDF
-from typing import List, Dict
 
 from PIL import Image
 
+from cache.extraction_cache import ExtractionCache
+from utils.hashing import settings_hash, sha256_file
+from utils.metrics import Metrics
+
+from .fingerprint import page_content_hash
 from .ocr_engine import OCREngine
+from .preprocess import PLAIN, OCRPreprocess, prepare_page_image
+from .regions import (
+    TextBlock,
+    image_regions,
+    merge_in_reading_order,
+    merge_lines_in_reading_order,
+    text_blocks,
+    text_lines,
+)
+from .text_quality import assess_text_layer, image_coverage, text_layer_problem
+
+logger = logging.getLogger(__name__)
+
+OCR_POLICY = os.getenv("OCR_POLICY", "auto")
+OCR_POLICIES = ("auto", "always", "regions")
+
+# ผล OCR ของหนึ่งหน้า (หรือหนึ่งบริเวณ): (ข้อความ, error, เวลา {"render"/"ocr": (wall, cpu)})
+OCRResult = Tuple[Optional[str], Optional[str], Optional[Dict[str, Tuple[float, float]]]]
+# บริเวณที่ render (x0, y0, x1, y1) — None = ทั้งหน้า
+Clip = Optional[Tuple[float, float, float, float]]
+
+
+def render_page(
+    page: "fitz.Page", dpi: int, preprocess: OCRPreprocess = PLAIN, clip: Clip = None
+) -> Image.Image:
+    """
+    แปลงหน้า PDF เป็น PIL Image สำหรับส่งเข้า OCR (grayscale ไม่มี alpha ตรงจาก PyMuPDF)
+    preprocess → crop / แก้เอียง / เลือก dpi ตามขนาดตัวอักษร (ดู ingestion.preprocess)
+    clip → เฉพาะบริเวณนั้นของหน้า
+    """
+    img, _ = prepare_page_image(page, dpi, preprocess, fitz.Rect(clip) if clip is not None else None)
+    return img
+
+
+def _gather(futures: List[Future]) -> Future:
+    """
+    future เดียวที่เสร็จเมื่อทุกตัวใน futures เสร็จ → ผล OCR เป็น list ตามลำดับเดิม
+    """
+    out: Future = Future()
+    remaining = [len(futures)]
+
+    def result(future: Future) -> OCRResult:
+        try:
+            return future.result()
+        except Exception as e:
+            # worker ตาย (เช่น BrokenProcessPool) → เสียแค่บริเวณนั้น
+            return None, str(e), None
+
+    def done(_: Future) -> None:
+        remaining[0] -= 1
+        if remaining[0] == 0:
+            out.set_result([result(f) for f in futures])
+
+    for future in futures:
+        future.add_done_callback(done)
+    return out
+
+
+# --- ส่วนที่รันใน worker process ---
+# แต่ละ process เปิดไฟล์ PDF เองครั้งเดียว แล้ว render + OCR ตาม page index ที่ได้รับ
+# (ไม่ส่ง fitz.Page ข้าม process เพราะ pickle ไม่ได้และเปลืองกว่า)
+
+_worker_state: Dict[str, object] = {}
+
+
+def _init_ocr_worker(
+    lang: str, dpi: int, backend: str, tesseract_cmd: str, preprocess: OCRPreprocess
+) -> None:
+    # engine อยู่ตลอดอายุ worker → backend tesserocr โหลดโมเดลภาษาครั้งเดียวต่อ process
+    _worker_state["engine"] = OCREngine(lang=lang, backend=backend, tesseract_cmd=tesseract_cmd)
+    _worker_state["dpi"] = dpi
+    _worker_state["preprocess"] = preprocess
+    _worker_state["docs"] = {}
+
+
+def _timed_render_ocr(
+    page: "fitz.Page", dpi: int, engine: OCREngine, preprocess: OCRPreprocess = PLAIN, clip: Clip = None
+) -> OCRResult:
+    """
+    render + OCR หนึ่งหน้า พร้อมจับเวลาแต่ละส่วน (CPU ของ thread นี้ — ไม่รวม tesseract)
+    error ของแต่ละหน้าไม่ทำให้หน้าอื่นล้ม
+    """
+    timings: Dict[str, Tuple[float, float]] = {}
+    try:
+        wall0, cpu0 = time.perf_counter(), time.thread_time()
+        img = render_page(page, dpi, preprocess, clip)
+        wall1, cpu1 = time.perf_counter(), time.thread_time()
+        timings["render"] = (wall1 - wall0, cpu1 - cpu0)
+
+        text = engine.ocr_image(img).strip()
+        timings["ocr"] = (time.perf_counter() - wall1, time.thread_time() - cpu1)
+        return text, None, timings
+    except Exception as e:
+        return None, str(e), timings
+
+
+class _OCRBatch:
+    """
+    หน้าที่ render แล้วรอ OCR พร้อมกันเป็นชุด (โหมด process เดียว)
+    ครบ engine.batch_size หน้า หรือมีคนรอผล → flush() ส่งเข้า engine.ocr_images ครั้งเดียว
+    """
+
+    def __init__(self, engine: OCREngine, dpi: int, preprocess: OCRPreprocess = PLAIN):
+        self.engine = engine
+        self.dpi = dpi
+        self.preprocess = preprocess
+        # (future, รูป, เวลา render)
+        self.items: List[Tuple[Future, Image.Image, Tuple[float, float]]] = []
+
+    def submit(self, page: "fitz.Page", clip: Clip = None) -> Future:
+        future: Future = Future()
+        try:
+            wall0, cpu0 = time.perf_counter(), time.thread_time()
+            img = render_page(page, self.dpi, self.preprocess, clip)
+            render = (time.perf_counter() - wall0, time.thread_time() - cpu0)
+        except Exception as e:
+            future.set_result((None, str(e), None))
+            return future
+        self.items.append((future, img, render))
+        if len(self.items) >= self.engine.batch_size:
+            self.flush()
+        return future
+
+    def flush(self) -> None:
+        items, self.items = self.items, []
+        if not items:
+            return
+        wall0, cpu0 = time.perf_counter(), time.thread_time()
+        try:
+            results = [(text, None) for text in self.engine.ocr_images([img for _, img, _ in items])]
+        except Exception as e:
+            if len(items) == 1:
+                results = [(None, str(e))]
+            else:
+                # ทั้งชุดล้ม → ลองทีละรูป ให้เสียเฉพาะหน้าที่มีปัญหา
+                results = []
+                for _, img, _ in items:
+                    try:
+                        results.append((self.engine.ocr_image(img), None))
+                    except Exception as e_one:
+                        results.append((None, str(e_one)))
+        # เวลา OCR ของชุดเฉลี่ยให้ทุกหน้าในชุด
+        ocr = ((time.perf_counter() - wall0) / len(items), (time.thread_time() - cpu0) / len(items))
+        for (future, _, render), (text, error) in zip(items, results):
+            timings = {"render": render, "ocr": ocr}
+            future.set_result((text.strip() if text is not None else None, error, timings))
+
+
+def _ocr_page_in_worker(path: str, page_index: int, clip: Clip = None) -> OCRResult:
+    try:
+        docs = _worker_state["docs"]
+        doc = docs.get(path)
+        if doc is None:
+            doc = fitz.open(path)
+            docs[path] = doc
+        page = doc.load_page(page_index)
+    except Exception as e:
+        return None, str(e), None
+
+    return _timed_render_ocr(
+        page, _worker_state["dpi"], _worker_state["engine"], _worker_state["preprocess"], clip
+    )
 
 
 class PDFLoaderWithOCR:
@@ -13,75 +187,397 @@ class PDFLoaderWithOCR:
     โหลดไฟล์ PDF:
     - ถ้าเพจมี text จริง → ใช้ get_text() ปกติ
     - ถ้าเพจแทบไม่มี text → render เป็นรูป แล้วส่งเข้า OCR
+
+    ocr_policy:
+      - "auto"   : เชื่อ text layer ถ้าผ่านเกณฑ์คุณภาพ (จำนวนตัวอักษร, สัดส่วนอักษร
+                   ไทย/ละติน, glyph เสีย, พื้นที่รูปภาพ) และ OCR เฉพาะหน้าที่ไม่ผ่าน
+      - "always" : OCR ทุกหน้า แล้วเลือกข้อความที่มีตัวอักษรมากกว่า (แบบเดิม)
+      - "regions": เหมือน auto แต่หน้าที่ text layer ผ่านเกณฑ์และมีรูปภาพฝังอยู่ (ลายเซ็น,
+                   ตราประทับ, ตารางสแกน) → OCR เฉพาะบริเวณรูป แล้วแทรกข้อความเข้ากับ
+                   text layer ตามตำแหน่ง (ดู ingestion.regions)
+      ไม่ระบุ → env OCR_POLICY (ค่าเริ่มต้น "auto")
+
+    แต่ละหน้าที่คืนมีคีย์ "source" บอกว่าใช้ "text", "ocr", "mixed" (text layer + OCR
+    บางบริเวณ) หรือ "text_fallback" (OCR ล้มเหลว) และ "reason" บอกเหตุผลที่ต้อง OCR
+
+    workers > 1 → กระจาย render + OCR ไปยัง process pool ตามจำนวนที่กำหนด
+    (workers=0 → ใช้เท่าจำนวน CPU) แต่ละ worker สร้าง OCREngine ครั้งเดียวแล้วใช้ตลอด
+    workers = 1 → render แล้วส่ง OCR เป็นชุดละ OCREngine.batch_size หน้า
+
+    ocr_backend / tesseract_cmd → ส่งต่อให้ OCREngine (ดู ingestion.ocr_engine)
+
+    layout → หน้าที่ข้อความมาจาก text layer (source "text"/"mixed"/"text_fallback") มีคีย์
+    "lines" (บรรทัดพร้อม bbox / ขนาดฟอนต์ / ตัวหนา — ดู regions.text_lines) และ "size"
+    (กว้าง, สูงของหน้า) ให้ ParagraphSplitter แบ่งย่อหน้าตามรูปเอกสาร — หน้าที่ใช้ OCR ไม่มี
+
+    ocr_preprocess → การเตรียมภาพก่อน OCR (ค่าเริ่มต้น PLAIN: render ทั้งหน้าที่ ocr_dpi
+    แค่เป็น grayscale) — ส่ง OCRPreprocess() เพื่อเปิด crop + แก้เอียง + เลือก dpi ตามขนาด
+    ตัวอักษร (ยังไม่เป็นค่าเริ่มต้นจนกว่าจะมีผลความแม่นจาก bench_preprocess --ocr)
+    ocr_dpi ใช้เมื่อปิด adaptive_dpi หรือประมาณขนาดไม่ได้
+
+    cache → เก็บผลต่อหน้าโดยใช้ hash เนื้อหาหน้า + ค่าตั้งค่า เป็น key
+    ไฟล์เดิมจะไม่ต้องเปิดอ่านซ้ำ และไฟล์เวอร์ชันใหม่จะ OCR เฉพาะหน้าที่เปลี่ยน
+
+    metrics → บันทึกเวลาต่อหน้า ("page_text", "render", "ocr") และตัวนับหน้า
     """
 
-    def __init__(self, min_chars_for_direct_text: int = 30, ocr_dpi: int = 200):
-        self.ocr_engine = OCREngine()
+    def __init__(
+        self,
+        min_chars_for_direct_text: int = 30,
+        ocr_dpi: int = 200,
+        workers: int = 1,
+        ocr_policy: Optional[str] = None,
+        min_script_ratio: float = 0.8,
+        max_garbage_ratio: float = 0.05,
+        max_image_coverage: float = 0.6,
+        min_region_ratio: float = 0.005,
+        cache: Optional[ExtractionCache] = None,
+        metrics: Optional[Metrics] = None,
+        ocr_backend: Optional[str] = None,
+        tesseract_cmd: Optional[str] = None,
+        ocr_preprocess: Optional[OCRPreprocess] = None,
+        layout: bool = True,
+    ):
+        ocr_policy = ocr_policy or OCR_POLICY
+        if ocr_policy not in OCR_POLICIES:
+            raise ValueError(f"ไม่รู้จัก ocr_policy: {ocr_policy}")
+        self.ocr_engine = OCREngine(backend=ocr_backend, tesseract_cmd=tesseract_cmd)
         self.min_chars_for_direct_text = min_chars_for_direct_text
         self.ocr_dpi = ocr_dpi
+        self.ocr_preprocess = ocr_preprocess if ocr_preprocess is not None else PLAIN
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.ocr_policy = ocr_policy
+        self.min_script_ratio = min_script_ratio
+        self.max_garbage_ratio = max_garbage_ratio
+        self.max_image_coverage = max_image_coverage
+        self.min_region_ratio = min_region_ratio
+        self.layout = layout
+        self.cache = cache
+        self.metrics = metrics
+
+    def settings(self) -> Dict:
+        """
+        ค่าตั้งค่าที่มีผลต่อข้อความที่ได้ (ใช้เป็นส่วนหนึ่งของ cache key)
+        """
+        return {
+            "lang": self.ocr_engine.lang,
+            "ocr_dpi": self.ocr_dpi,
+            "ocr_preprocess": asdict(self.ocr_preprocess),
+            "ocr_policy": self.ocr_policy,
+            "min_chars_for_direct_text": self.min_chars_for_direct_text,
+            "min_script_ratio": self.min_script_ratio,
+            "max_garbage_ratio": self.max_garbage_ratio,
+            "max_image_coverage": self.max_image_coverage,
+            "layout": self.layout,
+            **({"min_region_ratio": self.min_region_ratio} if self.ocr_policy == "regions" else {}),
+        }
 
     def _page_to_image(self, page: "fitz.Page") -> Image.Image:
+        return render_page(page, self.ocr_dpi, self.ocr_preprocess)
+
+    def _ocr_page(self, page: "fitz.Page") -> OCRResult:
+        return _timed_render_ocr(page, self.ocr_dpi, self.ocr_engine, self.ocr_preprocess)
+
+    def _ocr_reason(self, page: "fitz.Page", base_text: str) -> Optional[str]:
         """
-        แปลงหน้า PDF เป็น PIL Image สำหรับส่งเข้า OCR
+        เหตุผลที่ต้อง OCR หน้านี้ (None = ใช้ text layer ได้เลย)
         """
-        pix = page.get_pixmap(dpi=self.ocr_dpi)
+        if self.ocr_policy == "always":
+            return "policy_always"
+        if not self.ocr_engine.is_text_enough(base_text, self.min_chars_for_direct_text):
+            return "too_few_chars"
+        quality = assess_text_layer(base_text, image_coverage(page))
+        return text_layer_problem(
+            quality,
+            min_script_ratio=self.min_script_ratio,
+            max_garbage_ratio=self.max_garbage_ratio,
+            max_image_coverage=self.max_image_coverage,
+        )
 
-        if pix.alpha:
-            mode = "RGBA"
-        else:
-            mode = "RGB"
+    def _ocr_regions(self, page: "fitz.Page") -> Tuple[List[TextBlock], List["fitz.Rect"]]:
+        """
+        (บล็อกข้อความ, บริเวณรูปที่ต้อง OCR) ของหน้าที่ text layer ผ่านเกณฑ์แล้ว
+        หน้าที่ถูกหมุน (/Rotate) พิกัดรูปกับพิกัด render ไม่ตรงกัน → ไม่ทำ
+        """
+        if page.rotation != 0:
+            return [], []
+        blocks = text_blocks(page)
+        return blocks, image_regions(page, blocks, min_area_ratio=self.min_region_ratio)
 
-        img = Image.frombytes(mode, (pix.width, pix.height), pix.samples)
+    def _layout(self, page: "fitz.Page", regions: Optional[List[TextBlock]] = None) -> Dict:
+        """
+        คีย์ "lines" + "size" ของหน้าที่ใช้ text layer (regions = ข้อความ OCR ของบริเวณรูปที่แทรกเข้าไป)
+        """
+        if not self.layout:
+            return {}
+        lines = text_lines(page)
+        if regions:
+            lines = merge_lines_in_reading_order(lines, regions)
+        return {"lines": lines, "size": [round(page.rect.width, 1), round(page.rect.height, 1)]}
 
-        if mode == "RGBA":
-            img = img.convert("RGB")
+    def _open_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_ocr_worker,
+            initargs=(
+                self.ocr_engine.lang,
+                self.ocr_dpi,
+                self.ocr_engine.backend,
+                self.ocr_engine.tesseract_cmd,
+                self.ocr_preprocess,
+            ),
+        )
 
-        return img
+    def _choose_text(self, base_text: str, ocr_text: str) -> Tuple[str, str]:
+        """
+        คืน (ข้อความที่ใช้, source) หลัง OCR สำเร็จ
+        """
+        if self.ocr_policy == "always":
+            base_letters = sum(ch.isalnum() for ch in base_text)
+            ocr_letters = sum(ch.isalnum() for ch in ocr_text)
+
+            # ถ้า OCR ได้ตัวหนังสือมากกว่า → ใช้ OCR
+            if ocr_letters > base_letters:
+                return ocr_text, "ocr"
+            return base_text, "text"
+
+        # text layer ไม่ผ่านเกณฑ์แล้ว → เชื่อ OCR ถ้าอ่านได้อะไรออกมา
+        if ocr_text:
+            return ocr_text, "ocr"
+        return base_text, "text_fallback"
 
     def load(self, path: str) -> List[Dict]:
         """
         โหลด PDF แบบผสม text + OCR
         """
+        return list(self.iter_load(path))
+
+    def iter_load(self, path: str) -> Iterator[Dict]:
+        """
+        เหมือน load() แต่ yield ทีละหน้าตามลำดับทันทีที่หน้านั้นพร้อม
+        ไม่เก็บหน้าที่ส่งออกไปแล้ว → หน่วยความจำไม่โตตามจำนวนหน้า
+
+        โหมด process pool ส่งงาน OCR ล่วงหน้าได้ไม่เกิน 2 × workers หน้า
+        (โหมด process เดียวค้างได้ไม่เกิน batch_size หน้า)
+        """
+        settings_key = settings_hash(self.settings())
+        doc_key: Optional[str] = None
+
+        if self.cache is not None:
+            doc_key = f"{sha256_file(path)}:{settings_key}"
+            cached_pages = self._load_from_doc_cache(doc_key)
+            if cached_pages is not None:
+                yield from cached_pages
+                return
+
         try:
             doc = fitz.open(path)
         except Exception as e:
             raise RuntimeError(f"ไม่สามารถเปิดไฟล์ PDF ได้: {path} ({e})")
 
-        pages: List[Dict] = []
+        pool: Optional[ProcessPoolExecutor] = None
+        batch = _OCRBatch(self.ocr_engine, self.ocr_dpi, self.ocr_preprocess)
+        max_in_flight = max(2 * self.workers, self.ocr_engine.batch_size)
+        # หน้าที่ยังไม่ได้ส่งออก เรียงตามลำดับ: (future ของผล OCR, ฟังก์ชันประกอบผลหน้า)
+        pending: Deque[Tuple[Future, Callable[[Any], Dict]]] = deque()
+        page_keys: List[str] = []
+        all_cached = True
+
+        def finish_page(
+            page: "fitz.Page",
+            i: int,
+            key: str,
+            content_hash: str,
+            base_text: str,
+            reason: Optional[str],
+            layout: Optional[Tuple[List[TextBlock], List["fitz.Rect"]]] = None,
+        ):
+            def build(ocr_result: Any) -> Dict:
+                nonlocal all_cached
+                if layout is not None:
+                    entry = self._build_region_entry(page, i, base_text, layout, ocr_result)
+                else:
+                    entry = self._build_entry(page, i, base_text, reason, ocr_result)
+                # หน้าที่ OCR พลาดไม่เก็บ cache เพื่อให้รอบหน้าลองใหม่
+                if self.cache is not None and entry["source"] != "text_fallback":
+                    self.cache.put("page", key, entry)
+                else:
+                    all_cached = False
+                return {"page": i + 1, **entry, "content_hash": content_hash}
+            return build
+
+        try:
+            for i in range(len(doc)):
+                page = doc.load_page(i)
+
+                # --- 1) hash เนื้อหาหน้า แล้วดูว่ามีใน cache แล้วหรือยัง ---
+                content_hash = page_content_hash(page)
+                key = f"{content_hash}:{settings_key}"
+                page_keys.append(key)
+                entry = self.cache.get("page", key) if self.cache is not None else None
+
+                if entry is not None:
+                    self._incr("pages_cached")
+                    done: Future = Future()
+                    done.set_result({"page": i + 1, **entry, "content_hash": content_hash})
+                    pending.append((done, lambda result: result))
+                else:
+                    # --- 2) ดึง text ปกติ + ตัดสินว่าต้อง OCR ไหม ---
+                    wall0, cpu0 = time.perf_counter(), time.thread_time()
+                    base_text = (page.get_text("text") or "").strip()
+                    reason = self._ocr_reason(page, base_text)
+                    layout = None
+                    if reason is None and self.ocr_policy == "regions":
+                        blocks, regions = self._ocr_regions(page)
+                        if regions:
+                            reason, layout = "image_regions", (blocks, regions)
+                    if self.metrics is not None:
+                        self.metrics.observe(
+                            "page_text", time.perf_counter() - wall0, time.thread_time() - cpu0
+                        )
+                    build = finish_page(page, i, key, content_hash, base_text, reason, layout)
+
+                    # --- 3) OCR เฉพาะหน้าที่ text layer ไม่ผ่าน (หรือเฉพาะบริเวณรูป) ---
+                    if layout is not None:
+                        clips = [tuple(rect) for rect in layout[1]]
+                        if self.workers > 1:
+                            if pool is None:
+                                pool = self._open_pool()
+                            parts = [pool.submit(_ocr_page_in_worker, path, i, clip) for clip in clips]
+                        else:
+                            parts = [batch.submit(page, clip) for clip in clips]
+                        future = _gather(parts)
+                    elif reason is not None and self.workers > 1:
+                        if pool is None:
+                            pool = self._open_pool()
+                        future = pool.submit(_ocr_page_in_worker, path, i)
+                    elif reason is not None:
+                        future = batch.submit(page)
+                    else:
+                        future = Future()
+                        future.set_result(None)
+                    pending.append((future, build))
+
+                # ส่งออกตามลำดับหน้า — รอหน้าแรกในคิวเมื่องานค้างเกินกำหนด
+                while pending and (len(pending) > max_in_flight or pending[0][0].done()):
+                    if not pending[0][0].done():
+                        batch.flush()
+                    yield self._resolve(*pending.popleft())
 
-        for i in range(len(doc)):
-            page = doc.load_page(i)
+            batch.flush()
+            while pending:
+                yield self._resolve(*pending.popleft())
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+            doc.close()
 
-            # --- 1) ดึง text ปกติ ---
-            base_text = page.get_text("text") or ""
-            base_text = base_text.strip()
+        if self.cache is not None and all_cached:
+            self.cache.put("doc", doc_key, page_keys)
 
-            final_text = base_text
+    @staticmethod
+    def _resolve(future: Future, build: Callable[[Any], Dict]) -> Dict:
+        try:
+            result = future.result()
+        except Exception as e:
+            # worker ตาย (เช่น BrokenProcessPool) → เสียแค่ OCR ของหน้านั้น
+            result = (None, str(e), None)
+        return build(result)
+
+    def _incr(self, name: str, n: int = 1) -> None:
+        if self.metrics is not None:
+            self.metrics.incr(name, n)
 
-            # --- 2) OCR ทุกหน้า แล้วเลือกข้อความที่ "ดีกว่า" ---
-            try:
-                img = self._page_to_image(page)
-                ocr_text = self.ocr_engine.ocr_image(img).strip()
+    def _build_entry(
+        self,
+        page: "fitz.Page",
+        i: int,
+        base_text: str,
+        reason: Optional[str],
+        ocr_result: Optional[OCRResult],
+    ) -> Dict:
+        final_text, source = base_text, "text"
 
-                base_letters = sum(ch.isalnum() for ch in base_text)
-                ocr_letters = sum(ch.isalnum() for ch in ocr_text)
+        if reason is not None:
+            ocr_text, error, timings = ocr_result
+            if self.metrics is not None:
+                for stage, (wall, cpu) in (timings or {}).items():
+                    self.metrics.observe(stage, wall, cpu)
+            self._incr(f"ocr_reason_{reason}")
+            if error is not None:
+                logger.warning(f"[WARN] OCR เพจ {i+1} ผิดพลาด: {error}")
+                self._incr("ocr_errors")
+                source = "text_fallback"
+            else:
+                final_text, source = self._choose_text(base_text, ocr_text)
 
-                # ถ้า OCR ได้ตัวหนังสือมากกว่า → ใช้ OCR
-                if ocr_letters > base_letters:
-                    final_text = ocr_text
+        return {
+            "text": final_text or "",
+            "source": source,
+            "reason": reason,
+            **(self._layout(page) if source != "ocr" else {}),
+        }
+
+    def _build_region_entry(
+        self,
+        page: "fitz.Page",
+        i: int,
+        base_text: str,
+        layout: Tuple[List[TextBlock], List["fitz.Rect"]],
+        ocr_results: List[OCRResult],
+    ) -> Dict:
+        """
+        text layer + ข้อความ OCR ของแต่ละบริเวณรูป (บริเวณที่ OCR พลาดถูกข้าม)
+        """
+        blocks, regions = layout
+        self._incr("ocr_reason_image_regions")
+        self._incr("ocr_regions", len(regions))
 
-            except Exception as e:
-                print(f"[WARN] OCR เพจ {i+1} ผิดพลาด: {e}")
+        found: List[TextBlock] = []
+        failed = 0
+        for rect, (ocr_text, error, timings) in zip(regions, ocr_results):
+            if self.metrics is not None:
+                for stage, (wall, cpu) in (timings or {}).items():
+                    self.metrics.observe(stage, wall, cpu)
+            if error is not None:
+                logger.warning(f"[WARN] OCR บริเวณรูป {tuple(round(v) for v in rect)} เพจ {i+1} ผิดพลาด: {error}")
+                self._incr("ocr_errors")
+                failed += 1
+            elif ocr_text:
+                found.append((rect, ocr_text))
+
+        text = merge_in_reading_order(blocks, found) if found else base_text
+        if failed:
+            source = "text_fallback"  # ไม่เก็บ cache → รอบหน้าลอง OCR บริเวณที่พลาดใหม่
+        else:
+            source = "mixed" if found else "text"
+        return {
+            "text": text or "",
+            "source": source,
+            "reason": "image_regions",
+            **self._layout(page, found),
+        }
+
+    def _load_from_doc_cache(self, doc_key: str) -> Optional[List[Dict]]:
+        """
+        ไฟล์นี้ (hash เดิม + ค่าตั้งค่าเดิม) เคยโหลดครบแล้ว → ประกอบผลจาก cache โดยไม่เปิด PDF
+        """
+        page_keys = self.cache.get("doc", doc_key)
+        if page_keys is None:
+            return None
 
-            pages.append(
-                {
-                    "page": i + 1,
-                    "text": final_text or "",
-                }
-            )
+        cached = self.cache.get_many("page", page_keys)
+        if len(cached) != len(set(page_keys)):
+            return None
 
-        doc.close()
-        return pages
+        return [
+            {
+                "page": i + 1,
+                **cached[key],
+                "content_hash": key.split(":", 1)[0],
+            }
+            for i, key in enumerate(page_keys)
+        ]
 
 
 if __name__ == "__main__":
@@ -91,5 +587,5 @@ if __name__ == "__main__":
     pages = loader.load(pdf_path)
     print(f"โหลดได้ {len(pages)} หน้า")
     for p in pages:
-        print(f"\n=== Page {p['page']} ===")
+        print(f"\n=== Page {p['page']} ({p['source']}) ===")
         print(p["text"][:400].replace("\n", " ") + "...")
@@ -0,0 +1,216 @@
+# src/ingestion/preprocess.py
+"""
+เตรียมภาพหน้าเอกสารก่อนส่ง OCR
+
+1) render รอบวิเคราะห์ความละเอียดต่ำ (analysis_dpi, grayscale) แล้ว threshold แบบ Otsu
+2) หามุมเอียงของบรรทัด (projection profile ตามแนวเฉือน — numpy ทั้งก้อน)
+3) ระยะห่างบรรทัดจาก profile ที่แก้มุมแล้ว (≈ 1.2 × ขนาดฟอนต์) → เลือก dpi ให้บรรทัดห่างกัน
+   ราว target_pitch_px (ตัวเล็ก → dpi สูง, ตัวใหญ่ → dpi ต่ำ)
+4) ขอบเขตหมึก → crop เฉพาะบริเวณที่มีข้อความ (ตัดขอบกระดาษว่าง)
+5) render จริงแบบ grayscale ไม่มี alpha ตรงจาก PyMuPDF (1 byte/pixel แทน RGB 3 byte)
+   แล้วหมุนแก้เอียง / binarize ตามตั้งค่า
+
+ภาพที่ได้เล็กลงมาก (crop + grayscale) → ใช้หน่วยความจำและเวลา OCR น้อยลง
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import fitz  # PyMuPDF
+import numpy as np
+
+from PIL import Image
+
+
+@dataclass
+class OCRPreprocess:
+    grayscale: bool = True
+    adaptive_dpi: bool = True
+    min_dpi: int = 150
+    max_dpi: int = 300
+    target_pitch_px: int = 50       # ระยะห่างบรรทัดที่ต้องการในภาพ OCR (ฟอนต์ 12pt → 200 dpi)
+    crop: bool = True
+    crop_margin_pt: float = 12.0
+    deskew: bool = True
+    max_skew_deg: float = 5.0
+    min_skew_deg: float = 0.3       # เอียงน้อยกว่านี้ไม่หมุน (หมุนแล้วภาพเบลอเปล่า ๆ)
+    binarize: bool = False          # tesseract binarize เองอยู่แล้ว → เปิดเมื่อภาพสแกนพื้นหลังไม่เรียบ
+    analysis_dpi: int = 100
+
+
+# render ตรง ๆ ที่ dpi ที่กำหนด แค่เปลี่ยนเป็น grayscale (ไม่วิเคราะห์ภาพ)
+PLAIN = OCRPreprocess(adaptive_dpi=False, crop=False, deskew=False)
+
+
+def pixmap_to_array(pix: "fitz.Pixmap") -> np.ndarray:
+    """
+    Pixmap → numpy (h, w) หรือ (h, w, n) แบบไม่ copy (ตัด padding ท้ายแถวถ้ามี)
+    """
+    raw = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.stride)
+    raw = raw[:, : pix.width * pix.n]
+    return raw if pix.n == 1 else raw.reshape(pix.height, pix.width, pix.n)
+
+
+def otsu_threshold(gray: np.ndarray) -> int:
+    """
+    ค่า threshold แบบ Otsu (เพิ่ม variance ระหว่างกลุ่มให้มากที่สุด) จาก histogram 256 ช่อง
+    """
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    total = hist.sum()
+    if total == 0:
+        return 128
+    prob = hist / total
+    omega = np.cumsum(prob)
+    mu = np.cumsum(prob * np.arange(256))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (mu[-1] * omega - mu) ** 2 / (omega * (1.0 - omega))
+    return int(np.nanargmax(between))
+
+
+def binarize(gray: np.ndarray) -> np.ndarray:
+    return np.where(gray > otsu_threshold(gray), 255, 0).astype(np.uint8)
+
+
+def ink_mask(gray: np.ndarray) -> Optional[np.ndarray]:
+    """
+    True = หมึก; หน้าว่าง (ไม่มีความต่างของสีพอ) → None
+    """
+    if gray.size == 0 or int(gray.max()) - int(gray.min()) < 64:
+        return None
+    return gray <= otsu_threshold(gray)
+
+
+def _sheared_profiles(ys: np.ndarray, xs: np.ndarray, height: int, angles: np.ndarray) -> np.ndarray:
+    """
+    profile แถวของจุดหมึกเมื่อเฉือนตามแต่ละมุม (แถว = มุม) — bincount ครั้งเดียวทุกมุม
+    """
+    pad = int(np.ceil((xs.max() + 1) * np.tan(np.radians(np.abs(angles).max())))) + 1
+    rows = height + 2 * pad
+    shifted = np.rint(ys[None, :] - xs[None, :] * np.tan(np.radians(angles))[:, None]).astype(np.int64) + pad
+    shifted += (np.arange(len(angles)) * rows)[:, None]
+    return np.bincount(shifted.ravel(), minlength=len(angles) * rows).reshape(len(angles), rows)
+
+
+def estimate_skew(mask: np.ndarray, max_deg: float, step_deg: float = 0.1) -> Tuple[float, np.ndarray]:
+    """
+    มุมเอียง (องศา, บวก = บรรทัดลาดลงไปทางขวา) ที่ทำให้ profile แนวนอนคมที่สุด
+    + profile แถวที่มุมนั้น (ใช้หาความสูงบรรทัดต่อ)
+
+    แทนการหมุนภาพทุกมุม: เลื่อนพิกัด y ของจุดหมึกตาม x·tan(มุม) แล้วเทียบความคม (ผลรวมกำลังสอง)
+    ค้นแบบหยาบ (ทีละ 0.5°) ก่อน แล้วละเอียด (ทีละ step_deg) รอบมุมที่ดีที่สุด
+    """
+    ys, xs = np.nonzero(mask)
+    if len(ys) > 60_000:
+        pick = np.random.default_rng(0).choice(len(ys), 60_000, replace=False)
+        ys, xs = ys[pick], xs[pick]
+
+    best = 0.0
+    for span, step in ((max_deg, 0.5), (0.5, step_deg)):
+        angles = np.arange(best - span, best + span + step / 2, step)
+        profiles = _sheared_profiles(ys, xs, mask.shape[0], angles)
+        pick = int(np.argmax((profiles.astype(np.float64) ** 2).sum(axis=1)))
+        best = round(float(angles[pick]), 2)
+    return best, profiles[pick]
+
+
+def line_pitch(profile: np.ndarray, min_px: int, max_px: int) -> Optional[int]:
+    """
+    ระยะห่างบรรทัด (baseline ถึง baseline, px) จาก autocorrelation ของ profile แถว
+    เลือก peak แรกที่สูงอย่างน้อยครึ่งหนึ่งของ peak สูงสุด (กันได้ 2 เท่าของระยะจริง)
+
+    ใช้ระยะห่างแทนความสูงของแถบหมึก เพราะสระบน/ล่างและวรรณยุกต์ไทยทำให้หนึ่งบรรทัด
+    แตกเป็นหลายแถบที่ความละเอียดต่ำ
+    """
+    centered = profile.astype(np.float64) - profile.mean()
+    n = len(centered)
+    if n <= max_px + 1 or not centered.any():
+        return None
+    spectrum = np.fft.rfft(centered, 2 * n)
+    auto = np.fft.irfft(spectrum * np.conj(spectrum))[: max_px + 2]
+    seg = auto[min_px - 1:]
+    peaks = np.flatnonzero((seg[1:-1] > seg[:-2]) & (seg[1:-1] >= seg[2:])) + 1
+    peaks = peaks[seg[peaks] > 0]
+    if len(peaks) == 0:
+        return None
+    first = peaks[seg[peaks] >= 0.5 * seg[peaks].max()][0]
+    return int(min_px - 1 + first)
+
+
+def analyze_page(page: "fitz.Page", pre: OCRPreprocess, clip: Optional["fitz.Rect"] = None) -> Dict:
+    """
+    วิเคราะห์ภาพความละเอียดต่ำ → {"skew": องศา, "pitch_pt": ระยะห่างบรรทัด (pt), "ink_rect": fitz.Rect}
+    (คีย์ที่หาไม่ได้เป็น None) — clip → วิเคราะห์เฉพาะบริเวณนั้นของหน้า
+    """
+    info: Dict = {"skew": 0.0, "pitch_pt": None, "ink_rect": None}
+    pix = page.get_pixmap(dpi=pre.analysis_dpi, colorspace=fitz.csGRAY, alpha=False, clip=clip)
+    mask = ink_mask(pixmap_to_array(pix))
+    if mask is None:
+        return info
+
+    angle, profile = estimate_skew(mask, pre.max_skew_deg)
+    if abs(angle) >= pre.min_skew_deg:
+        info["skew"] = angle
+    px_per_pt = pre.analysis_dpi / 72.0
+    # ระยะบรรทัดที่เป็นไปได้: ฟอนต์ราว 3 – 40 pt
+    pitch_px = line_pitch(profile, max(2, int(4 * px_per_pt)), int(48 * px_per_pt))
+    if pitch_px is not None:
+        info["pitch_pt"] = pitch_px / px_per_pt
+
+    cols = np.flatnonzero(mask.sum(axis=0) >= 2)
+    rows = np.flatnonzero(mask.sum(axis=1) >= 2)
+    if len(cols) and len(rows):
+        scale = 72.0 / pre.analysis_dpi
+        x0, y0 = (clip or page.rect).tl
+        info["ink_rect"] = fitz.Rect(
+            x0 + cols[0] * scale, y0 + rows[0] * scale,
+            x0 + (cols[-1] + 1) * scale, y0 + (rows[-1] + 1) * scale,
+        )
+    return info
+
+
+def choose_dpi(pitch_pt: Optional[float], default_dpi: int, pre: OCRPreprocess) -> int:
+    if pitch_pt is None or pitch_pt <= 0:
+        return default_dpi
+    dpi = pre.target_pitch_px * 72.0 / pitch_pt
+    return int(min(max(round(dpi / 10) * 10, pre.min_dpi), pre.max_dpi))
+
+
+def prepare_page_image(
+    page: "fitz.Page",
+    dpi: int,
+    pre: OCRPreprocess = PLAIN,
+    clip: Optional["fitz.Rect"] = None,
+) -> Tuple[Image.Image, Dict]:
+    """
+    render หน้า + เตรียมภาพตาม pre → (ภาพสำหรับ OCR, ข้อมูล dpi/skew/crop ที่ใช้)
+    dpi = ค่าที่ใช้เมื่อไม่ได้เปิด adaptive_dpi หรือประมาณขนาดฟอนต์ไม่ได้
+    clip = render เฉพาะบริเวณนี้ของหน้า (เช่นบล็อกรูปภาพ) แทนทั้งหน้า
+    """
+    info: Dict = {"dpi": dpi, "skew": 0.0, "crop": None}
+    area = fitz.Rect(clip) & page.rect if clip is not None else page.rect
+    clip = fitz.Rect(area) if clip is not None else None
+    if pre.adaptive_dpi or pre.crop or pre.deskew:
+        found = analyze_page(page, pre, clip)
+        if pre.adaptive_dpi:
+            info["dpi"] = choose_dpi(found["pitch_pt"], dpi, pre)
+        if pre.deskew:
+            info["skew"] = found["skew"]
+        # หน้าหมุน (/Rotate) พิกัดภาพไม่ตรงกับพิกัดหน้า → ไม่ crop
+        if pre.crop and found["ink_rect"] is not None and page.rotation == 0:
+            m = pre.crop_margin_pt
+            cropped = (found["ink_rect"] + (-m, -m, m, m)) & area
+            if not cropped.is_empty:
+                clip = cropped
+                info["crop"] = tuple(round(v, 1) for v in clip)
+
+    colorspace = fitz.csGRAY if pre.grayscale else fitz.csRGB
+    pix = page.get_pixmap(dpi=info["dpi"], colorspace=colorspace, alpha=False, clip=clip)
+    mode = "L" if pre.grayscale else "RGB"
+    img = Image.frombytes(mode, (pix.width, pix.height), pix.samples)
+
+    if info["skew"]:
+        fill = 255 if mode == "L" else (255, 255, 255)
+        img = img.rotate(info["skew"], resample=Image.BILINEAR, expand=True, fillcolor=fill)
+    if pre.binarize:
+        img = Image.fromarray(binarize(np.asarray(img.convert("L"))))
+    return img, info
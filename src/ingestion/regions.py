@@ -0,0 +1,157 @@
+# src/ingestion/regions.py
+"""
+OCR เฉพาะบริเวณรูปภาพในหน้าที่มี text layer ดีอยู่แล้ว (เช่นลายเซ็นสแกน / ตารางที่ประทับเป็นรูป)
+
+- หา bbox ของรูปภาพจาก page.get_image_info() → ตัดรูปเล็กเกินไป และรูปพื้นหลังที่มี
+  บล็อกข้อความ text layer วางทับอยู่ (เช่นหัวกระดาษ / ลายน้ำ / PDF สแกนที่ OCR มาแล้ว) ออก
+- รวมรูปที่ซ้อนกัน (รูปเดียวถูกหั่นเป็นหลาย tile) เป็นบริเวณเดียว
+- ข้อความ OCR ของแต่ละบริเวณแทรกเข้าระหว่างบล็อกข้อความตามตำแหน่งแนวตั้ง
+  โดยไม่เปลี่ยนลำดับของบล็อก text layer เดิม
+
+บรรทัดพร้อมตำแหน่ง/ขนาดฟอนต์ (text_lines) ใช้แบ่งย่อหน้าตามรูปเอกสาร (ดู ParagraphSplitter)
+"""
+
+from typing import List, Sequence, Tuple
+
+import fitz  # PyMuPDF
+
+# บล็อกข้อความ: (bbox, ข้อความ)
+TextBlock = Tuple["fitz.Rect", str]
+# บรรทัด: [x0, y0, x1, y1, ขนาดฟอนต์ | None, ตัวหนา 0/1, ข้อความ] (list ล้วน → เก็บ cache เป็น JSON ได้)
+TextLine = List
+
+_BOLD_FLAG = 16
+
+
+def text_blocks(page: "fitz.Page") -> List[TextBlock]:
+    """
+    บล็อกข้อความของ text layer ตามลำดับเดียวกับ get_text("text")
+    """
+    return [
+        (fitz.Rect(b[:4]), b[4])
+        for b in page.get_text("blocks")
+        if b[6] == 0
+    ]
+
+
+def text_lines(page: "fitz.Page") -> List[TextLine]:
+    """
+    บรรทัดของ text layer ตามลำดับเดียวกับ get_text("text")
+    ขนาดฟอนต์ = span ที่มีตัวอักษร (ไม่นับช่องว่าง) มากที่สุด, ตัวหนา = ทุก span ที่มีตัวอักษรเป็นตัวหนา
+    """
+    lines: List[TextLine] = []
+    for block in page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT)["blocks"]:
+        for line in block.get("lines", ()):
+            spans = [s for s in line["spans"] if s["text"].strip()]
+            if not spans:
+                continue
+            main = max(spans, key=lambda s: len(s["text"].strip()))
+            bold = all(s["flags"] & _BOLD_FLAG for s in spans)
+            text = "".join(s["text"] for s in line["spans"]).strip()
+            lines.append([*(round(v, 1) for v in line["bbox"]), round(main["size"], 1), int(bold), text])
+    return lines
+
+
+def ocr_lines(rect: "fitz.Rect", text: str) -> List[TextLine]:
+    """
+    ข้อความ OCR ของบริเวณ → บรรทัดเทียมเรียงลงมาในกรอบ rect (บรรทัดว่างคงไว้เป็นช่องว่างแนวตั้ง)
+    """
+    rows = text.strip().split("\n")
+    step = rect.height / max(len(rows), 1)
+    return [
+        [round(rect.x0, 1), round(rect.y0 + n * step, 1), round(rect.x1, 1), round(rect.y0 + (n + 1) * step, 1),
+         None, 0, row.strip()]
+        for n, row in enumerate(rows)
+        if row.strip()
+    ]
+
+
+def merge_lines_in_reading_order(lines: Sequence[TextLine], regions: Sequence[TextBlock]) -> List[TextLine]:
+    """
+    แทรกบรรทัด OCR ของแต่ละบริเวณก่อนบรรทัดแรกที่อยู่ต่ำกว่าขอบบนของบริเวณ (แบบ merge_in_reading_order)
+    """
+    out: List[TextLine] = []
+    pending = sorted((r for r in regions if r[1].strip()), key=lambda r: (r[0].y0, r[0].x0))
+    for line in lines:
+        while pending and pending[0][0].y0 <= line[1]:
+            out.extend(ocr_lines(*pending.pop(0)))
+        out.append(line)
+    for rect, text in pending:
+        out.extend(ocr_lines(rect, text))
+    return out
+
+
+def _covers_text(rect: "fitz.Rect", text_rects: Sequence["fitz.Rect"], max_text_overlap: float) -> bool:
+    """
+    มีบล็อกข้อความที่อยู่บนรูปนี้เกิน max_text_overlap ของพื้นที่บล็อก → รูปเป็นพื้นหลัง
+    """
+    for text_rect in text_rects:
+        inter = rect & text_rect
+        block_area = text_rect.width * text_rect.height
+        if not inter.is_empty and block_area > 0 and inter.width * inter.height > max_text_overlap * block_area:
+            return True
+    return False
+
+
+def image_regions(
+    page: "fitz.Page",
+    blocks: Sequence[TextBlock],
+    min_area_ratio: float = 0.005,
+    min_side_pt: float = 24.0,
+    max_text_overlap: float = 0.5,
+) -> List["fitz.Rect"]:
+    """
+    บริเวณรูปภาพที่ควร OCR (เรียงจากบนลงล่าง)
+    """
+    page_rect = page.rect
+    page_area = page_rect.width * page_rect.height
+    if page_area <= 0:
+        return []
+
+    rects: List[fitz.Rect] = []
+    for info in page.get_image_info():
+        rect = fitz.Rect(info["bbox"]) & page_rect
+        if not rect.is_empty:
+            rects.append(rect)
+
+    # รวมรูปที่ซ้อน/ชนกันจนไม่มีคู่ไหนทับกันแล้ว
+    merged = True
+    while merged:
+        merged = False
+        for a in range(len(rects)):
+            for b in range(a + 1, len(rects)):
+                if rects[a].intersects(rects[b]):
+                    rects[a] = rects[a] | rects[b]
+                    del rects[b]
+                    merged = True
+                    break
+            if merged:
+                break
+
+    text_rects = [rect for rect, _ in blocks]
+    regions = []
+    for rect in rects:
+        area = rect.width * rect.height
+        if rect.width < min_side_pt or rect.height < min_side_pt:
+            continue
+        if area < min_area_ratio * page_area:
+            continue
+        if _covers_text(rect, text_rects, max_text_overlap):
+            continue
+        regions.append(rect)
+    return sorted(regions, key=lambda r: (r.y0, r.x0))
+
+
+def merge_in_reading_order(blocks: Sequence[TextBlock], regions: Sequence[TextBlock]) -> str:
+    """
+    แทรกข้อความของแต่ละบริเวณก่อนบล็อกข้อความแรกที่อยู่ต่ำกว่าขอบบนของบริเวณนั้น
+    (ไม่มี → ต่อท้ายหน้า) แล้วรวมเป็นข้อความเดียวแบบ get_text("text")
+    """
+    parts: List[str] = []
+    pending = sorted((r for r in regions if r[1].strip()), key=lambda r: (r[0].y0, r[0].x0))
+    for rect, text in blocks:
+        while pending and pending[0][0].y0 <= rect.y0:
+            parts.append(pending.pop(0)[1].strip() + "\n")
+        parts.append(text)
+    parts.extend(text.strip() + "\n" for _, text in pending)
+    return "".join(parts).strip()
@@ -0,0 +1,85 @@
+# src/ingestion/text_quality.py
+
+import unicodedata
+from dataclasses import dataclass
+from typing import Optional
+
+import fitz  # PyMuPDF
+
+
+@dataclass
+class TextLayerQuality:
+    script_ratio: float      # สัดส่วนตัวอักษรไทย/ละติน ต่อ ตัวอักษรทั้งหมด
+    garbage_ratio: float     # สัดส่วน glyph เสีย (PUA, U+FFFD, control ฯลฯ)
+    image_coverage: float    # สัดส่วนพื้นที่หน้าที่เป็นรูปภาพ (0.0 - 1.0)
+
+
+def _is_thai_or_latin(ch: str) -> bool:
+    code = ord(ch)
+    return (
+        0x0E00 <= code <= 0x0E7F      # Thai
+        or ch.isascii()
+        or 0x00C0 <= code <= 0x024F   # Latin-1 Supplement / Extended-A/B
+    )
+
+
+def _is_garbage(ch: str) -> bool:
+    if ch == "�":
+        return True
+    category = unicodedata.category(ch)
+    # Co = private use (ฟอนต์ไทยรุ่นเก่ามัก map ไว้ตรงนี้), Cn = ไม่มีใน Unicode
+    return category in ("Co", "Cn") or (category == "Cc" and not ch.isspace())
+
+
+def image_coverage(page: "fitz.Page") -> float:
+    """
+    สัดส่วนพื้นที่ของหน้าที่ถูกรูปภาพทับ (รวม bbox ที่ตัดขอบหน้าแล้ว, สูงสุด 1.0)
+    """
+    page_rect = page.rect
+    page_area = page_rect.width * page_rect.height
+    if page_area <= 0:
+        return 0.0
+
+    covered = 0.0
+    for info in page.get_image_info():
+        rect = fitz.Rect(info["bbox"]) & page_rect
+        if not rect.is_empty:
+            covered += rect.width * rect.height
+    return min(covered / page_area, 1.0)
+
+
+def assess_text_layer(text: str, coverage: float = 0.0) -> TextLayerQuality:
+    visible = [ch for ch in text if not ch.isspace()]
+    letters = [ch for ch in visible if ch.isalpha()]
+
+    script_ratio = (
+        sum(_is_thai_or_latin(ch) for ch in letters) / len(letters) if letters else 1.0
+    )
+    garbage_ratio = (
+        sum(_is_garbage(ch) for ch in visible) / len(visible) if visible else 0.0
+    )
+
+    return TextLayerQuality(
+        script_ratio=script_ratio,
+        garbage_ratio=garbage_ratio,
+        image_coverage=coverage,
+    )
+
+
+def text_layer_problem(
+    quality: TextLayerQuality,
+    min_script_ratio: float = 0.8,
+    max_garbage_ratio: float = 0.05,
+    max_image_coverage: float = 0.6,
+) -> Optional[str]:
+    """
+    คืนเหตุผลที่ไม่ควรเชื่อ text layer ของหน้านี้ หรือ None ถ้าใช้ได้เลยโดยไม่ต้อง OCR
+    (จำนวนตัวอักษรขั้นต่ำเช็คแยกด้วย OCREngine.is_text_enough)
+    """
+    if quality.script_ratio < min_script_ratio:
+        return "unexpected_script"
+    if quality.garbage_ratio > max_garbage_ratio:
+        return "garbage_glyphs"
+    if quality.image_coverage > max_image_coverage:
+        return "image_heavy"
+    return None
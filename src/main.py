@@ -1,23 +1,130 @@
 # src/main.py
 
 import sys
+import time
 
+from db.init_db import init_db
+from db.session import SessionLocal
+from search.paragraph_index import first_appearance, search_similar, search_text
+from service.batch_service import run_batch_compare
 from service.compare_service import run_compare
+from utils.log import setup_logging
+
+
+def main_batch(args):
+    """
+    python src/main.py batch <doc_name> <v1.pdf> <v2.pdf> ... [--cumulative] [--ndjson]
+    """
+    cumulative = "--cumulative" in args
+    ndjson = "--ndjson" in args
+    args = [a for a in args if a not in ("--cumulative", "--ndjson")]
+    if len(args) < 3:
+        print("วิธีใช้:")
+        print("  python src/main.py batch <doc_name> <v1.pdf> <v2.pdf> [v3.pdf ...] [--cumulative] [--ndjson]")
+        print("ตัวอย่าง:")
+        print("  python src/main.py batch HR_Policy data/samples/hr_v1.pdf data/samples/hr_v2.pdf data/samples/hr_v3.pdf")
+        sys.exit(1)
+
+    result = run_batch_compare(doc_name=args[0], paths=args[1:], cumulative=cumulative, ndjson=ndjson)
+
+    print("\n===== BATCH SUMMARY =====")
+    print(f"📄 Document   : {result['doc_name']}")
+    for c in result["comparisons"]:
+        tag = " (สะสม)" if c["cumulative"] else ""
+        print(
+            f"🔁 {c['v1_label']} -> {c['v2_label']}{tag}: changes={c['changes_count']}, "
+            f"risk={c['risk_level']}, run_id={c['run_id']}"
+        )
+    print(f"⏱️ Throughput : {result['files_per_hour']:,.0f} ไฟล์/ชั่วโมง ({result['elapsed_sec']} วินาที)")
+    print_stages(result["metrics"])
+
+
+def main_search(args):
+    """
+    python src/main.py search "<ข้อความ>" [--similar | --first] [--limit N]
+    """
+    mode = "similar" if "--similar" in args else "first" if "--first" in args else "text"
+    limit = 20
+    if "--limit" in args:
+        pos = args.index("--limit")
+        limit = int(args[pos + 1])
+        args = args[:pos] + args[pos + 2:]
+    args = [a for a in args if a not in ("--similar", "--first")]
+    if not args:
+        print("วิธีใช้:")
+        print('  python src/main.py search "<ข้อความ>" [--similar | --first] [--limit N]')
+        sys.exit(1)
+
+    query = " ".join(args)
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        if mode == "text":
+            hits = search_text(db, query, limit)
+        elif mode == "similar":
+            hits = search_similar(db, query, limit)
+        else:
+            hits = first_appearance(db, query)[:limit]
+        took = (time.perf_counter() - started) * 1000
+    finally:
+        db.close()
+
+    print(f"\n===== SEARCH ({mode}) : {len(hits)} รายการ ใน {took:.1f} ms =====")
+    for h in hits:
+        score = f" score={h['score']:.2f}" if h["score"] is not None else ""
+        extra = f" (พบใน {h['versions_with_match']} version)" if "versions_with_match" in h else ""
+        print(f"📄 {h['document_name']} / {h['version_label']} / page {h['page_number']}{score}{extra}")
+        print(f"   {(h['snippet'] or h['text'])[:160]}")
+
+
+def print_stages(metrics):
+    """
+    เวลาแต่ละขั้น (wall / CPU) — ดูว่าคอขวดอยู่ที่ OCR, match หรือ DB
+    """
+    if not metrics or not metrics.get("stages"):
+        return
+    print("⏱️ Stages     :")
+    for name, s in metrics["stages"].items():
+        print(f"   - {name:<14} wall={s['wall_sec']:.3f}s cpu={s['cpu_sec']:.3f}s n={s['count']}")
 
 
 def main():
-    if len(sys.argv) < 4:
+    # --quiet → แสดงเฉพาะคำเตือน/ข้อผิดพลาด (หรือตั้ง env LOG_LEVEL เอง)
+    quiet = "--quiet" in sys.argv
+    sys.argv = [a for a in sys.argv if a != "--quiet"]
+    setup_logging("WARNING" if quiet else None)
+    # สร้างตาราง/คอลัมน์/ดัชนีที่ยังขาด (ฐานข้อมูลเก่า)
+    init_db()
+
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        main_batch(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "search":
+        main_search(sys.argv[2:])
+        return
+
+    force = "--force" in sys.argv
+    incremental = "--incremental" in sys.argv
+    ndjson = "--ndjson" in sys.argv
+    argv = [a for a in sys.argv if a not in ("--force", "--incremental", "--ndjson")]
+
+    if len(argv) < 4:
         print("วิธีใช้:")
-        print("  python src/main.py <doc_name> <v1.pdf> <v2.pdf> [v1_label] [v2_label]")
+        print(
+            "  python src/main.py <doc_name> <v1.pdf> <v2.pdf> [v1_label] [v2_label] "
+            "[--force] [--incremental] [--ndjson] [--quiet]"
+        )
         print("ตัวอย่าง:")
         print("  python src/main.py HR_Policy data/samples/hr_v1.pdf data/samples/hr_v2.pdf v1 v2")
+        print("  python src/main.py batch <doc_name> <v1.pdf> <v2.pdf> [v3.pdf ...] [--cumulative]")
+        print('  python src/main.py search "<ข้อความ>" [--similar | --first]')
         sys.exit(1)
 
-    doc_name = sys.argv[1]
-    v1_path = sys.argv[2]
-    v2_path = sys.argv[3]
-    v1_label = sys.argv[4] if len(sys.argv) > 4 else "v1"
-    v2_label = sys.argv[5] if len(sys.argv) > 5 else "v2"
+    doc_name = argv[1]
+    v1_path = argv[2]
+    v2_path = argv[3]
+    v1_label = argv[4] if len(argv) > 4 else "v1"
+    v2_label = argv[5] if len(argv) > 5 else "v2"
 
     result = run_compare(
         doc_name=doc_name,
@@ -25,6 +132,9 @@ def main():
         v2_path=v2_path,
         v1_label=v1_label,
         v2_label=v2_label,
+        force=force,
+        incremental=incremental,
+        ndjson=ndjson,
     )
 
     # แสดงสรุปสั้น ๆ บน CLI
@@ -37,7 +147,16 @@ def main():
     print(f"⚠️  Risk Level : {result['risk_level']}")
     print(f"📝 JSON       : {result['json_report_path']}")
     print(f"🌐 HTML       : {result['html_report_path']}")
-    print(f"🆔 Run ID     : {result['run_id']}")
+    if result.get("ndjson_report_path"):
+        print(f"📜 NDJSON     : {result['ndjson_report_path']}")
+    print(f"🆔 Run ID     : {result['run_id']}" + (" (ผลเดิมจาก cache)" if result["from_cache"] else ""))
+    inc = result.get("incremental")
+    if inc:
+        print(
+            f"♻️ Incremental: ต่อจาก run_id={inc['base_run_id']}, หน้าเปลี่ยน={inc['changed_pages']}, "
+            f"ใช้คู่เดิม={inc['reused_pairs']}"
+        )
+    print_stages(result.get("metrics"))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,116 @@
+# src/matching/alignment.py
+
+import bisect
+from collections import Counter
+from typing import Hashable, List, Sequence, Tuple
+
+# (old_lo, old_hi, new_lo, new_hi) — ช่วงครึ่งเปิดที่ยังไม่ได้จับคู่
+Gap = Tuple[int, int, int, int]
+
+
+def _longest_increasing(pairs: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """
+    pairs เรียงตามฝั่ง old แล้ว → คืนชุดที่ฝั่ง new เพิ่มขึ้นยาวที่สุด (patience sorting)
+    """
+    tails: List[int] = []          # ค่า new ตัวท้ายของ subsequence ยาว k+1
+    tail_idx: List[int] = []       # index ใน pairs ของตัวท้ายนั้น
+    prev: List[int] = [-1] * len(pairs)
+
+    for idx, (_, j) in enumerate(pairs):
+        pos = bisect.bisect_left(tails, j)
+        if pos > 0:
+            prev[idx] = tail_idx[pos - 1]
+        if pos == len(tails):
+            tails.append(j)
+            tail_idx.append(idx)
+        else:
+            tails[pos] = j
+            tail_idx[pos] = idx
+
+    result: List[Tuple[int, int]] = []
+    idx = tail_idx[-1] if tail_idx else -1
+    while idx != -1:
+        result.append(pairs[idx])
+        idx = prev[idx]
+    result.reverse()
+    return result
+
+
+def patience_align(
+    old_keys: Sequence[Hashable],
+    new_keys: Sequence[Hashable],
+    start: int = 0,
+) -> Tuple[List[Tuple[int, int]], List[Gap]]:
+    """
+    จัดเรียงสองลำดับแบบ patience diff:
+    1) จับคู่ส่วนหัว/ท้ายที่เหมือนกันเป๊ะ
+    2) ใช้ key ที่ปรากฏครั้งเดียวทั้งสองฝั่งเป็น anchor (เลือกชุดที่ลำดับไม่ไขว้กัน)
+    3) ทำซ้ำในช่องว่างระหว่าง anchor
+
+    start: จำนวนคู่แรกที่รู้อยู่แล้วว่าเหมือนกัน (เช่นนับไว้ระหว่างโหลดแบบ stream)
+    → ถือเป็น anchor ทันทีโดยไม่ต้องเทียบ key ซ้ำ
+
+    คืน (anchors เรียงตามลำดับ, ช่องว่างที่ยังไม่มีคู่)
+    เวลาที่ใช้เกือบเป็นเชิงเส้นเมื่อสองเวอร์ชันต่างกันไม่มาก
+    """
+    anchors: List[Tuple[int, int]] = [(i, i) for i in range(start)]
+    gaps: List[Gap] = []
+
+    # ใช้ stack แทน recursion — งานที่ push ทีหลังคือช่วงที่อยู่ก่อนในเอกสาร
+    stack: List[Tuple[str, object]] = [("range", (start, len(old_keys), start, len(new_keys)))]
+    while stack:
+        kind, item = stack.pop()
+        if kind == "anchor":
+            anchors.append(item)
+            continue
+
+        alo, ahi, blo, bhi = item
+
+        head: List[Tuple[int, int]] = []
+        while alo < ahi and blo < bhi and old_keys[alo] == new_keys[blo]:
+            head.append((alo, blo))
+            alo += 1
+            blo += 1
+
+        tail: List[Tuple[int, int]] = []
+        while alo < ahi and blo < bhi and old_keys[ahi - 1] == new_keys[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+            tail.append((ahi, bhi))
+        tail.reverse()
+
+        middle: List[Tuple[str, object]] = []
+        if alo < ahi and blo < bhi:
+            old_counts = Counter(old_keys[alo:ahi])
+            new_counts = Counter(new_keys[blo:bhi])
+            new_pos = {
+                new_keys[j]: j for j in range(blo, bhi) if new_counts[new_keys[j]] == 1
+            }
+            unique = [
+                (i, new_pos[old_keys[i]])
+                for i in range(alo, ahi)
+                if old_counts[old_keys[i]] == 1 and old_keys[i] in new_pos
+            ]
+            lis = _longest_increasing(unique)
+
+            if lis:
+                prev_a, prev_b = alo, blo
+                for i, j in lis:
+                    middle.append(("range", (prev_a, i, prev_b, j)))
+                    middle.append(("anchor", (i, j)))
+                    prev_a, prev_b = i + 1, j + 1
+                middle.append(("range", (prev_a, ahi, prev_b, bhi)))
+            else:
+                gaps.append((alo, ahi, blo, bhi))
+        elif alo < ahi or blo < bhi:
+            gaps.append((alo, ahi, blo, bhi))
+
+        # ใส่ลง stack กลับด้าน เพื่อให้ประมวลผลตามลำดับเอกสาร
+        ordered = (
+            [("anchor", p) for p in head]
+            + middle
+            + [("anchor", p) for p in tail]
+        )
+        stack.extend(reversed(ordered))
+
+    return anchors, gaps
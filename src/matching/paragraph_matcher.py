@@ -1,10 +1,14 @@
 # src/matching/paragraph_matcher.py
 
+import bisect
+import heapq
+from collections import Counter, defaultdict
 from dataclasses import dataclass
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from difflib import SequenceMatcher
 
 from ingestion.paragraph_splitter import Paragraph
+from matching.alignment import patience_align
 
 
 @dataclass
@@ -12,39 +16,364 @@ class ParagraphMatch:
     old: Optional[Paragraph]   # ย่อหน้าใน V1 (อาจเป็น None ถ้าเป็น ADD)
     new: Optional[Paragraph]   # ย่อหน้าใน V2 (อาจเป็น None ถ้าเป็น REMOVE)
     similarity: float          # 0.0 - 1.0
+    moved: bool = False        # True = คู่นี้อยู่คนละตำแหน่งในลำดับเอกสาร (โหมด align)
+
+
+def _ratio_from_matches(matches: int, total: int) -> float:
+    """
+    สูตรเดียวกับ difflib (2*M/T) เพื่อให้ upper bound เทียบกับ ratio() ได้ตรง ๆ
+    """
+    if total:
+        return 2.0 * matches / total
+    return 1.0
+
+
+class _LCSBlock:
+    """
+    ย่อหน้าหลายย่อหน้าต่อกันเป็น bit-vector เดียว เพื่อหา LCS กับข้อความหนึ่ง
+    ทีละหลายร้อย candidate ในคำสั่ง big-int ชุดเดียว
+
+    แต่ละย่อหน้าจองช่องแบบ byte-aligned และเหลือ guard bit (เป็น 0 เสมอ)
+    อย่างน้อย 1 bit ไว้รับ carry ของการบวก จึงไม่ล้นไปกวนย่อหน้าถัดไป
+    """
+
+    def __init__(self, ids: List[int], texts: List[str]):
+        self.ids = ids
+        self.spans: List[Tuple[int, int, int]] = []  # (byte เริ่ม, byte จบ, ความยาว)
+
+        offset = 0
+        for idx in ids:
+            length = len(texts[idx])
+            nbytes = length // 8 + 1
+            self.spans.append((offset, offset + nbytes, length))
+            offset += nbytes
+        self.nbytes = offset
+
+        masks: Dict[str, bytearray] = {}
+        full = bytearray(offset)
+        for idx, (start, _, length) in zip(ids, self.spans):
+            base = start * 8
+            for pos, ch in enumerate(texts[idx]):
+                bit = base + pos
+                arr = masks.get(ch)
+                if arr is None:
+                    arr = masks[ch] = bytearray(offset)
+                arr[bit >> 3] |= 1 << (bit & 7)
+                full[bit >> 3] |= 1 << (bit & 7)
+
+        self.masks = {ch: int.from_bytes(arr, "little") for ch, arr in masks.items()}
+        self.full = int.from_bytes(full, "little")
+
+    def lcs_lengths(self, a: str) -> List[int]:
+        masks = self.masks
+        full = self.full
+        v = full
+        for ch in a:
+            m = masks.get(ch)
+            if m is None:
+                continue
+            u = v & m
+            v = ((v + u) | (v - u)) & full
+
+        raw = v.to_bytes(self.nbytes, "little")
+        return [
+            length - int.from_bytes(raw[start:end], "little").bit_count()
+            for start, end, length in self.spans
+        ]
+
+
+class _CandidateIndex:
+    """
+    ดัชนีของย่อหน้าฝั่ง V2 สำหรับตัดตัวเลือกก่อนเรียก SequenceMatcher
+    - inverted index ของ character n-gram → ใช้จัดลำดับ candidate (Jaccard)
+    - รายการความยาวที่เรียงไว้ → ใช้ length filter แบบ bisect
+    - Counter ของตัวอักษร → ใช้คำนวณ bound แบบเดียวกับ quick_ratio()
+    - bitmask ตำแหน่งตัวอักษร → ใช้หา LCS แบบ bit-parallel เป็น bound ชั้นสุดท้าย
+    """
+
+    BLOCK_SIZE = 256
+
+    def __init__(self, texts: List[str], ngram: int, max_posting: int):
+        self.texts = texts
+        self.ngram = ngram
+        self.lengths = [len(t) for t in texts]
+        self.char_counts: List[Optional[Counter]] = [None] * len(texts)
+        self.char_masks: List[Optional[Dict[str, int]]] = [None] * len(texts)
+        self.grams: List[frozenset] = [self.grams_of(t) for t in texts]
+
+        postings: Dict[str, List[int]] = defaultdict(list)
+        for idx, grams in enumerate(self.grams):
+            for g in grams:
+                postings[g].append(idx)
+
+        # n-gram ที่พบแทบทุกย่อหน้าไม่ช่วยจัดลำดับ → ตัดทิ้งเพื่อความเร็ว
+        self.postings = {
+            g: ids for g, ids in postings.items() if len(ids) <= max_posting
+        }
+
+        # index เรียงตามความยาว + บล็อก LCS ของแต่ละช่วง (สร้างเมื่อใช้ครั้งแรก)
+        self.by_length = sorted(range(len(texts)), key=lambda i: (self.lengths[i], i))
+        self.sorted_lengths = [self.lengths[i] for i in self.by_length]
+        self._blocks: Dict[int, _LCSBlock] = {}
+
+        # SequenceMatcher ที่ set_seq2 ไว้แล้ว (สร้างเมื่อใช้ครั้งแรก)
+        self._matchers: Dict[int, SequenceMatcher] = {}
+
+    def grams_of(self, text: str) -> frozenset:
+        n = self.ngram
+        if len(text) <= n:
+            return frozenset([text]) if text else frozenset()
+        return frozenset(text[i:i + n] for i in range(len(text) - n + 1))
+
+    def chars(self, idx: int) -> Counter:
+        counts = self.char_counts[idx]
+        if counts is None:
+            counts = Counter(self.texts[idx])
+            self.char_counts[idx] = counts
+        return counts
+
+    def lcs_length(self, a: str, idx: int) -> int:
+        """
+        ความยาว LCS ของ a กับย่อหน้า idx (bit-parallel, Allison-Dix)
+        matching block ของ SequenceMatcher เป็น common subsequence เสมอ
+        จึงใช้เป็น upper bound ของจำนวนตัวอักษรที่ match ได้
+        """
+        masks = self.char_masks[idx]
+        if masks is None:
+            masks = {}
+            for pos, ch in enumerate(self.texts[idx]):
+                masks[ch] = masks.get(ch, 0) | (1 << pos)
+            self.char_masks[idx] = masks
+
+        m = self.lengths[idx]
+        full = (1 << m) - 1
+        v = full
+        for ch in a:
+            u = v & masks.get(ch, 0)
+            v = ((v + u) | (v - u)) & full
+        return m - v.bit_count()
+
+    def matcher(self, idx: int) -> SequenceMatcher:
+        sm = self._matchers.get(idx)
+        if sm is None:
+            sm = SequenceMatcher(None)
+            sm.set_seq2(self.texts[idx])
+            self._matchers[idx] = sm
+        return sm
+
+    def mark_used(self, idx: int) -> None:
+        self._matchers.pop(idx, None)
+        self.char_masks[idx] = None
+
+    def length_window(self, a: str, min_score: float, used: set) -> List[Tuple[int, int]]:
+        """
+        คืน (index, LCS กับ a) ของย่อหน้าที่ยังว่างและความยาวทำให้
+        2*min(la,lb)/(la+lb) >= min_score ได้ — LCS คิดแบบ batch ทีละบล็อก
+        """
+        length = len(a)
+        if min_score <= 0.0:
+            left, right = 0, len(self.by_length)
+        else:
+            lo = length * min_score / (2.0 - min_score)
+            hi = length * (2.0 - min_score) / min_score
+            # ขยายขอบเล็กน้อยกัน floating point ปัดเศษ แล้วค่อยเช็คจริงทีหลัง
+            left = bisect.bisect_left(self.sorted_lengths, int(lo) - 1)
+            right = bisect.bisect_right(self.sorted_lengths, int(hi) + 1)
+
+        result: List[Tuple[int, int]] = []
+        size = self.BLOCK_SIZE
+        for block_no in range(left // size, (right - 1) // size + 1 if right > left else 0):
+            block_start = block_no * size
+            lo_pos = max(left, block_start)
+            hi_pos = min(right, block_start + size)
+            if all(self.by_length[p] in used for p in range(lo_pos, hi_pos)):
+                continue
+
+            block = self._blocks.get(block_no)
+            if block is None:
+                block = _LCSBlock(self.by_length[block_start:block_start + size], self.texts)
+                self._blocks[block_no] = block
+
+            lcs = block.lcs_lengths(a)
+            for p in range(lo_pos, hi_pos):
+                idx = self.by_length[p]
+                if idx not in used:
+                    result.append((idx, lcs[p - block_start]))
+
+        return result
+
+    def ranked_candidates(self, grams: frozenset, top_k: int) -> List[int]:
+        shared: Dict[int, int] = defaultdict(int)
+        for g in grams:
+            for idx in self.postings.get(g, ()):
+                shared[idx] += 1
+
+        def jaccard(item: Tuple[int, int]) -> float:
+            idx, common = item
+            return common / (len(grams) + len(self.grams[idx]) - common)
+
+        ranked = heapq.nlargest(top_k, shared.items(), key=jaccard)
+        return [idx for idx, _ in ranked]
 
 
 class ParagraphMatcher:
     """
     จับคู่ย่อหน้า V1 ↔ V2 แบบง่าย ๆ ด้วย string similarity
+
+    mode:
+      - "indexed"    : ใช้ดัชนี n-gram + bound ราคาถูกตัด candidate ก่อน (ค่าเริ่มต้น)
+      - "bruteforce" : เทียบทุกคู่ด้วย SequenceMatcher แบบเดิม
+      - "align"      : จัดเรียงตามลำดับเอกสาร — ล็อกย่อหน้าที่เหมือนเดิมเป๊ะเป็น anchor
+                       (patience diff) แล้วค่อยเทียบแบบ fuzzy เฉพาะในช่องว่างระหว่าง anchor
+                       ช่องที่ใหญ่เกิน max_gap → จับคู่แบบ indexed (รวมทุกช่องใหญ่)
+                       ที่เหลือจับคู่ข้ามตำแหน่งได้ถ้าคล้ายกัน >= move_threshold → moved
+
+    สองโหมดแรกให้ผลการจับคู่เหมือนกันทุกประการที่ threshold เดียวกัน
+
+    semantic=True: หลังจับคู่ตามโหมดแล้ว ย่อหน้าที่ยังไม่มีคู่ทั้งสองฝั่งจะถูกจับคู่ต่อด้วย
+    เวกเตอร์ char n-gram TF-IDF (embedding.semantic) ถ้า cosine >= semantic_threshold
+    → ข้อที่เขียนใหม่ทั้งประโยคกลายเป็น MODIFIED แทน REMOVED + ADDED
+    (similarity ของคู่เหล่านี้ยังเป็น ratio ของ SequenceMatcher ตามจริง)
     """
 
-    def __init__(self, threshold: float = 0.6):
+    def __init__(
+        self,
+        threshold: float = 0.6,
+        mode: str = "indexed",
+        ngram: int = 3,
+        top_k: int = 8,
+        max_posting: int = 200,
+        move_threshold: float = 0.85,
+        max_gap: int = 1000,
+        semantic: bool = False,
+        semantic_threshold: float = 0.75,
+        semantic_top_k: int = 5,
+    ):
+        if mode not in ("indexed", "bruteforce", "align"):
+            raise ValueError(f"ไม่รู้จัก mode: {mode}")
         self.threshold = threshold
+        self.mode = mode
+        self.ngram = ngram
+        self.top_k = top_k
+        self.max_posting = max_posting
+        self.move_threshold = move_threshold
+        self.max_gap = max_gap
+        self.semantic = semantic
+        self.semantic_threshold = semantic_threshold
+        self.semantic_top_k = semantic_top_k
+
+        # จำนวนคู่ที่ต้องคำนวณ SequenceMatcher จริงในการ match ล่าสุด
+        self.full_comparisons = 0
+        # จำนวนคู่ที่ได้จากขั้น semantic ในการ match ล่าสุด
+        self.semantic_matches = 0
+
+    def settings(self) -> Dict:
+        """
+        ค่าตั้งค่าที่มีผลต่อผลการจับคู่ (ใช้เป็นส่วนหนึ่งของ key ผลเปรียบเทียบ)
+        """
+        return {
+            "threshold": self.threshold,
+            "mode": self.mode,
+            "ngram": self.ngram,
+            "top_k": self.top_k,
+            "max_posting": self.max_posting,
+            "move_threshold": self.move_threshold,
+            "max_gap": self.max_gap,
+            "semantic": (
+                {"threshold": self.semantic_threshold, "top_k": self.semantic_top_k}
+                if self.semantic else None
+            ),
+        }
 
     def similarity_score(self, a: str, b: str) -> float:
         return SequenceMatcher(None, a, b).ratio()
 
-    def match(self, old_paras: List[Paragraph], new_paras: List[Paragraph]) -> List[ParagraphMatch]:
-        matches: List[ParagraphMatch] = []
+    def match(
+        self,
+        old_paras: List[Paragraph],
+        new_paras: List[Paragraph],
+        anchored_prefix: int = 0,
+    ) -> List[ParagraphMatch]:
+        """
+        anchored_prefix: จำนวนย่อหน้าแรกที่ caller ยืนยันแล้วว่าข้อความตรงกันทุกตัว
+        (ใช้เฉพาะโหมด "align" ซึ่งให้ผลเท่ากับการจับคู่ส่วนหัวเองอยู่แล้ว)
+        """
+        self.full_comparisons = 0
+        self.semantic_matches = 0
+        if self.mode == "align":
+            return self._match_aligned(old_paras, new_paras, anchored_prefix)
+        if self.mode == "bruteforce":
+            best_for_old = self._best_bruteforce(old_paras, new_paras)
+        else:
+            best_for_old = self._best_indexed(old_paras, new_paras)
 
-        used_new_indexes = set()
+        if self.semantic:
+            used_new = {idx for idx, _ in best_for_old if idx is not None}
+            left_old = [i for i, (idx, _) in enumerate(best_for_old) if idx is None]
+            left_new = [j for j in range(len(new_paras)) if j not in used_new]
+            for i, j, score in self._semantic_pairs(old_paras, new_paras, left_old, left_new):
+                best_for_old[i] = (j, score)
+        return self._assemble(old_paras, new_paras, best_for_old)
 
-        # จับคู่จากฝั่ง V1 เป็นหลัก
-        for old in old_paras:
-            best_score = 0.0
-            best_idx: Optional[int] = None
+    def _semantic_pairs(
+        self,
+        old_paras: List[Paragraph],
+        new_paras: List[Paragraph],
+        left_old: List[int],
+        left_new: List[int],
+    ) -> List[Tuple[int, int, float]]:
+        """
+        จับคู่ย่อหน้าที่เหลือด้วยเวกเตอร์ → (index ฝั่ง old, index ฝั่ง new, ratio)
+        """
+        if not left_old or not left_new:
+            return []
+        from embedding.semantic import semantic_pairs
 
-            for idx, new in enumerate(new_paras):
-                if idx in used_new_indexes:
-                    continue
+        pairs = semantic_pairs(
+            [old_paras[i].text for i in left_old],
+            [new_paras[j].text for j in left_new],
+            min_cosine=self.semantic_threshold,
+            top_k=self.semantic_top_k,
+        )
+        self.semantic_matches += len(pairs)
+        return [
+            (
+                left_old[a],
+                left_new[b],
+                self.similarity_score(old_paras[left_old[a]].text, new_paras[left_new[b]].text),
+            )
+            for a, b, _cosine in pairs
+        ]
 
-                score = self.similarity_score(old.text, new.text)
-                if score > best_score:
-                    best_score = score
-                    best_idx = idx
+    def assemble(
+        self,
+        old_paras: List[Paragraph],
+        new_paras: List[Paragraph],
+        pairs: Dict[int, Tuple[int, float, bool]],
+    ) -> List[ParagraphMatch]:
+        """
+        ประกอบผลจากคู่ที่รู้แล้ว (old index → (new index, similarity, moved))
+        เรียงแบบเดียวกับ match() ของโหมดนี้ — ใช้กับผลที่ต่อจากการจับคู่ครั้งก่อน (incremental)
+        """
+        if self.mode == "align":
+            return self._assemble_in_order(old_paras, new_paras, pairs)
+        best_for_old = [
+            (pairs[i][0], pairs[i][1]) if i in pairs else (None, 0.0)
+            for i in range(len(old_paras))
+        ]
+        return self._assemble(old_paras, new_paras, best_for_old)
 
-            if best_idx is not None and best_score >= self.threshold:
+    def _assemble(
+        self,
+        old_paras: List[Paragraph],
+        new_paras: List[Paragraph],
+        best_for_old: List[Tuple[Optional[int], float]],
+    ) -> List[ParagraphMatch]:
+        matches: List[ParagraphMatch] = []
+        used_new_indexes = set()
+
+        for old, (best_idx, best_score) in zip(old_paras, best_for_old):
+            if best_idx is not None:
                 matches.append(
                     ParagraphMatch(
                         old=old,
@@ -76,6 +405,291 @@ class ParagraphMatcher:
 
         return matches
 
+    def _match_aligned(
+        self,
+        old_paras: List[Paragraph],
+        new_paras: List[Paragraph],
+        anchored_prefix: int = 0,
+    ) -> List[ParagraphMatch]:
+        anchors, gaps = patience_align(
+            [p.text for p in old_paras],
+            [p.text for p in new_paras],
+            start=min(anchored_prefix, len(old_paras), len(new_paras)),
+        )
+
+        # old index → (new index, similarity, moved)
+        pairs: Dict[int, Tuple[int, float, bool]] = {i: (j, 1.0, False) for i, j in anchors}
+
+        # 1) fuzzy เฉพาะภายในช่องว่างเดียวกัน (ช่องที่ไม่ใหญ่เกิน max_gap)
+        old_gap: Dict[int, int] = {}
+        new_gap: Dict[int, int] = {}
+        big_old: List[int] = []
+        big_new: List[int] = []
+        for gap_no, (alo, ahi, blo, bhi) in enumerate(gaps):
+            old_gap.update((i, gap_no) for i in range(alo, ahi))
+            new_gap.update((j, gap_no) for j in range(blo, bhi))
+
+            if ahi - alo > self.max_gap or bhi - blo > self.max_gap:
+                big_old += range(alo, ahi)
+                big_new += range(blo, bhi)
+            elif ahi > alo and bhi > blo:
+                best = self._best_indexed(old_paras[alo:ahi], new_paras[blo:bhi])
+                for k, (best_idx, score) in enumerate(best):
+                    if best_idx is not None:
+                        pairs[alo + k] = (blo + best_idx, score, False)
+
+        # ช่องที่ใหญ่เกิน max_gap (anchor น้อย ลำดับเชื่อไม่ได้) → จับคู่แบบโหมด indexed
+        # รวมทุกช่องใหญ่ที่ threshold ปกติ (ไม่งั้นย่อหน้าที่แก้เล็กน้อยจะกลายเป็น REMOVED + ADDED)
+        if big_old and big_new:
+            best = self._best_indexed(
+                [old_paras[i] for i in big_old], [new_paras[j] for j in big_new]
+            )
+            for k, (best_idx, score) in enumerate(best):
+                if best_idx is not None:
+                    i, j = big_old[k], big_new[best_idx]
+                    pairs[i] = (j, score, old_gap[i] != new_gap[j])
+
+        # 2) ที่เหลือ → จับคู่ข้ามช่องได้เฉพาะที่คล้ายกันมาก (ย้ายตำแหน่ง)
+        used_new = {j for j, _, _ in pairs.values()}
+        left_old = [i for i in old_gap if i not in pairs]
+        left_new = [j for j in new_gap if j not in used_new]
+        if left_old and left_new:
+            mover = ParagraphMatcher(
+                threshold=self.move_threshold,
+                ngram=self.ngram,
+                top_k=self.top_k,
+                max_posting=self.max_posting,
+            )
+            best = mover._best_indexed(
+                [old_paras[i] for i in left_old], [new_paras[j] for j in left_new]
+            )
+            self.full_comparisons += mover.full_comparisons
+            for k, (best_idx, score) in enumerate(best):
+                if best_idx is not None:
+                    i, j = left_old[k], left_new[best_idx]
+                    pairs[i] = (j, score, old_gap[i] != new_gap[j])
+
+        # 3) semantic: ที่ยังเหลือ → จับคู่ด้วยเวกเตอร์ (ข้ามช่อง = moved เหมือนขั้น 2)
+        if self.semantic:
+            used_new = {j for j, _, _ in pairs.values()}
+            left_old = [i for i in old_gap if i not in pairs]
+            left_new = [j for j in new_gap if j not in used_new]
+            for i, j, score in self._semantic_pairs(old_paras, new_paras, left_old, left_new):
+                pairs[i] = (j, score, old_gap[i] != new_gap[j])
+
+        return self._assemble_in_order(old_paras, new_paras, pairs)
+
+    def _assemble_in_order(
+        self,
+        old_paras: List[Paragraph],
+        new_paras: List[Paragraph],
+        pairs: Dict[int, Tuple[int, float, bool]],
+    ) -> List[ParagraphMatch]:
+        """
+        เรียงผลตามลำดับเอกสาร: ย่อหน้าที่เพิ่มใหม่แทรกก่อนคู่ถัดไปในฝั่ง V2
+        ย่อหน้าที่ย้ายแสดงที่ตำแหน่งเดิมในฝั่ง V1
+        """
+        matched_new = {j for j, _, _ in pairs.values()}
+        matches: List[ParagraphMatch] = []
+        next_new = 0
+
+        def emit_added_until(limit: int) -> None:
+            nonlocal next_new
+            while next_new < limit:
+                if next_new not in matched_new:
+                    matches.append(
+                        ParagraphMatch(old=None, new=new_paras[next_new], similarity=0.0)
+                    )
+                next_new += 1
+
+        for i, old in enumerate(old_paras):
+            if i not in pairs:
+                matches.append(ParagraphMatch(old=old, new=None, similarity=0.0))
+                continue
+
+            j, score, moved = pairs[i]
+            if not moved:
+                emit_added_until(j)
+                next_new = max(next_new, j + 1)
+            matches.append(
+                ParagraphMatch(old=old, new=new_paras[j], similarity=score, moved=moved)
+            )
+
+        emit_added_until(len(new_paras))
+        return matches
+
+    def _best_bruteforce(
+        self, old_paras: List[Paragraph], new_paras: List[Paragraph]
+    ) -> List[Tuple[Optional[int], float]]:
+        results: List[Tuple[Optional[int], float]] = []
+        used_new_indexes = set()
+
+        # จับคู่จากฝั่ง V1 เป็นหลัก
+        for old in old_paras:
+            best_score = 0.0
+            best_idx: Optional[int] = None
+
+            for idx, new in enumerate(new_paras):
+                if idx in used_new_indexes:
+                    continue
+
+                score = self.similarity_score(old.text, new.text)
+                self.full_comparisons += 1
+                if score > best_score:
+                    best_score = score
+                    best_idx = idx
+
+            if best_idx is not None and best_score >= self.threshold:
+                results.append((best_idx, best_score))
+                used_new_indexes.add(best_idx)
+            else:
+                results.append((None, 0.0))
+
+        return results
+
+    def _best_indexed(
+        self, old_paras: List[Paragraph], new_paras: List[Paragraph]
+    ) -> List[Tuple[Optional[int], float]]:
+        """
+        ให้ผลเท่ากับ _best_bruteforce:
+        - เลือกคู่ที่ ratio สูงสุดในย่อหน้า V2 ที่ยังว่าง (เสมอกัน → index ต่ำสุด)
+        - ยอมรับเมื่อ ratio > 0 และ >= threshold
+
+        candidate ที่ upper bound (ความยาว → quick_ratio/LCS) ไม่มีทางชนะคู่ที่ดีที่สุด
+        ณ ตอนนั้นจะถูกข้ามโดยไม่เรียก SequenceMatcher จริง
+        """
+        texts = [p.text for p in new_paras]
+        index = _CandidateIndex(texts, self.ngram, self.max_posting)
+
+        exact: Dict[str, List[int]] = defaultdict(list)
+        for idx, text in enumerate(texts):
+            exact[text].append(idx)
+
+        results: List[Tuple[Optional[int], float]] = []
+        used = set()
+
+        for old in old_paras:
+            a = old.text
+            la = len(a)
+            best_score = 0.0
+            best_idx: Optional[int] = None
+            a_counts: Optional[Counter] = None
+
+            def consider(idx: int, lcs: Optional[int] = None) -> None:
+                nonlocal best_score, best_idx, a_counts
+                if idx in used:
+                    return
+                total = la + index.lengths[idx]
+                if self._cannot_win(
+                    _ratio_from_matches(min(la, index.lengths[idx]), total),
+                    idx, best_score, best_idx,
+                ):
+                    return
+                if lcs is None:
+                    if a_counts is None:
+                        a_counts = Counter(a)
+                    b_counts = index.chars(idx)
+                    common = sum(
+                        min(n, b_counts[ch]) for ch, n in a_counts.items() if ch in b_counts
+                    )
+                    if self._cannot_win(
+                        _ratio_from_matches(common, total), idx, best_score, best_idx
+                    ):
+                        return
+                    lcs = index.lcs_length(a, idx)
+                if self._cannot_win(
+                    _ratio_from_matches(lcs, total), idx, best_score, best_idx
+                ):
+                    return
+
+                sm = index.matcher(idx)
+                sm.set_seq1(a)
+                score = self._bounded_ratio(sm, idx, best_score, best_idx)
+                self.full_comparisons += 1
+                if score is None:
+                    return
+                if score > best_score or (
+                    score == best_score and best_idx is not None and idx < best_idx
+                ):
+                    best_score = score
+                    best_idx = idx
+
+            # 1) ย่อหน้าที่ข้อความตรงกันเป๊ะ + top-k จาก n-gram → ได้ best สูงตั้งแต่ต้น
+            for idx in exact.get(a, ()):
+                consider(idx)
+
+            # ratio = 1.0 เกิดได้เฉพาะข้อความที่เหมือนกันทุกตัว ซึ่งเช็คครบแล้วข้างบน
+            if best_score < 1.0:
+                for idx in index.ranked_candidates(index.grams_of(a), self.top_k):
+                    consider(idx)
+
+                # 2) ที่เหลือในช่วงความยาวที่ยังมีโอกาส → กรองด้วย bound ก่อนเสมอ
+                floor = max(self.threshold, best_score)
+                for idx, lcs in index.length_window(a, floor, used):
+                    consider(idx, lcs)
+
+            if best_idx is not None and best_score >= self.threshold:
+                results.append((best_idx, best_score))
+                used.add(best_idx)
+                index.mark_used(best_idx)
+            else:
+                results.append((None, 0.0))
+
+        return results
+
+    def _bounded_ratio(
+        self,
+        sm: SequenceMatcher,
+        idx: int,
+        best_score: float,
+        best_idx: Optional[int],
+    ) -> Optional[float]:
+        """
+        คำนวณ ratio() ด้วยลำดับการหา matching block แบบเดียวกับ
+        SequenceMatcher.get_matching_blocks แต่หยุดกลางทาง (คืน None)
+        ทันทีที่ block ที่เจอแล้ว + ความยาวช่วงที่เหลือ ไม่มีทางชนะคู่ที่ดีที่สุด
+        """
+        la, lb = len(sm.a), len(sm.b)
+        total = la + lb
+        matched = 0
+        pending = min(la, lb)
+        queue = [(0, la, 0, lb)]
+
+        while queue:
+            alo, ahi, blo, bhi = queue.pop()
+            pending -= min(ahi - alo, bhi - blo)
+            i, j, k = sm.find_longest_match(alo, ahi, blo, bhi)
+            if k:
+                matched += k
+                if alo < i and blo < j:
+                    queue.append((alo, i, blo, j))
+                    pending += min(i - alo, j - blo)
+                if i + k < ahi and j + k < bhi:
+                    queue.append((i + k, ahi, j + k, bhi))
+                    pending += min(ahi - i - k, bhi - j - k)
+            if queue and self._cannot_win(
+                _ratio_from_matches(matched + pending, total), idx, best_score, best_idx
+            ):
+                return None
+
+        return _ratio_from_matches(matched, total)
+
+    def _cannot_win(
+        self,
+        upper_bound: float,
+        idx: int,
+        best_score: float,
+        best_idx: Optional[int],
+    ) -> bool:
+        if idx == best_idx:
+            return True
+        if upper_bound <= 0.0 or upper_bound < self.threshold:
+            return True
+        if upper_bound < best_score:
+            return True
+        # เสมอกันได้เต็มที่ → ชนะได้ก็ต่อเมื่อ index ต่ำกว่าคู่ปัจจุบัน
+        return upper_bound == best_score and best_idx is not None and idx > best_idx
+
 
 if __name__ == "__main__":
     from ingestion.pdf_loader import PDFLoader
@@ -1,17 +1,54 @@
 # src/report/report_builder.py
 
+import html as html_lib
 import json
+from collections import Counter
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, Iterable, List
 from datetime import datetime
 
 from diff.diff_engine import Change
+from diff.word_diff import render_inline
+
+# ลำดับคอลัมน์ของแต่ละแถวในไฟล์ข้อมูลของ report แบบ lazy
+DATA_FIELDS = [
+    "change_type", "page", "section_label", "old_text", "new_text", "word_ops", "risk_level",
+]
+
+
+def _indent(text: str, spaces: int) -> str:
+    return text.replace("\n", "\n" + " " * spaces)
+
+
+def change_to_dict(c: Change) -> Dict[str, Any]:
+    return {
+        "change_type": c.change_type,
+        "section_label": c.section_label,
+        "old_text": c.old_text,
+        "new_text": c.new_text,
+        "word_ops": c.word_ops,
+        "risk_level": c.risk_level,
+        "risk_keywords": c.risk_keywords,
+        "old_bbox": c.old_bbox,
+        "new_bbox": c.new_bbox,
+    }
 
 
 class ReportBuilder:
-    def __init__(self, output_dir: str = "data/outputs"):
+    """
+    เขียน report ลงดิสก์ทีละแถว (ไม่ประกอบทั้งไฟล์เป็น string ก้อนเดียว)
+
+    HTML มีสองแบบ:
+      - static : ตารางเต็มในไฟล์เดียว (change ไม่เกิน lazy_threshold รายการ)
+      - lazy   : หน้า HTML เบา ๆ + ไฟล์ข้อมูล <ชื่อ>.data.js (JSON แบบ compact)
+                 แล้ว render ทีละหน้าฝั่ง browser พร้อมกรองตามประเภท / หน้า / คำค้น
+                 (โหลดข้อมูลด้วย <script> เพื่อให้เปิดไฟล์ตรง ๆ จาก file:// ได้)
+    """
+
+    def __init__(self, output_dir: str = "data/outputs", lazy_threshold: int = 2000):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.lazy_threshold = lazy_threshold
 
     def save_json(
         self,
@@ -21,31 +58,49 @@ class ReportBuilder:
         changes: List[Change],
         summary_text: str | None = None,
         overall_risk_level: str | None = None,
+        tag: str | None = None,
     ) -> Path:
-        data = {
+        head = {
             "document_name": doc_name,
             "version_old": v1_label,
             "version_new": v2_label,
             "overall_risk_level": overall_risk_level,
             "summary_text": summary_text,
-            "changes": [
-                {
-                    "change_type": c.change_type,
-                    "section_label": c.section_label,
-                    "old_text": c.old_text,
-                    "new_text": c.new_text,
-                }
-                for c in changes
-            ],
-            "generated_at": datetime.utcnow().isoformat(),
         }
 
-        filename = f"{self._safe_name(doc_name)}_{v1_label}_vs_{v2_label}.json"
-        out_path = self.output_dir / filename
-        out_path.write_text(
-            json.dumps(data, ensure_ascii=False, indent=2),
-            encoding="utf-8",
-        )
+        out_path = self.output_dir / f"{self._stem(doc_name, v1_label, v2_label, tag)}.json"
+
+        # รูปแบบเดียวกับ json.dumps(..., indent=2) แต่เขียนทีละ change
+        with out_path.open("w", encoding="utf-8") as f:
+            f.write("{")
+            for key, value in head.items():
+                f.write(f"\n  {json.dumps(key)}: {_indent(json.dumps(value, ensure_ascii=False, indent=2), 2)},")
+
+            f.write('\n  "changes": [')
+            for i, c in enumerate(changes):
+                item = change_to_dict(c)
+                f.write(("," if i else "") + "\n    " + _indent(json.dumps(item, ensure_ascii=False, indent=2), 4))
+            f.write("\n  ]" if changes else "]")
+
+            f.write(f',\n  "generated_at": {json.dumps(datetime.utcnow().isoformat())}\n}}')
+        return out_path
+
+    def save_ndjson(
+        self,
+        doc_name: str,
+        v1_label: str,
+        v2_label: str,
+        changes: Iterable[Change],
+        tag: str | None = None,
+    ) -> Path:
+        """
+        NDJSON: หนึ่ง change ต่อบรรทัด (รับ iterable → ส่ง generator มาได้ ไม่ต้องมีทั้งหมดใน memory)
+        ข้อมูลภาพรวมของ comparison อยู่ใน report .json
+        """
+        out_path = self.output_dir / f"{self._stem(doc_name, v1_label, v2_label, tag)}.ndjson"
+        with out_path.open("w", encoding="utf-8") as f:
+            for c in changes:
+                f.write(json.dumps(change_to_dict(c), ensure_ascii=False) + "\n")
         return out_path
 
     def save_html(
@@ -56,24 +111,116 @@ class ReportBuilder:
         changes: List[Change],
         summary_text: str | None = None,
         overall_risk_level: str | None = None,
+        mode: str = "auto",
+        tag: str | None = None,
     ) -> Path:
-        rows_parts: list[str] = []
-        for c in changes:
-            old_html = (c.old_text or "").replace("\n", "<br>")
-            new_html = (c.new_text or "").replace("\n", "<br>")
-
-            row = (
-                "<tr>"
-                f"<td>{c.change_type}</td>"
-                f"<td>{c.section_label}</td>"
-                f"<td>{old_html}</td>"
-                f"<td>{new_html}</td>"
-                "</tr>"
+        """
+        mode: "auto" (lazy เมื่อ change เกิน lazy_threshold) / "static" / "lazy"
+        """
+        if mode not in ("auto", "static", "lazy"):
+            raise ValueError(f"ไม่รู้จัก report mode: {mode}")
+        if mode == "lazy" or (mode == "auto" and len(changes) > self.lazy_threshold):
+            return self.save_html_lazy(
+                doc_name, v1_label, v2_label, changes, summary_text, overall_risk_level, tag=tag
             )
-            rows_parts.append(row)
 
-        rows_html = "\n".join(rows_parts)
+        out_path = self.output_dir / f"{self._stem(doc_name, v1_label, v2_label, tag)}.html"
 
+        with out_path.open("w", encoding="utf-8") as f:
+            f.write(self._html_head(doc_name, v1_label, v2_label, summary_text, overall_risk_level))
+            f.write(
+                "  <h2>รายละเอียดการเปลี่ยนแปลง</h2>\n"
+                "  <table>\n"
+                "    <thead>\n"
+                "      <tr>\n"
+                "        <th>Type</th>\n"
+                "        <th>Section</th>\n"
+                "        <th>Old Text</th>\n"
+                "        <th>New Text</th>\n"
+                "      </tr>\n"
+                "    </thead>\n"
+                "    <tbody>\n"
+            )
+            for i, c in enumerate(changes):
+                # highlight คำที่ลบ/เพิ่มจาก word_ops ที่คำนวณไว้แล้ว (ไม่มี → แสดงข้อความเต็ม)
+                old_html, new_html = render_inline(c.old_text, c.new_text, c.word_ops or [])
+                f.write(
+                    ("\n" if i else "")
+                    + "<tr>"
+                    f"<td>{c.change_type}</td>"
+                    f"<td>{html_lib.escape(c.section_label or '')}</td>"
+                    f"<td>{old_html}</td>"
+                    f"<td>{new_html}</td>"
+                    "</tr>"
+                )
+            f.write(
+                "\n"
+                "    </tbody>\n"
+                "  </table>\n"
+                "</body>\n"
+                "</html>\n"
+            )
+        return out_path
+
+    def save_html_lazy(
+        self,
+        doc_name: str,
+        v1_label: str,
+        v2_label: str,
+        changes: List[Change],
+        summary_text: str | None = None,
+        overall_risk_level: str | None = None,
+        tag: str | None = None,
+    ) -> Path:
+        """
+        HTML เบา ๆ + ไฟล์ข้อมูล compact (<ชื่อ>.data.js) → browser render เฉพาะหน้าที่ดูอยู่
+        """
+        stem = self._stem(doc_name, v1_label, v2_label, tag)
+        data_path = self.output_dir / f"{stem}.data.js"
+        out_path = self.output_dir / f"{stem}.html"
+
+        counts = self._write_data_file(data_path, changes)
+
+        type_counts = ", ".join(f"{t}={n}" for t, n in sorted(counts.items())) or "-"
+        with out_path.open("w", encoding="utf-8") as f:
+            f.write(self._html_head(doc_name, v1_label, v2_label, summary_text, overall_risk_level))
+            f.write(
+                _LAZY_BODY
+                .replace("__TOTAL__", str(len(changes)))
+                .replace("__TYPE_COUNTS__", html_lib.escape(type_counts))
+                .replace("__DATA_FILE__", html_lib.escape(data_path.name, quote=True))
+            )
+        return out_path
+
+    @staticmethod
+    def _write_data_file(path: Path, changes: List[Change]) -> Counter:
+        """
+        window.REPORT_DATA = {"fields": [...], "rows": [[...], ...]} — หนึ่งแถวต่อบรรทัด
+        คืนจำนวน change แยกตามประเภท
+        """
+        counts: Counter = Counter()
+        with path.open("w", encoding="utf-8") as f:
+            f.write("window.REPORT_DATA = {\"fields\": ")
+            f.write(json.dumps(DATA_FIELDS))
+            f.write(", \"rows\": [")
+            for i, c in enumerate(changes):
+                counts[c.change_type] += 1
+                row = [
+                    c.change_type, c.page, c.section_label, c.old_text, c.new_text, c.word_ops,
+                    c.risk_level,
+                ]
+                f.write(("," if i else "") + "\n" + json.dumps(row, ensure_ascii=False, separators=(",", ":")))
+            f.write("\n]};\n")
+        return counts
+
+    @staticmethod
+    def _html_head(
+        doc_name: str,
+        v1_label: str,
+        v2_label: str,
+        summary_text: str | None,
+        overall_risk_level: str | None,
+    ) -> str:
         # เตรียม summary ให้ไม่มี backslash ใน f-string
         safe_summary = (summary_text or "").replace("\n", "<br>")
         risk_label = overall_risk_level or "-"
@@ -89,7 +236,7 @@ class ReportBuilder:
         else:
             summary_block = ""
 
-        html = (
+        return (
             "<!DOCTYPE html>\n"
             "<html lang=\"th\">\n"
             "<head>\n"
@@ -103,6 +250,9 @@ class ReportBuilder:
             "    .type-ADDED { background-color: #e6ffe6; }\n"
             "    .type-REMOVED { background-color: #ffe6e6; }\n"
             "    .type-MODIFIED { background-color: #fffbe6; }\n"
+            "    .type-MOVED { background-color: #e6f0ff; }\n"
+            "    del { background-color: #ffc9c9; text-decoration: line-through; }\n"
+            "    ins { background-color: #c3f5c3; text-decoration: none; }\n"
             "  </style>\n"
             "</head>\n"
             "<body>\n"
@@ -110,30 +260,142 @@ class ReportBuilder:
             f"  <p><strong>Document:</strong> {doc_name}</p>\n"
             f"  <p><strong>Compare:</strong> {v1_label} → {v2_label}</p>\n"
             f"  {summary_block}\n"
-            "  <h2>รายละเอียดการเปลี่ยนแปลง</h2>\n"
-            "  <table>\n"
-            "    <thead>\n"
-            "      <tr>\n"
-            "        <th>Type</th>\n"
-            "        <th>Section</th>\n"
-            "        <th>Old Text</th>\n"
-            "        <th>New Text</th>\n"
-            "      </tr>\n"
-            "    </thead>\n"
-            "    <tbody>\n"
-            f"{rows_html}\n"
-            "    </tbody>\n"
-            "  </table>\n"
-            "</body>\n"
-            "</html>\n"
         )
 
-        filename = f"{self._safe_name(doc_name)}_{v1_label}_vs_{v2_label}.html"
-        out_path = self.output_dir / filename
-        out_path.write_text(html, encoding="utf-8")
-        return out_path
+    def _stem(self, doc_name: str, v1_label: str, v2_label: str, tag: str | None = None) -> str:
+        """
+        ชื่อไฟล์ report (ไม่มีนามสกุล) — tag (เช่น result key / run id) แยกไฟล์ของแต่ละผลลัพธ์
+        ไม่ให้การเปรียบเทียบครั้งหลังที่ใช้ชื่อเอกสาร/label เดียวกันเขียนทับ report เดิม
+        """
+        stem = f"{self._safe_name(doc_name)}_{v1_label}_vs_{v2_label}"
+        return f"{stem}_{tag}" if tag else stem
 
     def _safe_name(self, name: str) -> str:
         return "".join(
             ch if ch.isalnum() or ch in "-_" else "_" for ch in name
         )
+
+
+# ส่วน body ของ report แบบ lazy (placeholder: __TOTAL__, __TYPE_COUNTS__, __DATA_FILE__)
+_LAZY_BODY = r"""  <h2>รายละเอียดการเปลี่ยนแปลง</h2>
+  <p>ทั้งหมด __TOTAL__ รายการ (__TYPE_COUNTS__)</p>
+  <form id="filters" onsubmit="return false" style="margin-bottom: 12px">
+    ประเภท
+    <select id="f-type">
+      <option value="">ทั้งหมด</option>
+      <option>ADDED</option><option>REMOVED</option><option>MODIFIED</option><option>MOVED</option>
+    </select>
+    ความเสี่ยง
+    <select id="f-risk">
+      <option value="">ทั้งหมด</option>
+      <option>HIGH</option><option>MEDIUM</option><option>LOW</option>
+    </select>
+    หน้า <input id="f-page-from" type="number" min="1" style="width: 5em" />
+    ถึง <input id="f-page-to" type="number" min="1" style="width: 5em" />
+    ค้นหา <input id="f-text" type="search" />
+    แสดง
+    <select id="f-size"><option>50</option><option selected>100</option><option>500</option></select>
+    รายการ/หน้า
+  </form>
+  <p>
+    <button id="prev" type="button">◀ ก่อนหน้า</button>
+    <span id="status"></span>
+    <button id="next" type="button">ถัดไป ▶</button>
+  </p>
+  <table>
+    <thead>
+      <tr>
+        <th>Type</th>
+        <th>Section</th>
+        <th>Old Text</th>
+        <th>New Text</th>
+      </tr>
+    </thead>
+    <tbody id="rows"></tbody>
+  </table>
+  <script src="__DATA_FILE__"></script>
+  <script>
+  (function () {
+    var data = window.REPORT_DATA || {fields: [], rows: []};
+    var F = {};
+    data.fields.forEach(function (name, i) { F[name] = i; });
+    var rows = data.rows, view = rows.map(function (_, i) { return i; }), offset = 0;
+    var $ = function (id) { return document.getElementById(id); };
+
+    // word_ops เป็น offset แบบ code point (Python) → ตัดด้วย Array.from ให้ตรงกันเสมอ
+    function fillText(td, text, ops, side) {
+      text = text || "";
+      if (!ops || !ops.length) { td.textContent = text; return; }
+      var chars = Array.from(text), pos = 0, tag = side === 0 ? "del" : "ins";
+      ops.forEach(function (op) {
+        var start = op[1 + side * 2], end = op[2 + side * 2];
+        td.appendChild(document.createTextNode(chars.slice(pos, start).join("")));
+        if (end > start) {
+          var el = document.createElement(tag);
+          el.textContent = chars.slice(start, end).join("");
+          td.appendChild(el);
+        }
+        pos = end;
+      });
+      td.appendChild(document.createTextNode(chars.slice(pos).join("")));
+    }
+
+    function render() {
+      var size = parseInt($("f-size").value, 10);
+      var tbody = $("rows"), frag = document.createDocumentFragment();
+      view.slice(offset, offset + size).forEach(function (idx) {
+        var r = rows[idx], tr = document.createElement("tr");
+        tr.className = "type-" + r[F.change_type];
+        [r[F.change_type], r[F.section_label]].forEach(function (v) {
+          var td = document.createElement("td"); td.textContent = v == null ? "" : v; tr.appendChild(td);
+        });
+        [0, 1].forEach(function (side) {
+          var td = document.createElement("td");
+          td.style.whiteSpace = "pre-wrap";
+          fillText(td, r[side === 0 ? F.old_text : F.new_text], r[F.word_ops], side);
+          tr.appendChild(td);
+        });
+        frag.appendChild(tr);
+      });
+      tbody.replaceChildren(frag);
+      var end = Math.min(offset + size, view.length);
+      $("status").textContent = view.length
+        ? "แสดง " + (offset + 1) + "–" + end + " จาก " + view.length + " รายการ"
+        : "ไม่พบรายการที่ตรงเงื่อนไข";
+      $("prev").disabled = offset === 0;
+      $("next").disabled = end >= view.length;
+    }
+
+    function applyFilters() {
+      var type = $("f-type").value, risk = $("f-risk").value, text = $("f-text").value.trim().toLowerCase();
+      var from = parseInt($("f-page-from").value, 10), to = parseInt($("f-page-to").value, 10);
+      view = [];
+      for (var i = 0; i < rows.length; i++) {
+        var r = rows[i], page = r[F.page];
+        if (type && r[F.change_type] !== type) continue;
+        if (risk && r[F.risk_level] !== risk) continue;
+        if (!isNaN(from) && (page == null || page < from)) continue;
+        if (!isNaN(to) && (page == null || page > to)) continue;
+        if (text && ((r[F.old_text] || "") + "\n" + (r[F.new_text] || "")).toLowerCase().indexOf(text) < 0) continue;
+        view.push(i);
+      }
+      offset = 0;
+      render();
+    }
+
+    ["f-type", "f-risk", "f-page-from", "f-page-to", "f-text"].forEach(function (id) {
+      $(id).addEventListener("input", applyFilters);
+    });
+    $("f-size").addEventListener("change", function () { offset = 0; render(); });
+    $("prev").addEventListener("click", function () {
+      offset = Math.max(0, offset - parseInt($("f-size").value, 10)); render(); window.scrollTo(0, 0);
+    });
+    $("next").addEventListener("click", function () {
+      offset += parseInt($("f-size").value, 10); render(); window.scrollTo(0, 0);
+    });
+    render();
+  })();
+  </script>
+</body>
+</html>
+"""
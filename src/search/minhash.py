@@ -0,0 +1,75 @@
+# src/search/minhash.py
+"""
+MinHash + LSH สำหรับหาย่อหน้าที่เกือบซ้ำ (near-duplicate) ข้ามเอกสาร
+
+- shingle = n-gram ตัวอักษร (ค่าเริ่มต้น 5) ของข้อความที่ normalize แล้ว (ไทยไม่มีช่องว่าง → ใช้ตัวอักษร)
+- signature = ค่าต่ำสุดของ hash แบบ (a·x + b) mod 2^64 จำนวน NUM_PERM ชุด (numpy ทั้งก้อน)
+- LSH แบ่ง signature เป็น BANDS วง วงละ ROWS ค่า → คู่ที่ Jaccard ≈ (1/BANDS)^(1/ROWS)
+  ขึ้นไปมีโอกาสชน band เดียวกันสูง (16×4 → ราว 0.5)
+"""
+
+import hashlib
+from typing import List
+
+import numpy as np
+
+from embedding.vectorizer import normalize_text
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE = 5
+
+_BASE = np.uint64(1_000_003)
+_rng = np.random.default_rng(20240601)  # seed ตายตัว → signature เดิมทุกครั้ง (เก็บลง DB ได้)
+_A = _rng.integers(1, 2**63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_B = _rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64)
+
+
+def shingle_hashes(text: str, size: int = SHINGLE) -> np.ndarray:
+    text = normalize_text(text)
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    if len(codes) < size:
+        size = max(len(codes), 1)
+    if len(codes) == 0:
+        return np.zeros(0, dtype=np.uint64)
+    rolling = codes.copy()
+    for n in range(2, size + 1):
+        rolling = rolling[:-1] * _BASE + codes[n - 1:]
+    return np.unique(rolling)
+
+
+def signature(text: str) -> np.ndarray:
+    """
+    MinHash signature (uint32 × NUM_PERM) — ข้อความว่างได้ค่าสูงสุดทุกช่อง
+    """
+    shingles = shingle_hashes(text)
+    if len(shingles) == 0:
+        return np.full(NUM_PERM, 0xFFFFFFFF, dtype=np.uint32)
+    mixed = _A[:, None] * shingles[None, :] + _B[:, None]   # ล้น = mod 2^64
+    return (mixed.min(axis=1) >> np.uint64(32)).astype(np.uint32)
+
+
+def to_bytes(sig: np.ndarray) -> bytes:
+    return sig.astype("<u4").tobytes()
+
+
+def from_bytes(raw: bytes) -> np.ndarray:
+    return np.frombuffer(raw, dtype="<u4")
+
+
+def jaccard_estimate(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.count_nonzero(a == b)) / len(a)
+
+
+def band_keys(sig: np.ndarray) -> List[int]:
+    """
+    key ของแต่ละ band (int 63 bit เก็บใน INTEGER ของ SQLite ได้)
+    """
+    raw = to_bytes(sig)
+    keys = []
+    for band in range(BANDS):
+        chunk = raw[band * ROWS * 4:(band + 1) * ROWS * 4]
+        digest = hashlib.blake2b(bytes([band]) + chunk, digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "little") >> 1)
+    return keys
@@ -0,0 +1,360 @@
+# src/search/paragraph_index.py
+"""
+ดัชนีย่อหน้าของทุก version ในฐานข้อมูล → ค้นหาข้ามเอกสาร
+  - search_text       : ค้นคำ/วลีด้วย SQLite FTS5 (tokenizer trigram → ภาษาไทยที่ไม่มีช่องว่างก็ค้นได้)
+  - search_similar    : หาย่อหน้าที่เกือบซ้ำด้วย MinHash + LSH bucket (ตาราง paragraph_bands)
+  - first_appearance  : version แรกของแต่ละเอกสารที่มีข้อความนี้ (ตรงเป๊ะหรือเกือบซ้ำ)
+
+index_version() ถูกเรียกตอนบันทึกผลเปรียบเทียบ (เพิ่มทีละ version ที่ยังไม่เคย index)
+ไฟล์ hash เดียวกันถูก index ครั้งเดียว แม้อัปโหลดซ้ำภายใต้เอกสาร/label อื่น
+→ ผลค้นหาชี้ไปที่ version แรกที่ index ไฟล์นั้น (ไม่มี hit ซ้ำของข้อความเดียวกัน)
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+
+from db.models import FTS_TABLE, Comparison, DocumentVersion, ParagraphBand, VersionParagraph
+from embedding.vectorizer import normalize_text, text_key
+from ingestion.paragraph_splitter import Paragraph
+
+from . import minhash
+
+logger = logging.getLogger(__name__)
+
+# จำนวน candidate จาก LSH สูงสุดที่นำมาวัด signature ต่อหนึ่งคำค้น
+MAX_CANDIDATES = 2000
+
+_HIT_COLUMNS = """
+    p.id AS paragraph_id, p.page_number, p.para_index, p.text,
+    v.id AS version_id, v.version_label, v.uploaded_at,
+    d.id AS document_id, d.name AS document_name
+"""
+_HIT_JOIN = """
+    JOIN document_versions v ON v.id = p.version_id
+    JOIN documents d ON d.id = v.document_id
+"""
+
+
+def _has_fts(db: Session) -> bool:
+    row = db.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": FTS_TABLE},
+    ).first()
+    return row is not None
+
+
+def index_version(
+    db: Session,
+    version: DocumentVersion,
+    paragraphs: Sequence[Paragraph],
+    with_minhash: bool = True,
+    commit: bool = True,
+) -> int:
+    """
+    เพิ่มย่อหน้าของ version เข้า index (ข้ามถ้าเคย index แล้ว) — คืนจำนวนย่อหน้าที่เพิ่ม
+    ไฟล์เดียวกันถูก index ไว้แล้วใน version อื่น → ไม่เพิ่มซ้ำ (paragraphs_indexed = 0)
+    """
+    if version.paragraphs_indexed is not None:
+        return 0
+    twin = indexed_twin(db, version)
+    if twin is not None:
+        logger.info(f"[INDEX] ข้าม version {version.id}: ไฟล์เดียวกับ version {twin} ที่ index แล้ว")
+        paragraphs = []
+
+    sigs = [minhash.signature(p.text) for p in paragraphs] if with_minhash else None
+    rows = [
+        {
+            "version_id": version.id,
+            "page_number": p.page_number,
+            "para_index": p.index,
+            "text": p.text,
+            "text_sha1": text_key(normalize_text(p.text)),
+            "minhash": minhash.to_bytes(sigs[i]) if sigs else None,
+        }
+        for i, p in enumerate(paragraphs)
+    ]
+
+    if rows:
+        # Core executemany แล้วอ่าน id กลับตามลำดับ (อยู่ใน write transaction เดียวกัน
+        # → id ของ version นี้เรียงตามลำดับที่ insert) เร็วกว่า RETURNING ที่ต้อง insert ทีละแถว
+        db.execute(insert(VersionParagraph.__table__), rows)
+        ids = db.scalars(
+            text("SELECT id FROM version_paragraphs WHERE version_id = :vid ORDER BY id"),
+            {"vid": version.id},
+        ).all()
+        if sigs:
+            db.execute(
+                insert(ParagraphBand.__table__),
+                [
+                    {"band_key": key, "paragraph_id": pid}
+                    for pid, sig in zip(ids, sigs)
+                    for key in minhash.band_keys(sig)
+                ],
+            )
+        if _has_fts(db):
+            db.execute(
+                text(
+                    f"INSERT INTO {FTS_TABLE}(rowid, text) "
+                    "SELECT id, text FROM version_paragraphs WHERE version_id = :vid"
+                ),
+                {"vid": version.id},
+            )
+
+    version.paragraphs_indexed = len(rows)
+    if commit:
+        db.commit()
+    else:
+        db.flush()
+    return len(rows)
+
+
+def indexed_twin(db: Session, version: DocumentVersion) -> Optional[int]:
+    """
+    id ของ version อื่นที่ไฟล์ hash เดียวกันถูก index แล้ว (None = ยังไม่มี / ไม่รู้ hash)
+    """
+    if not version.file_sha256:
+        return None
+    return db.scalars(
+        text(
+            "SELECT id FROM document_versions WHERE file_sha256 = :sha AND id != :vid "
+            "AND paragraphs_indexed > 0 ORDER BY id LIMIT 1"
+        ),
+        {"sha": version.file_sha256, "vid": version.id},
+    ).first()
+
+
+def index_comparison(
+    db: Session,
+    comparison_id: int,
+    paras_old: Sequence[Paragraph],
+    paras_new: Sequence[Paragraph],
+) -> int:
+    """
+    index ทั้งสอง version ของ comparison (version ที่เคย index แล้วถูกข้าม)
+    """
+    comp = db.get(Comparison, comparison_id)
+    added = index_version(db, comp.version_old, paras_old, commit=False)
+    if comp.version_new_id != comp.version_old_id:
+        added += index_version(db, comp.version_new, paras_new, commit=False)
+    db.commit()
+    return added
+
+
+def _hit(row, score: Optional[float] = None, snippet: Optional[str] = None) -> Dict[str, Any]:
+    m = row._mapping
+    uploaded_at = m["uploaded_at"]
+    return {
+        "document_id": m["document_id"],
+        "document_name": m["document_name"],
+        "version_id": m["version_id"],
+        "version_label": m["version_label"],
+        # SQL ดิบบน SQLite ได้ DATETIME เป็น string อยู่แล้ว
+        "uploaded_at": uploaded_at.isoformat() if hasattr(uploaded_at, "isoformat") else uploaded_at,
+        "page_number": m["page_number"],
+        "para_index": m["para_index"],
+        "paragraph_id": m["paragraph_id"],
+        "text": m["text"],
+        "snippet": snippet,
+        "score": score,
+    }
+
+
+def _fts_query(query: str) -> Optional[str]:
+    """
+    แต่ละคำ (คั่นด้วยช่องว่าง) เป็น phrase ใน "..." แล้ว AND กัน
+    trigram ต้องยาว ≥ 3 ตัวอักษร → คำที่สั้นกว่าใช้ไม่ได้ (คืน None ถ้าไม่เหลือคำไหนเลย)
+    """
+    terms = [t for t in query.split() if len(t) >= 3]
+    if not terms:
+        return None
+    return " AND ".join('"' + t.replace('"', '""') + '"' for t in terms)
+
+
+def search_text(
+    db: Session,
+    query: str,
+    limit: int = 20,
+    document_id: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    ค้นย่อหน้าที่มีคำ/วลีใน query ทุกคำ เรียงตาม bm25 (ดีสุดก่อน)
+    """
+    query = (query or "").strip()
+    if not query:
+        return []
+    doc_filter = "AND d.id = :doc" if document_id is not None else ""
+    params = {"limit": limit, "doc": document_id}
+
+    fts_query = _fts_query(query) if _has_fts(db) else None
+    if fts_query is not None:
+        rows = db.execute(
+            text(
+                f"SELECT {_HIT_COLUMNS}, bm25({FTS_TABLE}) AS rank, "
+                f"snippet({FTS_TABLE}, 0, '[', ']', '…', 24) AS snip "
+                f"FROM {FTS_TABLE} f JOIN version_paragraphs p ON p.id = f.rowid {_HIT_JOIN} "
+                f"WHERE {FTS_TABLE} MATCH :q {doc_filter} ORDER BY rank LIMIT :limit"
+            ),
+            {**params, "q": fts_query},
+        ).all()
+        return [_hit(r, score=-r._mapping["rank"], snippet=r._mapping["snip"]) for r in rows]
+
+    # ไม่มี FTS5 / คำสั้นเกินสำหรับ trigram → LIKE (สแกนทั้งตาราง)
+    rows = db.execute(
+        text(
+            f"SELECT {_HIT_COLUMNS} FROM version_paragraphs p {_HIT_JOIN} "
+            f"WHERE p.text LIKE :pattern ESCAPE '\\' {doc_filter} ORDER BY p.id LIMIT :limit"
+        ),
+        {
+            **params,
+            "pattern": "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%",
+        },
+    ).all()
+    return [_hit(r) for r in rows]
+
+
+def search_similar(
+    db: Session,
+    query: str,
+    limit: int = 20,
+    min_jaccard: float = 0.5,
+    document_id: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    ย่อหน้าที่ Jaccard (ของ shingle ตัวอักษร) โดยประมาณ >= min_jaccard เรียงจากคล้ายสุด
+    ตรงกันเป๊ะ (หลัง normalize) ได้ score 1.0 เสมอ แม้ไม่มี minhash
+    """
+    if not (query or "").strip():
+        return []
+    sig = minhash.signature(query)
+    keys = minhash.band_keys(sig)
+    doc_filter = "AND d.id = :doc" if document_id is not None else ""
+
+    # candidate ที่ชน band มากสุดก่อน (จำนวน band ที่ชน ~ Jaccard) แล้วค่อยวัด signature จริง
+    # จำกัดจำนวน → เวลาค้นไม่โตตามจำนวนย่อหน้าที่ชน band เดียวกัน (เช่นข้อความ boilerplate)
+    cap = max(limit * 10, MAX_CANDIDATES)
+    rows = db.execute(
+        text(
+            "SELECT p.id, p.minhash FROM ("
+            "  SELECT paragraph_id, COUNT(*) AS shared FROM paragraph_bands"
+            "  WHERE band_key IN (" + ",".join(str(k) for k in keys) + ")"
+            "  GROUP BY paragraph_id ORDER BY shared DESC, paragraph_id LIMIT :cap"
+            ") c JOIN version_paragraphs p ON p.id = c.paragraph_id"
+        ),
+        {"cap": cap},
+    ).all()
+
+    scores: Dict[int, float] = {}
+    if rows:
+        sigs = np.frombuffer(b"".join(raw for _, raw in rows), dtype="<u4").reshape(len(rows), -1)
+        estimates = (sigs == sig).mean(axis=1)
+        scores = {
+            pid: float(score) for (pid, _), score in zip(rows, estimates) if score >= min_jaccard
+        }
+    for (pid,) in db.execute(
+        text("SELECT id FROM version_paragraphs WHERE text_sha1 = :h"),
+        {"h": text_key(normalize_text(query))},
+    ):
+        scores[pid] = 1.0
+
+    if not scores:
+        return []
+    ranked = sorted(scores, key=lambda pid: (-scores[pid], pid))
+    rows = db.execute(
+        text(
+            f"SELECT {_HIT_COLUMNS} FROM version_paragraphs p {_HIT_JOIN} "
+            f"WHERE p.id IN ({','.join(str(pid) for pid in ranked)}) {doc_filter}"
+        ),
+        {"doc": document_id},
+    ).all()
+    hits = sorted((_hit(r, score=scores[r._mapping["paragraph_id"]]) for r in rows),
+                  key=lambda h: (-h["score"], h["paragraph_id"]))
+    return hits[:limit]
+
+
+def first_appearance(
+    db: Session,
+    query: str,
+    min_jaccard: float = 0.8,
+    candidates: int = 500,
+) -> List[Dict[str, Any]]:
+    """
+    ต่อเอกสาร: version แรก (เก่าสุดตามเวลาอัปโหลด) ที่มีย่อหน้าคล้าย query >= min_jaccard
+    คืน hit ของ version นั้น + จำนวน version ที่มีข้อความนี้ (versions_with_match)
+    """
+    hits = search_similar(db, query, limit=candidates, min_jaccard=min_jaccard)
+    by_doc: Dict[int, List[Dict[str, Any]]] = {}
+    for h in hits:
+        by_doc.setdefault(h["document_id"], []).append(h)
+
+    result = []
+    for doc_hits in by_doc.values():
+        first = min(doc_hits, key=lambda h: (h["uploaded_at"] or "", h["version_id"]))
+        first = dict(first, versions_with_match=len({h["version_id"] for h in doc_hits}))
+        result.append(first)
+    result.sort(key=lambda h: (h["uploaded_at"] or "", h["version_id"]))
+    return result
+
+
+def reindex_missing(db: Session, use_cache: bool = True) -> int:
+    """
+    index version เก่าที่บันทึกไว้ก่อนมีดัชนีนี้ (ดึงข้อความจากไฟล์ใหม่ ผ่าน extraction cache)
+    คืนจำนวน version ที่ index ได้
+    """
+    from pathlib import Path
+
+    from cache.extraction_cache import ExtractionCache
+    from ingestion.paragraph_splitter import ParagraphSplitter
+    from ingestion.pdf_loader_ocr import PDFLoaderWithOCR
+    from service.extraction import load_and_split
+
+    cache = ExtractionCache() if use_cache else None
+    loader = PDFLoaderWithOCR(cache=cache)
+    splitter = ParagraphSplitter()
+    done = 0
+    try:
+        pending = (
+            db.query(DocumentVersion)
+            .filter(DocumentVersion.paragraphs_indexed.is_(None))
+            .order_by(DocumentVersion.id)
+            .all()
+        )
+        for ver in pending:
+            if indexed_twin(db, ver) is not None:
+                # ไฟล์เดียวกันอยู่ในดัชนีแล้ว → ไม่ต้องดึงข้อความ/OCR ใหม่
+                index_version(db, ver, [])
+                done += 1
+                continue
+            if not Path(ver.file_path).exists():
+                logger.warning(f"[WARN] ข้าม version {ver.id}: ไม่พบไฟล์ {ver.file_path}")
+                continue
+            doc = load_and_split(loader, splitter, ver.file_path, cache, ver.file_sha256)
+            n = index_version(db, ver, doc.paragraphs)
+            logger.info(f"[INDEX] version {ver.id} ({ver.version_label}): {n} ย่อหน้า")
+            done += 1
+    finally:
+        if cache is not None:
+            cache.close()
+    return done
+
+
+if __name__ == "__main__":
+    import sys
+
+    from db.init_db import init_db
+    from db.session import SessionLocal
+    from utils.log import setup_logging
+
+    setup_logging()
+    init_db()
+    db = SessionLocal()
+    try:
+        if len(sys.argv) > 1 and sys.argv[1] == "--reindex":
+            print(f"✅ index เพิ่ม {reindex_missing(db)} version")
+        else:
+            print("วิธีใช้: PYTHONPATH=src python -m search.paragraph_index --reindex")
+    finally:
+        db.close()
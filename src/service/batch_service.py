@@ -0,0 +1,212 @@
+# src/service/batch_service.py
+
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from cache.extraction_cache import ExtractionCache
+from ingestion.pdf_loader_ocr import PDFLoaderWithOCR
+from ingestion.paragraph_splitter import ParagraphSplitter
+from report.report_builder import ReportBuilder
+
+from analysis.risk_engine import get_risk_engine
+from analysis.summary_engine import build_summary_text
+
+from db.session import SessionLocal
+from db.ops import (
+    get_or_create_document,
+    get_or_create_version,
+    create_comparison,
+    insert_changes,
+)
+from search.paragraph_index import index_version
+from service.compare_service import REPORT_PATH_KEYS, change_rows, diff_paragraphs, save_reports
+from service.extraction import ExtractedDocument, load_and_split
+from utils.hashing import sha256_file
+from utils.metrics import REGISTRY, Metrics
+
+logger = logging.getLogger(__name__)
+
+
+def chain_pairs(n: int, cumulative: bool = False) -> List[Tuple[int, int]]:
+    """
+    คู่ที่ต้องเทียบใน chain v1→v2→…→vN (+ v1→vN ถ้า cumulative และมีมากกว่า 2 เวอร์ชัน)
+    """
+    pairs = [(i, i + 1) for i in range(n - 1)]
+    if cumulative and n > 2:
+        pairs.append((0, n - 1))
+    return pairs
+
+
+def run_batch_compare(
+    doc_name: str,
+    paths: Sequence[str],
+    labels: Optional[Sequence[str]] = None,
+    cumulative: bool = False,
+    workers: int = 0,
+    ocr_workers: int = 1,
+    use_cache: bool = True,
+    match_mode: str = "indexed",
+    progress: Optional[Callable[[str, float], None]] = None,
+    ndjson: bool = False,
+) -> Dict[str, Any]:
+    """
+    เปรียบเทียบทั้ง chain ของเวอร์ชันเอกสาร (เรียงจากเก่า → ใหม่)
+
+    - ดึงข้อความแต่ละไฟล์ครั้งเดียว (เวอร์ชันกลาง chain ไม่ต้อง OCR ซ้ำ)
+    - เทียบคู่ที่ติดกันแบบขนาน (process pool) → บันทึก Comparison 1 แถวต่อคู่
+    - cumulative=True → เพิ่มคู่ v1→vN อีกหนึ่งคู่
+
+    workers: จำนวนไฟล์/คู่ที่ทำพร้อมกัน (0 = เท่าจำนวน CPU)
+    ndjson: สร้าง report NDJSON ของแต่ละคู่เพิ่มจาก JSON + HTML
+    """
+    if len(paths) < 2:
+        raise ValueError("ต้องมีอย่างน้อย 2 เวอร์ชัน")
+    labels = list(labels) if labels else [f"v{i + 1}" for i in range(len(paths))]
+    if len(labels) != len(paths):
+        raise ValueError("จำนวน label ต้องเท่ากับจำนวนไฟล์")
+    if len(set(labels)) != len(labels):
+        raise ValueError("label ของแต่ละเวอร์ชันต้องไม่ซ้ำกัน")
+    for path in paths:
+        if not Path(path).exists():
+            raise FileNotFoundError(f"ไม่พบไฟล์: {path}")
+
+    workers = workers if workers > 0 else (os.cpu_count() or 1)
+
+    def report_progress(stage: str, fraction: float) -> None:
+        if progress is not None:
+            progress(stage, fraction)
+
+    started = time.perf_counter()
+
+    metrics = Metrics()
+    cache = ExtractionCache() if use_cache else None
+    try:
+        loader = PDFLoaderWithOCR(workers=ocr_workers, cache=cache, metrics=metrics)
+        splitter = ParagraphSplitter()
+        reporter = ReportBuilder()
+
+        # 1) ดึงข้อความทุกไฟล์ (ไฟล์ละครั้ง)
+        report_progress("extract", 0.0)
+        logger.info(f"📥 โหลด + แยกย่อหน้า {len(paths)} ไฟล์ ...")
+        with metrics.stage("hash", count=len(paths)):
+            hashes = [sha256_file(str(path)) for path in paths]
+        docs: List[ExtractedDocument] = [None] * len(paths)
+        with metrics.stage("extract", count=len(paths)), ThreadPoolExecutor(
+            max_workers=min(workers, len(paths))
+        ) as pool:
+            futures = {
+                pool.submit(
+                    load_and_split, loader, splitter, str(path), cache, hashes[i], metrics
+                ): i
+                for i, path in enumerate(paths)
+            }
+            for done, future in enumerate(futures, start=1):
+                i = futures[future]
+                docs[i] = future.result()
+                logger.info(
+                    f"- {labels[i]}: pages={len(docs[i].pages)}, ocr={docs[i].ocr_pages}, "
+                    f"paragraphs={len(docs[i].paragraphs)}"
+                )
+                report_progress("extract", 0.5 * done / len(paths))
+
+        # 2) เทียบแต่ละคู่ (CPU หนัก → process pool เมื่อมีหลาย worker)
+        pairs = chain_pairs(len(paths), cumulative)
+        logger.info(f"🔗 เปรียบเทียบ {len(pairs)} คู่ ...")
+        args = [
+            (docs[a].paragraphs, docs[b].paragraphs, match_mode) for a, b in pairs
+        ]
+        # เวลาต่อคู่อยู่ใน process ลูก → วัดรวมทั้งขั้นเป็น "compare_pairs"
+        with metrics.stage("compare_pairs", count=len(pairs)):
+            if workers > 1 and len(pairs) > 1:
+                with ProcessPoolExecutor(max_workers=min(workers, len(pairs))) as pool:
+                    all_changes = list(pool.map(diff_paragraphs, *zip(*args)))
+            else:
+                all_changes = [diff_paragraphs(*a) for a in args]
+        report_progress("save", 0.85)
+
+        # 3) บันทึกลงฐานข้อมูล + report ต่อคู่
+        comparisons: List[Dict[str, Any]] = []
+        db = SessionLocal()
+        try:
+            # ทั้ง chain เป็น transaction เดียว (flush เพื่อเอา id, commit ครั้งเดียวตอนจบ)
+            doc = get_or_create_document(db, doc_name, category=None, commit=False)
+            versions = [
+                get_or_create_version(db, doc, label, str(path), sha, commit=False)
+                for label, path, sha in zip(labels, paths, hashes)
+            ]
+            # ดัชนีค้นหาข้ามเอกสาร (version ที่เคย index แล้วถูกข้าม)
+            with metrics.stage("index", count=sum(len(d.paragraphs) for d in docs)):
+                for ver, d in zip(versions, docs):
+                    index_version(db, ver, d.paragraphs, commit=False)
+
+            for (a, b), changes in zip(pairs, all_changes):
+                summary_text = build_summary_text(changes)
+                overall_risk_level = get_risk_engine().annotate(changes)
+
+                with metrics.stage("persist", count=len(changes)):
+                    comp = create_comparison(
+                        db, doc, versions[a], versions[b], overall_risk_level, summary_text,
+                        commit=False,
+                    )
+                    insert_changes(db, comp.id, change_rows(changes))
+
+                with metrics.stage("report", count=3 if ndjson else 2):
+                    report_paths = save_reports(
+                        reporter, doc_name, labels[a], labels[b],
+                        changes, summary_text, overall_risk_level, tag=f"run{comp.id}", ndjson=ndjson,
+                    )
+                logger.info(f"- {labels[a]} → {labels[b]}: {len(changes)} รายการ, risk={overall_risk_level}")
+
+                comparisons.append(
+                    {
+                        "v1_label": labels[a],
+                        "v2_label": labels[b],
+                        "cumulative": (a, b) == (0, len(paths) - 1) and len(paths) > 2,
+                        "changes_count": len(changes),
+                        "risk_level": overall_risk_level,
+                        "summary_text": summary_text,
+                        **{REPORT_PATH_KEYS[fmt]: str(path) for fmt, path in report_paths.items()},
+                        "run_id": comp.id,
+                    }
+                )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        elapsed = time.perf_counter() - started
+        files_per_hour = len(paths) / elapsed * 3600 if elapsed > 0 else 0.0
+
+        logger.info("✅ เสร็จสิ้น")
+        logger.info(f"⏱️ {len(paths)} ไฟล์ ใน {elapsed:.1f} วินาที (~{files_per_hour:,.0f} ไฟล์/ชั่วโมง)")
+        cache_stats = cache.stats() if cache is not None else None
+    finally:
+        if cache is not None:
+            cache.close()
+
+    REGISTRY.record_run(metrics, kind="batch_compare")
+
+    return {
+        "doc_name": doc_name,
+        "versions": [
+            {
+                "label": label,
+                "pages": len(d.pages),
+                "ocr_pages": d.ocr_pages,
+                "paragraphs": len(d.paragraphs),
+            }
+            for label, d in zip(labels, docs)
+        ],
+        "comparisons": comparisons,
+        "files": len(paths),
+        "elapsed_sec": round(elapsed, 3),
+        "files_per_hour": round(files_per_hour, 1),
+        "cache_stats": cache_stats,
+        "metrics": metrics.to_dict(),
+    }
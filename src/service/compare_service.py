@@ -1,115 +1,281 @@
 # src/service/compare_service.py
 
+import json
+import logging
+import os
+from dataclasses import asdict
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Callable, Dict, Any, List, Optional, Tuple
 
+from cache.extraction_cache import ExtractionCache
 from ingestion.pdf_loader_ocr import PDFLoaderWithOCR
-from ingestion.paragraph_splitter import ParagraphSplitter
-from matching.paragraph_matcher import ParagraphMatcher
-from diff.diff_engine import DiffEngine
+from ingestion.paragraph_splitter import Paragraph, ParagraphSplitter
+from matching.paragraph_matcher import ParagraphMatch, ParagraphMatcher
+from diff.diff_engine import Change, DiffEngine
 from report.report_builder import ReportBuilder
 
-from analysis.summary_engine import build_summary_text, estimate_risk_level
+from analysis.risk_engine import get_risk_engine
+from analysis.summary_engine import build_summary_text
 
 from db.session import SessionLocal
 from db.ops import (
-    get_or_create_document,
-    create_document_version,
-    create_comparison,
-    bulk_insert_changes,
+    find_comparison_result,
+    get_comparison,
+    save_comparison,
+    save_match_state,
+    set_comparison_result,
 )
+from search.paragraph_index import index_comparison
+from service.extraction import extract_pair
+from service.incremental import (
+    IncrementalStats,
+    find_base_comparison,
+    incremental_match,
+    match_map,
+    page_fingerprints,
+)
+from utils.hashing import settings_hash, sha256_file
+from utils.metrics import REGISTRY, Metrics
 
+logger = logging.getLogger(__name__)
 
-def run_compare(
-    doc_name: str,
-    v1_path: str,
-    v2_path: str,
-    v1_label: str = "v1",
-    v2_label: str = "v2",
+MATCH_THRESHOLD = 0.6
+# จับคู่ย่อหน้าที่เขียนใหม่ด้วยเวกเตอร์ (embedding.semantic) เพิ่มจาก string similarity
+SEMANTIC_MATCH = os.getenv("SEMANTIC_MATCH", "0") == "1"
+SEMANTIC_THRESHOLD = float(os.getenv("SEMANTIC_THRESHOLD", "0.75"))
+# จำนวนตัวอักษรของ result key ที่ต่อท้ายชื่อไฟล์ report
+REPORT_TAG_LEN = 16
+# ชนิด report → key ของ path ในผลลัพธ์ (ndjson สร้างเมื่อขอเท่านั้น)
+REPORT_PATH_KEYS = {"json": "json_report_path", "html": "html_report_path", "ndjson": "ndjson_report_path"}
+
+
+def make_matcher(match_mode: str = "indexed") -> ParagraphMatcher:
+    return ParagraphMatcher(
+        threshold=MATCH_THRESHOLD,
+        mode=match_mode,
+        semantic=SEMANTIC_MATCH,
+        semantic_threshold=SEMANTIC_THRESHOLD,
+    )
+
+
+def comparison_settings(
+    loader: PDFLoaderWithOCR,
+    splitter: ParagraphSplitter,
+    match_mode: str = "indexed",
 ) -> Dict[str, Any]:
     """
-    ฟังก์ชัน core สำหรับเปรียบเทียบเอกสาร 2 เวอร์ชัน
-    ใช้ได้ทั้งจาก:
-      - main.py (รันผ่าน CLI)
-      - API / งานอื่น ๆ ที่อยาก reuse logic เดิม
+    ค่าตั้งค่าที่มีผลต่อการจับคู่/รายการ change (ไม่รวมไฟล์ และ risk ที่คิดใหม่ทุกครั้ง)
+    """
+    return {
+        "loader": loader.settings(),
+        "splitter": splitter.settings(),
+        "matcher": make_matcher(match_mode).settings(),
+        "diff": DiffEngine().settings(),
+    }
 
-    คืนค่าเป็น dict ที่สรุปผลการเปรียบเทียบ + path ของ report
+
+def comparison_key(
+    doc_name: str,
+    v1_label: str,
+    v2_label: str,
+    sha_v1: str,
+    sha_v2: str,
+    loader: PDFLoaderWithOCR,
+    splitter: ParagraphSplitter,
+    match_mode: str = "indexed",
+    incremental: bool = False,
+) -> str:
+    """
+    key ของผลเปรียบเทียบ: เนื้อหาไฟล์ทั้งสอง + ชื่อเอกสาร/label (ชื่อไฟล์ report)
+    + ค่าตั้งค่าทุกขั้นที่มีผลต่อผลลัพธ์
+    (ผลแบบ incremental อาจต่างจากแบบเต็มเล็กน้อย → แยก key กัน)
     """
+    key = {
+        "doc_name": doc_name,
+        "labels": [v1_label, v2_label],
+        "files": [sha_v1, sha_v2],
+        **comparison_settings(loader, splitter, match_mode),
+        "risk": get_risk_engine().settings(),
+    }
+    if incremental:
+        key["incremental"] = True
+    return settings_hash(key)
 
-    # ✅ เช็คไฟล์ก่อน
-    if not Path(v1_path).exists():
-        raise FileNotFoundError(f"ไม่พบไฟล์: {v1_path}")
-    if not Path(v2_path).exists():
-        raise FileNotFoundError(f"ไม่พบไฟล์: {v2_path}")
 
-    # ✅ เตรียม component หลัก
-    loader = PDFLoaderWithOCR()
-    splitter = ParagraphSplitter()
-    matcher = ParagraphMatcher(threshold=0.6)
-    diff_engine = DiffEngine()
-    reporter = ReportBuilder()
+def lookup_result(result_key: str, ndjson: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    ผลที่เคยคำนวณไว้ด้วย key นี้ (พร้อม report เดิม) หรือ None
+    ndjson=True → ต้องมี report NDJSON ด้วย (ผลเดิมที่ไม่ได้สร้างไว้ → เปรียบเทียบใหม่)
+
+    ชื่อไฟล์ report มี result key ต่อท้าย → การเปรียบเทียบอื่นที่ใช้ชื่อเอกสาร/label เดียวกัน
+    เขียนทับ report ของผลนี้ไม่ได้ (ไฟล์ที่ชื่อไม่ตรง key = report ของผลอื่น → ไม่ใช้)
+    """
+    db = SessionLocal()
+    try:
+        comp = find_comparison_result(db, result_key)
+        if comp is None:
+            return None
+        run_id = comp.id
+        result = json.loads(comp.result_json)
+    finally:
+        db.close()
+
+    if ndjson and not result.get("ndjson_report_path"):
+        return None
+    # report ถูกลบไปแล้ว / ไม่ใช่ไฟล์ของ key นี้ (ผลจากก่อนมี tag) → ต้องเปรียบเทียบใหม่
+    for key in REPORT_PATH_KEYS.values():
+        if key not in result:
+            continue
+        path = Path(result[key])
+        if not path.exists() or not path.stem.endswith(result_key[:REPORT_TAG_LEN]):
+            return None
+
+    result.update(run_id=run_id, from_cache=True, cache_stats=None)
+    return result
+
+
+def find_memoized(
+    doc_name: str,
+    v1_label: str,
+    v2_label: str,
+    sha_v1: str,
+    sha_v2: str,
+    match_mode: str = "indexed",
+    incremental: bool = False,
+    ndjson: bool = False,
+) -> Optional[Dict[str, Any]]:
+    """
+    เช็คผลเดิมด้วยค่าตั้งค่าเริ่มต้นของ run_compare (ใช้จาก API ก่อนส่งงานเข้าคิว)
+    """
+    key = comparison_key(
+        doc_name, v1_label, v2_label, sha_v1, sha_v2,
+        PDFLoaderWithOCR(), ParagraphSplitter(), match_mode, incremental=incremental,
+    )
+    return lookup_result(key, ndjson=ndjson)
 
-    # 1) โหลด + แยกย่อหน้า
-    print("📥 โหลด + แยกย่อหน้า ...")
-    pages_v1 = loader.load(v1_path)
-    paras_v1 = splitter.split(pages_v1)
 
-    pages_v2 = loader.load(v2_path)
-    paras_v2 = splitter.split(pages_v2)
+def diff_paragraphs(
+    paras_old: List[Paragraph],
+    paras_new: List[Paragraph],
+    match_mode: str = "indexed",
+    anchored_prefix: int = 0,
+    metrics: Optional[Metrics] = None,
+) -> List[Change]:
+    """
+    จับคู่ย่อหน้า + สร้างรายการการเปลี่ยนแปลงของเอกสารคู่หนึ่ง
+    (ฟังก์ชันระดับ module เพื่อส่งไปรันใน process pool ได้)
+    """
+    metrics = metrics if metrics is not None else Metrics()
+    matches = match_paragraphs(paras_old, paras_new, match_mode, anchored_prefix, metrics)
+    return build_changes(matches, metrics)
 
-    print(f"- {v1_label}: pages={len(pages_v1)}, paragraphs={len(paras_v1)}")
-    print(f"- {v2_label}: pages={len(pages_v2)}, paragraphs={len(paras_v2)}")
 
-    # 2) จับคู่ย่อหน้า
-    print("🔗 จับคู่ย่อหน้า ...")
-    matches = matcher.match(paras_v1, paras_v2)
+def match_paragraphs(
+    paras_old: List[Paragraph],
+    paras_new: List[Paragraph],
+    match_mode: str = "indexed",
+    anchored_prefix: int = 0,
+    metrics: Optional[Metrics] = None,
+) -> List[ParagraphMatch]:
+    metrics = metrics if metrics is not None else Metrics()
+    matcher = make_matcher(match_mode)
+    with metrics.stage("match", count=len(paras_old) + len(paras_new)):
+        matches = matcher.match(paras_old, paras_new, anchored_prefix=anchored_prefix)
+    metrics.incr("match_comparisons", matcher.full_comparisons)
+    return matches
 
-    # 3) สร้างรายการการเปลี่ยนแปลง
-    print("🧮 สร้างรายการการเปลี่ยนแปลง ...")
-    changes = diff_engine.build_changes(matches)
-    print(f"- พบการเปลี่ยนแปลงทั้งหมด: {len(changes)} รายการ")
 
-    # 4) สรุป + ประเมินความเสี่ยง
-    summary_text = build_summary_text(changes)
-    overall_risk_level = estimate_risk_level(changes)
+def build_changes(matches: List[ParagraphMatch], metrics: Optional[Metrics] = None) -> List[Change]:
+    metrics = metrics if metrics is not None else Metrics()
+    with metrics.stage("diff", count=len(matches)):
+        return DiffEngine().build_changes(matches)
 
-    print("📊 Risk Level:", overall_risk_level)
 
-    # 5) บันทึกลงฐานข้อมูล
+def match_incremental(
+    settings_key: str,
+    sha_v1: str,
+    sha_v2: str,
+    paras_v1: List[Paragraph],
+    paras_v2: List[Paragraph],
+    fp_v1: List[list],
+    fp_v2: List[list],
+    match_mode: str = "indexed",
+    base_run_id: Optional[int] = None,
+    metrics: Optional[Metrics] = None,
+) -> Tuple[Optional[List[ParagraphMatch]], Optional[IncrementalStats]]:
+    """
+    จับคู่ต่อจาก comparison เดิม — คืน (None, None) ถ้าไม่มีฐานที่ใช้ได้ (caller เทียบเต็มเอง)
+    """
+    metrics = metrics if metrics is not None else Metrics()
     db = SessionLocal()
     try:
-        # document หลัก
-        doc = get_or_create_document(db, doc_name, category=None)
-
-        # version แต่ละไฟล์
-        ver1 = create_document_version(db, doc, v1_label, v1_path)
-        ver2 = create_document_version(db, doc, v2_label, v2_path)
-
-        # comparison run
-        comp = create_comparison(db, doc, ver1, ver2, overall_risk_level, summary_text)
-
-        # map Change objects → dicts สำหรับ bulk insert
-        change_dicts: List[dict] = []
-        for c in changes:
-            change_dicts.append(
-                {
-                    "change_type": c.change_type,
-                    "section_label": c.section_label,
-                    "old_text": c.old_text,
-                    "new_text": c.new_text,
-                    "risk_level": None,
-                    "ai_comment": None,
-                }
+        with metrics.stage("find_base"):
+            found = find_base_comparison(
+                db, settings_key, sha_v1, sha_v2, fp_v1, fp_v2, base_run_id
             )
+        if found is None:
+            logger.info("ℹ️ ไม่พบ comparison เดิมที่ใช้ต่อได้ → เทียบเต็ม")
+            return None, None
+        base, shared_side, fp_base_other = found
 
-        bulk_insert_changes(db, comp, change_dicts)
-        db.commit()
-        run_id = comp.id
+        matcher = make_matcher(match_mode)
+        with metrics.stage("match", count=len(paras_v1) + len(paras_v2)):
+            try:
+                matches, stats = incremental_match(
+                    matcher, base, shared_side, fp_base_other, paras_v1, paras_v2, fp_v1, fp_v2
+                )
+            except ValueError as e:
+                logger.warning(f"[WARN] ใช้ comparison {base.id} ต่อไม่ได้ ({e}) → เทียบเต็ม")
+                return None, None
     finally:
         db.close()
 
-    # 6) สร้าง report (JSON + HTML)
-    print("📝 สร้างรายงาน ...")
+    metrics.incr("match_comparisons", matcher.full_comparisons)
+    metrics.incr("incremental_reused_pairs", stats.reused_pairs)
+    logger.info(
+        f"♻️ ต่อจาก run_id={stats.base_run_id} (ฝั่ง {stats.shared_side} ตรงกัน): "
+        f"หน้าเปลี่ยน={stats.changed_pages}, ใช้คู่เดิม={stats.reused_pairs}, "
+        f"จับคู่ใหม่ {stats.pool_old}×{stats.pool_new} ย่อหน้า"
+    )
+    return matches, stats
+
+
+def change_rows(changes: List[Change]) -> List[dict]:
+    """
+    map Change objects → dicts สำหรับ bulk insert
+    """
+    return [
+        {
+            "change_type": c.change_type,
+            "section_label": c.section_label,
+            "old_text": c.old_text,
+            "new_text": c.new_text,
+            "word_ops": json.dumps(c.word_ops) if c.word_ops else None,
+            "risk_level": c.risk_level,
+            "risk_keywords": json.dumps(c.risk_keywords, ensure_ascii=False) if c.risk_keywords else None,
+            "ai_comment": None,
+            "old_bbox": json.dumps(c.old_bbox) if c.old_bbox else None,
+            "new_bbox": json.dumps(c.new_bbox) if c.new_bbox else None,
+        }
+        for c in changes
+    ]
+
+
+def save_reports(
+    reporter: ReportBuilder,
+    doc_name: str,
+    v1_label: str,
+    v2_label: str,
+    changes: List[Change],
+    summary_text: str,
+    overall_risk_level: str,
+    tag: Optional[str] = None,
+    ndjson: bool = False,
+) -> Dict[str, Path]:
+    """
+    สร้าง report (JSON + HTML และ NDJSON ถ้า ndjson=True) คืน {"json": path, "html": path, ...}
+    tag → ต่อท้ายชื่อไฟล์ (ดู ReportBuilder._stem) ให้แต่ละผลลัพธ์มีไฟล์ของตัวเอง
+    """
     json_path = reporter.save_json(
         doc_name=doc_name,
         v1_label=v1_label,
@@ -117,6 +283,7 @@ def run_compare(
         changes=changes,
         summary_text=summary_text,
         overall_risk_level=overall_risk_level,
+        tag=tag,
     )
     html_path = reporter.save_html(
         doc_name=doc_name,
@@ -125,26 +292,220 @@ def run_compare(
         changes=changes,
         summary_text=summary_text,
         overall_risk_level=overall_risk_level,
+        tag=tag,
     )
+    paths = {"json": json_path, "html": html_path}
+    if ndjson:
+        paths["ndjson"] = reporter.save_ndjson(doc_name, v1_label, v2_label, changes, tag=tag)
+    return paths
+
+
+def run_compare(
+    doc_name: str,
+    v1_path: str,
+    v2_path: str,
+    v1_label: str = "v1",
+    v2_label: str = "v2",
+    ocr_workers: int = 1,
+    use_cache: bool = True,
+    match_mode: str = "indexed",
+    progress: Optional[Callable[[str, float], None]] = None,
+    force: bool = False,
+    incremental: bool = False,
+    base_run_id: Optional[int] = None,
+    ndjson: bool = False,
+) -> Dict[str, Any]:
+    """
+    ฟังก์ชัน core สำหรับเปรียบเทียบเอกสาร 2 เวอร์ชัน
+    ใช้ได้ทั้งจาก:
+      - main.py (รันผ่าน CLI)
+      - API / งานอื่น ๆ ที่อยาก reuse logic เดิม
+
+    คืนค่าเป็น dict ที่สรุปผลการเปรียบเทียบ + path ของ report
+
+    ocr_workers: จำนวน process ที่ใช้ OCR พร้อมกัน (1 = ทีละหน้า, 0 = เท่าจำนวน CPU)
+    use_cache: ใช้ cache ผลการดึงข้อความ (data/cache/extraction.db) หรือไม่
+    match_mode: โหมดของ ParagraphMatcher ("indexed" / "align" / "bruteforce")
+    progress: callback(stage, fraction) แจ้งความคืบหน้าแต่ละขั้น (เช่นจาก job queue)
+    force: เปรียบเทียบใหม่เสมอ แม้เคยเปรียบเทียบไฟล์คู่นี้ด้วยค่าตั้งค่าเดียวกันแล้ว
+    incremental: ต่อจาก comparison เดิมที่มีไฟล์ฝั่งหนึ่งตรงกัน → จับคู่ใหม่เฉพาะหน้าที่เปลี่ยน
+                 (ดู service.incremental) ไม่เจอฐานที่ใช้ได้ → เทียบเต็มตามปกติ
+    base_run_id: ระบุ comparison ฐานเอง (ใช้แบบ incremental เสมอ)
+    ndjson: สร้าง report NDJSON (หนึ่ง change ต่อบรรทัด) เพิ่มจาก JSON + HTML
+    """
 
-    print("✅ เสร็จสิ้น")
-    print(f"- JSON report: {json_path}")
-    print(f"- HTML report: {html_path}")
-    print("เปิด HTML ใน browser เพื่อดูผลได้เลย")
+    def report_progress(stage: str, fraction: float) -> None:
+        if progress is not None:
+            progress(stage, fraction)
+
+    # ✅ เช็คไฟล์ก่อน
+    if not Path(v1_path).exists():
+        raise FileNotFoundError(f"ไม่พบไฟล์: {v1_path}")
+    if not Path(v2_path).exists():
+        raise FileNotFoundError(f"ไม่พบไฟล์: {v2_path}")
+
+    # ✅ เตรียม component หลัก
+    metrics = Metrics()
+    loader = PDFLoaderWithOCR(workers=ocr_workers, metrics=metrics)
+    splitter = ParagraphSplitter()
+    reporter = ReportBuilder()
+
+    # 0) เคยเปรียบเทียบคู่นี้ด้วยค่าตั้งค่าเดียวกันแล้ว → คืนผลเดิม
+    with metrics.stage("hash", count=2):
+        sha_v1, sha_v2 = sha256_file(v1_path), sha256_file(v2_path)
+        incremental = incremental or base_run_id is not None
+        result_key = comparison_key(
+            doc_name, v1_label, v2_label, sha_v1, sha_v2, loader, splitter, match_mode,
+            incremental=incremental,
+        )
+        settings_key = settings_hash(comparison_settings(loader, splitter, match_mode))
+    if not force:
+        with metrics.stage("memo_lookup"):
+            memo = lookup_result(result_key, ndjson=ndjson)
+        if memo is not None:
+            REGISTRY.inc("runs_total", help_text="จำนวนครั้งที่เรียก run_compare", from_cache="true")
+            memo["metrics"] = metrics.to_dict()
+            took = sum(s["wall_sec"] for s in memo["metrics"]["stages"].values())
+            logger.info(f"♻️ ใช้ผลเดิม (run_id={memo['run_id']}) ใน {took * 1000:.1f} ms")
+            return memo
+
+    cache = ExtractionCache() if use_cache else None
+    loader.cache = cache
+
+    # cache เปิด connection SQLite ไว้ → ปิดเสมอแม้ขั้นใดขั้นหนึ่ง error
+    try:
+        report_progress("extract", 0.0)
+        # 1) โหลด + แยกย่อหน้า (สองเวอร์ชันพร้อมกัน ทีละหน้าแบบ stream)
+        logger.info("📥 โหลด + แยกย่อหน้า ...")
+        with metrics.stage("extract", count=2):
+            doc_v1, doc_v2, common_prefix = extract_pair(
+                loader, splitter, v1_path, v2_path, cache, hashes=(sha_v1, sha_v2), metrics=metrics
+            )
+        pages_v1, paras_v1 = doc_v1.pages, doc_v1.paragraphs
+        pages_v2, paras_v2 = doc_v2.pages, doc_v2.paragraphs
+
+        ocr_pages_v1 = doc_v1.ocr_pages
+        ocr_pages_v2 = doc_v2.ocr_pages
+        metrics.incr("pages", len(pages_v1) + len(pages_v2))
+        metrics.incr("ocr_pages", ocr_pages_v1 + ocr_pages_v2)
+        metrics.incr("paragraphs", len(paras_v1) + len(paras_v2))
+
+        logger.info(f"- {v1_label}: pages={len(pages_v1)}, ocr={ocr_pages_v1}, paragraphs={len(paras_v1)}")
+        logger.info(f"- {v2_label}: pages={len(pages_v2)}, ocr={ocr_pages_v2}, paragraphs={len(paras_v2)}")
+
+        report_progress("match", 0.6)
+        # 2) จับคู่ย่อหน้า (incremental → ต่อจาก comparison เดิม จับคู่ใหม่เฉพาะหน้าที่เปลี่ยน)
+        logger.info("🔗 จับคู่ย่อหน้า + สร้างรายการการเปลี่ยนแปลง ...")
+        fp_v1, fp_v2 = page_fingerprints(doc_v1), page_fingerprints(doc_v2)
+        matches = None
+        incremental_stats = None
+        if incremental:
+            matches, incremental_stats = match_incremental(
+                settings_key, sha_v1, sha_v2, paras_v1, paras_v2, fp_v1, fp_v2,
+                match_mode, base_run_id, metrics,
+            )
+        if matches is None:
+            matches = match_paragraphs(
+                paras_v1, paras_v2, match_mode, anchored_prefix=common_prefix, metrics=metrics
+            )
+        changes = build_changes(matches, metrics)
+        logger.info(f"- พบการเปลี่ยนแปลงทั้งหมด: {len(changes)} รายการ")
+
+        # 3) สรุป + ประเมินความเสี่ยง
+        with metrics.stage("summary"):
+            summary_text = build_summary_text(changes)
+            # ระดับความเสี่ยงรวม + ของแต่ละ change (บันทึกลง changes.risk_level)
+            overall_risk_level = get_risk_engine().annotate(changes)
+
+        logger.info(f"📊 Risk Level: {overall_risk_level}")
+
+        report_progress("save", 0.85)
+        # 4) บันทึกลงฐานข้อมูล
+        # (document + 2 versions + comparison + changes ใน transaction เดียว)
+        db = SessionLocal()
+        try:
+            with metrics.stage("persist", count=len(changes)):
+                run_id = save_comparison(
+                    db,
+                    doc_name,
+                    v1_label,
+                    v1_path,
+                    v2_label,
+                    v2_path,
+                    overall_risk_level,
+                    summary_text,
+                    change_rows(changes),
+                    old_sha256=sha_v1,
+                    new_sha256=sha_v2,
+                )
+            # ผลจับคู่ทั้งหมด + fingerprint ต่อหน้า → ให้รอบถัดไปเทียบแบบ incremental ต่อได้
+            with metrics.stage("match_state", count=len(matches)):
+                comp = get_comparison(db, run_id)
+                save_match_state(
+                    db, run_id, settings_key, match_map(matches, paras_v1, paras_v2),
+                    {comp.version_old_id: fp_v1, comp.version_new_id: fp_v2},
+                )
+            # ดัชนีค้นหาข้ามเอกสาร (เฉพาะ version ที่ยังไม่เคย index)
+            with metrics.stage("index", count=len(paras_v1) + len(paras_v2)):
+                try:
+                    index_comparison(db, run_id, paras_v1, paras_v2)
+                except Exception as e:
+                    db.rollback()
+                    logger.warning(f"[WARN] index ย่อหน้าเพื่อค้นหาไม่สำเร็จ: {e}")
+        finally:
+            db.close()
+
+        report_progress("report", 0.95)
+        # 5) สร้าง report (JSON + HTML [+ NDJSON])
+        logger.info("📝 สร้างรายงาน ...")
+        with metrics.stage("report", count=3 if ndjson else 2):
+            report_paths = save_reports(
+                reporter, doc_name, v1_label, v2_label, changes, summary_text, overall_risk_level,
+                tag=result_key[:REPORT_TAG_LEN], ndjson=ndjson,
+            )
+
+        logger.info("✅ เสร็จสิ้น")
+        for fmt, path in report_paths.items():
+            logger.info(f"- {fmt.upper()} report: {path}")
+        logger.info("เปิด HTML ใน browser เพื่อดูผลได้เลย")
+        cache_stats = cache.stats() if cache is not None else None
+    finally:
+        if cache is not None:
+            cache.close()
 
     # คืนข้อมูลสรุปให้ caller ใช้ต่อได้
-    return {
+    result = {
         "doc_name": doc_name,
         "v1_label": v1_label,
         "v2_label": v2_label,
         "pages_v1": len(pages_v1),
         "pages_v2": len(pages_v2),
+        "ocr_pages_v1": ocr_pages_v1,
+        "ocr_pages_v2": ocr_pages_v2,
         "paragraphs_v1": len(paras_v1),
         "paragraphs_v2": len(paras_v2),
         "changes_count": len(changes),
         "risk_level": overall_risk_level,
         "summary_text": summary_text,
-        "json_report_path": str(json_path),
-        "html_report_path": str(html_path),
+        **{REPORT_PATH_KEYS[fmt]: str(path) for fmt, path in report_paths.items()},
+        "incremental": asdict(incremental_stats) if incremental_stats else None,
+    }
+
+    # เก็บผลไว้ตอบซ้ำ (บันทึกหลัง report เสร็จ → hit ได้เฉพาะ run ที่สมบูรณ์)
+    run_metrics = metrics.to_dict()
+    db = SessionLocal()
+    try:
+        set_comparison_result(db, run_id, result_key, result, metrics=run_metrics)
+    finally:
+        db.close()
+
+    REGISTRY.inc("runs_total", help_text="จำนวนครั้งที่เรียก run_compare", from_cache="false")
+    REGISTRY.record_run(metrics)
+
+    return {
+        **result,
         "run_id": run_id,
+        "cache_stats": cache_stats,
+        "from_cache": False,
+        "metrics": run_metrics,
     }
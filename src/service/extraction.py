@@ -0,0 +1,204 @@
+# src/service/extraction.py
+
+import os
+import queue
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from cache.extraction_cache import ExtractionCache
+from ingestion.pdf_loader_ocr import PDFLoaderWithOCR
+from ingestion.paragraph_splitter import Paragraph, ParagraphSplitter
+from utils.hashing import settings_hash, sha256_file
+from utils.metrics import Metrics
+
+# จำนวนย่อหน้าที่ thread ดึงข้อความแต่ละฝั่งค้างไว้ได้ก่อนต้องรอ thread หลัก
+# (ฝั่งที่เร็วกว่าไม่วิ่งนำไปไกลจนย่อหน้าค้างในคิวเต็มหน่วยความจำ)
+EXTRACT_QUEUE_SIZE = int(os.getenv("EXTRACT_QUEUE_SIZE", "256"))
+
+@dataclass
+class ExtractedDocument:
+    pages: List[Dict] = field(default_factory=list)        # metadata ต่อหน้า (ไม่มีข้อความ)
+    paragraphs: List[Paragraph] = field(default_factory=list)
+
+    @property
+    def ocr_pages(self) -> int:
+        return sum(p.get("source") == "ocr" for p in self.pages)
+
+
+def stream_paragraphs(
+    loader: PDFLoaderWithOCR,
+    splitter: ParagraphSplitter,
+    path: str,
+    page_info: List[Dict],
+    cache: Optional[ExtractionCache] = None,
+    file_sha256: Optional[str] = None,
+    metrics: Optional[Metrics] = None,
+) -> Iterator[Paragraph]:
+    """
+    yield ย่อหน้าทันทีที่หน้าต้นทางโหลด/OCR เสร็จ (loader → splitter แบบ generator)
+    metadata ของแต่ละหน้า (ไม่รวมข้อความ) ถูกเติมลง page_info ระหว่างทาง
+
+    ถ้ามี cache และไฟล์ + ค่าตั้งค่าเดิม → ใช้ย่อหน้าที่แยกไว้แล้วโดยไม่ต้องโหลดหน้าเลย
+    (file_sha256: ส่งมาถ้ารู้ hash แล้ว จะได้ไม่ต้องอ่านไฟล์ซ้ำ)
+
+    metrics: บันทึก "load" (เวลาที่รอ loader ทั้งหมด) และ "split" (เวลาที่ splitter ใช้เอง)
+    """
+    key: Optional[str] = None
+    if cache is not None:
+        key = settings_hash(
+            {
+                "file": file_sha256 or sha256_file(path),
+                "loader": loader.settings(),
+                "splitter": splitter.settings(),
+            }
+        )
+        cached = cache.get("paras", key)
+        if cached is not None:
+            if metrics is not None:
+                metrics.incr("docs_from_paragraph_cache")
+            page_info.extend(cached["pages"])
+            for d in cached["paragraphs"]:
+                yield Paragraph(**d)
+            return
+
+    # loader กับ splitter ทำงานสลับกันใน generator เดียว → จับเวลารวมของการดึงย่อหน้าแต่ละตัว
+    # แล้วหักเวลาที่อยู่ใน loader ออก ที่เหลือคือเวลาของ splitter
+    load_wall = load_cpu = 0.0
+
+    def pages_with_info():
+        nonlocal load_wall, load_cpu
+        pages = loader.iter_load(path)
+        while True:
+            wall0, cpu0 = time.perf_counter(), time.thread_time()
+            page = next(pages, None)
+            load_wall += time.perf_counter() - wall0
+            load_cpu += time.thread_time() - cpu0
+            if page is None:
+                return
+            page_info.append({k: v for k, v in page.items() if k not in ("text", "lines")})
+            yield page
+
+    collected: List[Dict] = []
+    n_paras = 0
+    total_wall = total_cpu = 0.0
+    paras = splitter.iter_split(pages_with_info())
+    while True:
+        wall0, cpu0 = time.perf_counter(), time.thread_time()
+        para = next(paras, None)
+        total_wall += time.perf_counter() - wall0
+        total_cpu += time.thread_time() - cpu0
+        if para is None:
+            break
+        n_paras += 1
+        if cache is not None:
+            collected.append(asdict(para))
+        yield para
+
+    if metrics is not None:
+        metrics.observe("load", load_wall, load_cpu, len(page_info))
+        metrics.observe("split", total_wall - load_wall, total_cpu - load_cpu, n_paras)
+
+    if cache is not None:
+        cache.put("paras", key, {"pages": page_info, "paragraphs": collected})
+
+
+def load_and_split(
+    loader: PDFLoaderWithOCR,
+    splitter: ParagraphSplitter,
+    path: str,
+    cache: Optional[ExtractionCache] = None,
+    file_sha256: Optional[str] = None,
+    metrics: Optional[Metrics] = None,
+) -> ExtractedDocument:
+    result = ExtractedDocument()
+    result.paragraphs = list(
+        stream_paragraphs(loader, splitter, path, result.pages, cache, file_sha256, metrics)
+    )
+    return result
+
+
+_DONE = object()
+
+
+def extract_pair(
+    loader: PDFLoaderWithOCR,
+    splitter: ParagraphSplitter,
+    v1_path: str,
+    v2_path: str,
+    cache: Optional[ExtractionCache] = None,
+    hashes: Tuple[Optional[str], Optional[str]] = (None, None),
+    metrics: Optional[Metrics] = None,
+):
+    """
+    ดึงข้อความ V1 และ V2 พร้อมกันคนละ thread (OCR รันใน tesseract/process pool
+    จึงไม่ติด GIL) และระหว่างที่ย่อหน้าทยอยมา ก็ล็อกส่วนหัวที่เหมือนกันเป๊ะไปก่อน
+
+    คืน (doc_v1, doc_v2, common_prefix) — common_prefix คือจำนวนย่อหน้าแรกที่ตรงกันทุกตัว
+
+    ส่วนที่ทำซ้อนกับการดึงข้อความมีแค่การนับ common prefix — ParagraphMatcher ยังจับคู่หลัง
+    ได้ย่อหน้าครบทั้งสองฝั่ง (โหมด indexed / align ต้องเห็นทั้งเอกสาร) หน่วยความจำจึงแปรตาม
+    จำนวนย่อหน้า (ไม่เก็บข้อความดิบ/รูปของหน้า) ส่วนคิวระหว่าง thread จำกัดที่ EXTRACT_QUEUE_SIZE
+
+    error จาก thread ฝั่งใดฝั่งหนึ่ง → หยุดอีกฝั่ง รอทั้งสอง thread จบ แล้ว raise error นั้นต่อ
+    """
+    docs = (ExtractedDocument(), ExtractedDocument())
+    queues = (queue.Queue(maxsize=EXTRACT_QUEUE_SIZE), queue.Queue(maxsize=EXTRACT_QUEUE_SIZE))
+    stop = threading.Event()
+
+    def put(side: int, item) -> bool:
+        # put แบบรอเป็นช่วง ๆ → thread หลักเลิกรับ (stop) แล้วไม่ค้างอยู่ที่คิวเต็ม
+        while not stop.is_set():
+            try:
+                queues[side].put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce(side: int, path: str) -> None:
+        try:
+            for para in stream_paragraphs(
+                loader, splitter, path, docs[side].pages, cache, hashes[side], metrics
+            ):
+                if not put(side, para):
+                    return  # ปิด generator → loader ปิดไฟล์/ยกเลิกงาน OCR ที่ค้าง
+            put(side, _DONE)
+        except BaseException as e:  # ส่ง error กลับไปให้ thread หลัก raise ต่อ
+            put(side, e)
+
+    threads = [
+        threading.Thread(target=produce, args=(0, v1_path), daemon=True),
+        threading.Thread(target=produce, args=(1, v2_path), daemon=True),
+    ]
+    for t in threads:
+        t.start()
+
+    old, new = docs[0].paragraphs, docs[1].paragraphs
+    prefix = 0
+    prefix_open = True
+    open_sides = [0, 1]
+
+    try:
+        while open_sides:
+            for side in list(open_sides):
+                item = queues[side].get()
+                if item is _DONE:
+                    open_sides.remove(side)
+                    continue
+                if isinstance(item, BaseException):
+                    raise item
+                docs[side].paragraphs.append(item)
+
+                while prefix_open and prefix < len(old) and prefix < len(new):
+                    if old[prefix].text != new[prefix].text:
+                        prefix_open = False
+                        break
+                    prefix += 1
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
+
+    return docs[0], docs[1], prefix
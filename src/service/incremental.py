@@ -0,0 +1,257 @@
+# src/service/incremental.py
+"""
+เปรียบเทียบแบบ incremental: ต่อจากผลจับคู่ของ comparison เดิมที่มีเวอร์ชันหนึ่งร่วมกัน
+
+ตัวอย่าง: เคยเทียบ v1 → v2 แล้ว ตอนนี้เทียบ v1 → v3 ซึ่งต่างจาก v2 แค่ไม่กี่หน้า
+  1) จัดหน้า v2 ↔ v3 ด้วย content hash ของแต่ละหน้า (page_fingerprints ที่เก็บไว้ใน DB)
+  2) คู่เดิม (v1 ↔ หน้าของ v2 ที่ไม่เปลี่ยน) ใช้ต่อได้เลยโดยเลื่อน index ไปยังหน้าที่ตรงกันใน v3
+  3) จับคู่ใหม่ด้วย ParagraphMatcher เฉพาะย่อหน้า v3 ในหน้าที่เปลี่ยน
+     กับย่อหน้า v1 ที่เคยคู่กับหน้าที่เปลี่ยน + ย่อหน้า v1 ที่ไม่มีคู่ในผลเดิม (REMOVED)
+  4) ย่อหน้า v1 ที่คู่เดิมหายไปและยังไม่ได้คู่ → ลองกับย่อหน้า ADDED เดิมในหน้าที่ไม่เปลี่ยน
+→ เวลาแปรตามขนาดของส่วนที่แก้ ไม่ใช่ขนาดเอกสาร (pool ฝั่งใหม่มีแค่หน้าที่เปลี่ยน
+  จึงเทียบ REMOVED เดิมแต่ละตัวกับ candidate ไม่กี่ตัว)
+
+ใช้ได้เมื่อ comparison เดิมมีไฟล์ฝั่งใดฝั่งหนึ่งตรงกัน (sha256) และใช้ค่าตั้งค่าเดียวกัน
+ผลอาจต่างจากการเทียบเต็มเล็กน้อยในโหมด indexed (ย่อหน้าที่เคยมีคู่แล้วไม่ถูกแย่งคู่ใหม่)
+หน้า hash เดิมใช้คู่เดิมได้ก็ต่อเมื่อย่อหน้าของหน้านั้นเหมือนเดิมทุกตัวด้วย (splitter ต่อย่อหน้าข้ามหน้า
+→ หน้าที่ไม่เปลี่ยนแต่ย่อหน้าท้ายหน้าไปรวมกับหน้าถัดไปที่เปลี่ยน ถือเป็นหน้าที่เปลี่ยน)
+"""
+
+import hashlib
+import json
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session, aliased
+
+from db.models import Comparison, DocumentVersion
+from ingestion.paragraph_splitter import Paragraph
+from matching.paragraph_matcher import ParagraphMatch, ParagraphMatcher
+from service.extraction import ExtractedDocument
+
+# old index → (new index, similarity, moved)
+Pairs = Dict[int, Tuple[int, float, bool]]
+
+# จำนวน comparison ล่าสุดที่นำมาพิจารณาเป็นฐาน
+MAX_BASE_CANDIDATES = 20
+
+
+@dataclass
+class IncrementalStats:
+    base_run_id: int
+    shared_side: str                 # "old" / "new" — ฝั่งที่ไฟล์ตรงกับ comparison เดิม
+    changed_pages: int = 0           # หน้าในเวอร์ชันใหม่ที่ไม่มีหน้า hash เดียวกันในฐาน
+    reused_pairs: int = 0
+    pool_old: int = 0
+    pool_new: int = 0
+
+
+def page_fingerprints(doc: ExtractedDocument) -> List[List]:
+    """
+    [[content_hash, จำนวนย่อหน้าในหน้านั้น, hash ข้อความย่อหน้าของหน้านั้น], ...] ตามลำดับหน้า
+    """
+    by_page: Dict[int, List[str]] = defaultdict(list)
+    for p in doc.paragraphs:
+        by_page[p.page_number].append(p.text)
+    fps = []
+    for page in doc.pages:
+        texts = by_page.get(page["page"], [])
+        digest = hashlib.sha1("\x00".join(texts).encode("utf-8")).hexdigest()[:16]
+        fps.append([page.get("content_hash"), len(texts), digest])
+    return fps
+
+
+def match_map(
+    matches: Sequence[ParagraphMatch],
+    old_paras: Sequence[Paragraph],
+    new_paras: Sequence[Paragraph],
+) -> List[List]:
+    """
+    ผลจับคู่ทั้งหมดแบบ compact: [[old index | -1, new index | -1, similarity, moved], ...]
+    """
+    old_pos = {id(p): i for i, p in enumerate(old_paras)}
+    new_pos = {id(p): j for j, p in enumerate(new_paras)}
+    return [
+        [
+            old_pos[id(m.old)] if m.old is not None else -1,
+            new_pos[id(m.new)] if m.new is not None else -1,
+            round(m.similarity, 6),
+            bool(m.moved),
+        ]
+        for m in matches
+    ]
+
+
+def _page_overlap(a: List[List], b: List[List]) -> int:
+    ca = Counter(fp[0] for fp in a if fp[0])
+    cb = Counter(fp[0] for fp in b if fp[0])
+    return sum((ca & cb).values())
+
+
+def find_base_comparison(
+    db: Session,
+    settings_key: str,
+    sha_old: str,
+    sha_new: str,
+    fp_old: List[List],
+    fp_new: List[List],
+    base_run_id: Optional[int] = None,
+) -> Optional[Tuple[Comparison, str, List[List]]]:
+    """
+    comparison เดิมที่ใช้ต่อได้ → (comparison, ฝั่งที่ตรงกัน, page_fingerprints ของอีกฝั่งในฐาน)
+    หลายตัวเลือก → เลือกตัวที่หน้าในฝั่งที่ต่างกันซ้ำกับไฟล์ใหม่มากที่สุด
+    """
+    vo, vn = aliased(DocumentVersion), aliased(DocumentVersion)
+    query = (
+        db.query(Comparison, vo, vn)
+        .join(vo, Comparison.version_old_id == vo.id)
+        .join(vn, Comparison.version_new_id == vn.id)
+        .filter(Comparison.match_json.isnot(None), Comparison.settings_key == settings_key)
+    )
+    if base_run_id is not None:
+        query = query.filter(Comparison.id == base_run_id)
+    else:
+        query = query.filter(or_(vo.file_sha256 == sha_old, vn.file_sha256 == sha_new))
+
+    best = None
+    best_overlap = 0
+    for comp, ver_old, ver_new in query.order_by(Comparison.id.desc()).limit(MAX_BASE_CANDIDATES):
+        if ver_old.file_sha256 == sha_old and ver_new.page_fingerprints:
+            side, other = "old", json.loads(ver_new.page_fingerprints)
+            overlap = _page_overlap(other, fp_new)
+        elif ver_new.file_sha256 == sha_new and ver_old.page_fingerprints:
+            side, other = "new", json.loads(ver_old.page_fingerprints)
+            overlap = _page_overlap(other, fp_old)
+        else:
+            continue
+        if overlap > best_overlap:
+            best, best_overlap = (comp, side, other), overlap
+    return best
+
+
+def _paragraph_offsets(fp: List[List]) -> List[int]:
+    offsets = [0]
+    for _, n, *_ in fp:
+        offsets.append(offsets[-1] + n)
+    return offsets
+
+
+def splice_pairs(
+    matcher: ParagraphMatcher,
+    base_map: List[List],
+    fp_base_new: List[List],
+    old_paras: List[Paragraph],
+    new_paras: List[Paragraph],
+    fp_new: List[List],
+    flipped: bool = False,
+) -> Tuple[Pairs, Dict]:
+    """
+    ฝั่ง old เหมือนฐานทุกย่อหน้า ฝั่ง new เปลี่ยนบางหน้า → คู่ทั้งหมดของ old ↔ new
+
+    flipped=True: old/new ที่ส่งมาสลับบทบาทกับเอกสารจริง — ตอนจับคู่ใหม่ต้องส่งเข้า matcher
+    ตามทิศจริง (ratio ของ SequenceMatcher ไม่สมมาตรเมื่อข้อความยาวเกิน 200 ตัวอักษร
+    เพราะ autojunk คิดจากฝั่งที่สอง และลำดับ greedy ก็ขึ้นกับทิศ)
+    """
+    # 1) จัดหน้า ฐาน ↔ ใหม่ ด้วย hash แล้วทำ map index ย่อหน้าของหน้าที่ไม่เปลี่ยน
+    base_off, new_off = _paragraph_offsets(fp_base_new), _paragraph_offsets(fp_new)
+    base_to_new: Dict[int, int] = {}
+    unchanged_new_pages = set()
+    unchanged_new = set()  # index ย่อหน้าฝั่งใหม่ที่อยู่ในหน้าที่ไม่เปลี่ยน
+    sm = SequenceMatcher(None, [fp[0] for fp in fp_base_new], [fp[0] for fp in fp_new], autojunk=False)
+    for bi, ni, size in sm.get_matching_blocks():
+        for k in range(size):
+            if fp_base_new[bi + k][1:] != fp_new[ni + k][1:]:
+                continue  # hash เดิมแต่ย่อหน้าไม่ตรง (ต่อข้ามหน้ากับหน้าที่เปลี่ยน / ค่าตั้งค่าต่าง) → คิดใหม่
+            unchanged_new_pages.add(ni + k)
+            for p in range(fp_new[ni + k][1]):
+                base_to_new[base_off[bi + k] + p] = new_off[ni + k] + p
+                unchanged_new.add(new_off[ni + k] + p)
+
+    # 2) คู่เดิมที่อีกฝั่งอยู่ในหน้าที่ไม่เปลี่ยน → ใช้ต่อ
+    #    old ที่คู่เดิมอยู่ในหน้าที่เปลี่ยน → "ว่าง" ต้องหาคู่ใหม่
+    pairs: Pairs = {}
+    matched_new = set()
+    freed_old = []
+    for o, n, score, moved in base_map:
+        if o < 0:
+            continue
+        if n >= 0 and n in base_to_new:
+            j = base_to_new[n]
+            pairs[o] = (j, score, moved)
+            matched_new.add(j)
+        elif n >= 0:
+            freed_old.append(o)
+    freed = set(freed_old)
+    removed_old = [i for i in range(len(old_paras)) if i not in pairs and i not in freed]
+    changed_new = [j for j in range(len(new_paras)) if j not in matched_new and j not in unchanged_new]
+    added_new = [j for j in range(len(new_paras)) if j not in matched_new and j in unchanged_new]
+
+    def match_pool(pool_old: List[int], pool_new: List[int]) -> List[int]:
+        """
+        จับคู่ใน pool แล้วใส่ลง pairs — คืน old ที่ยังไม่มีคู่
+        """
+        if not pool_old or not pool_new:
+            return pool_old
+        old_pos = {id(old_paras[i]): i for i in pool_old}
+        new_pos = {id(new_paras[j]): j for j in pool_new}
+        a, b = [old_paras[i] for i in pool_old], [new_paras[j] for j in pool_new]
+        for m in matcher.match(*((b, a) if flipped else (a, b))):
+            if m.old is not None and m.new is not None:
+                o, n = (m.new, m.old) if flipped else (m.old, m.new)
+                pairs[old_pos[id(o)]] = (new_pos[id(n)], m.similarity, m.moved)
+        return [i for i in pool_old if i not in pairs]
+
+    # 3) ย่อหน้าในหน้าที่เปลี่ยน ↔ old ที่ว่าง + old ที่ไม่มีคู่ในผลเดิม (REMOVED)
+    #    REMOVED เดิมไม่เคยคล้ายพอกับย่อหน้าในหน้าที่ไม่เปลี่ยน → เทียบแค่หน้าที่เปลี่ยนพอ
+    left_freed = set(match_pool(sorted(freed_old + removed_old), changed_new))
+    # 4) old ที่ว่างและยังไม่มีคู่ ↔ ย่อหน้าที่ไม่มีคู่ในผลเดิม (ADDED) ในหน้าที่ไม่เปลี่ยน
+    used_new = {j for j, _, _ in pairs.values()}
+    match_pool(
+        [i for i in freed_old if i in left_freed],
+        [j for j in added_new if j not in used_new],
+    )
+
+    stats = {
+        "changed_pages": len(fp_new) - len(unchanged_new_pages),
+        "reused_pairs": len(matched_new),
+        "pool_old": len(freed_old) + len(removed_old),
+        "pool_new": len(changed_new),
+    }
+    return pairs, stats
+
+
+def incremental_match(
+    matcher: ParagraphMatcher,
+    base: Comparison,
+    shared_side: str,
+    fp_base_other: List[List],
+    old_paras: List[Paragraph],
+    new_paras: List[Paragraph],
+    fp_old: List[List],
+    fp_new: List[List],
+) -> Tuple[List[ParagraphMatch], IncrementalStats]:
+    """
+    ผลจับคู่ old ↔ new ที่ต่อจาก comparison ฐาน (ฝั่ง shared_side มีไฟล์เดียวกับฐาน)
+    """
+    base_map = json.loads(base.match_json)
+    shared = old_paras if shared_side == "old" else new_paras
+    side = 0 if shared_side == "old" else 1
+    if any(row[side] >= len(shared) for row in base_map):
+        raise ValueError("จำนวนย่อหน้าฝั่งที่ตรงกันไม่เท่ากับของเดิม")
+    if shared_side == "old":
+        pairs, stats = splice_pairs(matcher, base_map, fp_base_other, old_paras, new_paras, fp_new)
+    else:
+        # สลับบทบาท (ฝั่ง new ร่วมกัน) แล้วกลับทิศคู่ตอนจบ
+        flipped_map = [[n, o, score, moved] for o, n, score, moved in base_map]
+        rev, stats = splice_pairs(
+            matcher, flipped_map, fp_base_other, new_paras, old_paras, fp_old, flipped=True
+        )
+        pairs = {i: (j, score, moved) for j, (i, score, moved) in rev.items()}
+
+    return (
+        matcher.assemble(old_paras, new_paras, pairs),
+        IncrementalStats(base_run_id=base.id, shared_side=shared_side, **stats),
+    )
@@ -0,0 +1,136 @@
+# src/service/job_queue.py
+
+import json
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from db.init_db import init_db
+from db.session import SessionLocal
+from db.ops import create_job, get_job, list_job_ids, update_job
+from service.batch_service import run_batch_compare
+from service.compare_service import run_compare
+
+logger = logging.getLogger(__name__)
+
+# kind → ฟังก์ชันที่รับ params (dict) + progress callback แล้วคืนผลเป็น dict
+JobHandler = Callable[..., Dict[str, Any]]
+
+JOB_HANDLERS: Dict[str, JobHandler] = {
+    "compare": run_compare,
+    "batch_compare": run_batch_compare,
+}
+
+
+class JobQueue:
+    """
+    คิวงานเบื้องหลังสำหรับงานที่ใช้เวลานาน (OCR / เปรียบเทียบเอกสาร)
+
+    - สถานะงานเก็บในตาราง jobs (SQLite) → restart แล้วงานที่ค้างอยู่จะถูกรันต่อ
+    - รันด้วย thread pool ขนาด max_workers; งานหนักจริง (tesseract, process pool ของ OCR)
+      อยู่นอก GIL อยู่แล้ว thread จึงพอและไม่ต้อง pickle ผลลัพธ์ข้าม process
+    """
+
+    def __init__(self, max_workers: int = 2):
+        self.max_workers = max(1, max_workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """
+        เปิด worker + นำงานที่ยังไม่เสร็จจากรอบก่อนกลับเข้าคิว
+        (งานที่ค้างสถานะ RUNNING คือโดนตัดกลางคัน → เริ่มใหม่ตั้งแต่ต้น)
+        """
+        init_db()
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="job"
+                )
+
+        db = SessionLocal()
+        try:
+            for job_id in list_job_ids(db, "RUNNING"):
+                update_job(db, job_id, status="QUEUED", stage=None, progress=0.0)
+            pending = list_job_ids(db, "QUEUED")
+        finally:
+            db.close()
+
+        for job_id in pending:
+            self._executor.submit(self._run, job_id)
+        if pending:
+            logger.info(f"[JOBS] นำงานค้าง {len(pending)} งานกลับเข้าคิว")
+
+    def shutdown(self, wait: bool = False) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def submit(self, kind: str, params: Dict[str, Any]) -> str:
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"ไม่รู้จักงานประเภท: {kind}")
+        if self._executor is None:
+            raise RuntimeError("JobQueue ยังไม่ได้ start()")
+
+        job_id = uuid.uuid4().hex
+        db = SessionLocal()
+        try:
+            create_job(db, job_id, kind, params)
+        finally:
+            db.close()
+
+        self._executor.submit(self._run, job_id)
+        return job_id
+
+    def _run(self, job_id: str) -> None:
+        db = SessionLocal()
+        try:
+            job = get_job(db, job_id)
+            if job is None or job.status != "QUEUED":
+                return
+            handler = JOB_HANDLERS[job.kind]
+            params = json.loads(job.params)
+            update_job(db, job_id, status="RUNNING", stage="start", progress=0.0)
+
+            def on_progress(stage: str, fraction: float) -> None:
+                update_job(db, job_id, stage=stage, progress=fraction)
+
+            try:
+                result = handler(**params, progress=on_progress)
+            except Exception as e:
+                logger.exception(f"[JOBS] งาน {job_id} ล้มเหลว")
+                update_job(db, job_id, status="FAILED", error=str(e))
+                return
+
+            update_job(
+                db,
+                job_id,
+                status="DONE",
+                stage="done",
+                progress=1.0,
+                result=result,
+                comparison_id=result.get("run_id"),
+            )
+        finally:
+            db.close()
+
+
+def job_to_dict(job) -> Dict[str, Any]:
+    """
+    สถานะงานสำหรับส่งกลับทาง API (ไม่รวมผลลัพธ์เต็ม)
+    """
+    return {
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "stage": job.stage,
+        "progress": job.progress,
+        "error": job.error,
+        "comparison_id": job.comparison_id,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
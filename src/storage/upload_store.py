@@ -0,0 +1,121 @@
+# src/storage/upload_store.py
+
+import hashlib
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, Optional
+
+from utils.hashing import CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_UPLOAD_DIR = "data/uploads"
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+DEFAULT_MIN_AGE_SEC = 3600
+
+
+@dataclass
+class StoredUpload:
+    path: Path
+    sha256: str
+    size: int
+    reused: bool        # True = มีไฟล์เนื้อหาเดียวกันอยู่แล้ว ไม่ได้เก็บเพิ่ม
+
+
+class UploadStore:
+    """
+    ที่เก็บไฟล์อัปโหลดแบบ content-addressed: data/uploads/<sha256><ext>
+
+    - stream ลงดิสก์ทีละก้อนพร้อมคำนวณ SHA-256 ในรอบเดียว
+    - ไฟล์ซ้ำ (hash เดิม) → ทิ้งไฟล์ชั่วคราว ใช้ไฟล์เดิม + แตะ mtime ให้เป็น "ใช้ล่าสุด"
+    - gc(): ขนาดรวมเกิน max_bytes → ลบไฟล์ที่ไม่ได้ใช้นานที่สุดก่อน
+      ข้ามไฟล์ที่ in_use() คืนมา (เช่น version ล่าสุดของแต่ละเอกสาร / งานในคิว)
+      และไฟล์ที่อายุน้อยกว่า min_age_sec (อัปโหลดแล้วแต่ยังไม่ได้ส่งงานเข้าคิว)
+      ลบแล้วยังเกิน max_bytes → log เตือน (in_use() เรียกเฉพาะตอนที่เกินขนาด)
+    """
+
+    def __init__(
+        self,
+        root: str = DEFAULT_UPLOAD_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        min_age_sec: float = DEFAULT_MIN_AGE_SEC,
+        in_use: Optional[Callable[[], Iterable[str]]] = None,
+    ):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.min_age_sec = min_age_sec
+        self.in_use = in_use
+
+    def save_stream(self, src: BinaryIO, ext: str = ".pdf") -> StoredUpload:
+        """
+        hash จะรู้ก็ต่อเมื่ออ่าน stream จนจบ → ทุกไฟล์ (รวมไฟล์ซ้ำ) ถูกเขียนลงไฟล์ชั่วคราวครบก่อน
+        แล้วจึงตัดสิน: ซ้ำ → ลบไฟล์ชั่วคราวทันที (ไม่เก็บสำเนา), ใหม่ → rename เป็นชื่อ <sha256><ext>
+        (dedup ช่วยประหยัดพื้นที่ที่เก็บถาวร ไม่ได้ลดการเขียนดิสก์ระหว่างอัปโหลด)
+        """
+        h = hashlib.sha256()
+        size = 0
+        tmp = self.root / f".tmp-{uuid.uuid4().hex}"
+        try:
+            with tmp.open("wb") as f:
+                for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                    h.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+
+            sha = h.hexdigest()
+            dest = self.root / f"{sha}{ext.lower()}"
+            if dest.exists():
+                os.utime(dest)
+                return StoredUpload(path=dest, sha256=sha, size=size, reused=True)
+
+            os.replace(tmp, dest)
+            return StoredUpload(path=dest, sha256=sha, size=size, reused=False)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    def gc(self) -> int:
+        """
+        คืนจำนวนไบต์ที่ลบไป
+        """
+        entries = []
+        total = 0
+        for entry in os.scandir(self.root):
+            if not entry.is_file() or entry.name.startswith(".tmp-"):
+                continue
+            st = entry.stat()
+            entries.append((st.st_mtime, st.st_size, entry.path))
+            total += st.st_size
+
+        if total <= self.max_bytes:
+            return 0
+
+        keep = {os.path.abspath(p) for p in self.in_use()} if self.in_use else set()
+        freed = 0
+        cutoff = time.time() - self.min_age_sec
+        for mtime, size, path in sorted(entries):
+            if total - freed <= self.max_bytes:
+                break
+            if mtime > cutoff:
+                break
+            if os.path.abspath(path) in keep:
+                continue
+            try:
+                os.remove(path)
+                freed += size
+            except FileNotFoundError:
+                pass
+
+        if freed:
+            logger.info(f"[GC] ลบไฟล์อัปโหลดเก่า {freed / 1024 / 1024:.1f} MB")
+        if total - freed > self.max_bytes:
+            logger.warning(
+                f"[GC] ⚠️ uploads ยังเกินขนาดที่กำหนด ({(total - freed) / 1024 / 1024:.1f} MB > "
+                f"{self.max_bytes / 1024 / 1024:.1f} MB) — ที่เหลือเป็นไฟล์ที่ยังใช้อยู่หรืออายุไม่ถึง"
+            )
+        return freed
+
@@ -0,0 +1,26 @@
+# src/utils/hashing.py
+
+import hashlib
+import json
+from typing import Any
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def sha256_file(path: str) -> str:
+    """
+    SHA-256 ของไฟล์ อ่านทีละก้อนเพื่อไม่ให้กินหน่วยความจำกับไฟล์ใหญ่
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def settings_hash(settings: Any) -> str:
+    """
+    hash ของ dict ค่าตั้งค่า (เรียง key ก่อน เพื่อให้ได้ค่าเดิมทุกครั้ง)
+    """
+    raw = json.dumps(settings, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
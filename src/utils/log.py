@@ -0,0 +1,26 @@
+# src/utils/log.py
+
+import logging
+import os
+from typing import Optional, Union
+
+LOG_FORMAT = "%(message)s"
+
+
+def setup_logging(level: Optional[Union[int, str]] = None) -> None:
+    """
+    ตั้งค่า logger ของ pipeline (ข้อความเดิมที่เคย print)
+    level: ไม่ระบุ → อ่านจาก env LOG_LEVEL (ค่าเริ่มต้น INFO); ใช้ "WARNING" เพื่อปิดข้อความทั่วไป
+    """
+    if level is None:
+        level = os.getenv("LOG_LEVEL", "INFO")
+    if isinstance(level, str):
+        level = level.upper()
+
+    root = logging.getLogger()
+    if not any(getattr(h, "_docver", False) for h in root.handlers):
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        handler._docver = True
+        root.addHandler(handler)
+    root.setLevel(level)
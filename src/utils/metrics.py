@@ -0,0 +1,140 @@
+# src/utils/metrics.py
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+@dataclass
+class StageStat:
+    wall_sec: float = 0.0
+    cpu_sec: float = 0.0
+    count: int = 0
+
+
+class Metrics:
+    """
+    ตัวเก็บเวลา + จำนวนรายการของแต่ละขั้นใน pipeline หนึ่งรอบ (thread-safe)
+
+    - stage(name)       : context manager จับเวลา wall (perf_counter) และ CPU ของทั้ง process
+                          (process_time — รวมทุก thread แต่ไม่รวม process ลูกอย่าง tesseract)
+    - observe(name,...) : บันทึกเวลาที่วัดเองต่อรายการ เช่น render/OCR ทีละหน้า
+    - incr(name, n)     : ตัวนับทั่วไป เช่น จำนวนคู่ที่ SequenceMatcher เทียบจริง
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, StageStat] = {}
+        self.counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str, count: int = 1) -> Iterator[None]:
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.observe(
+                name,
+                time.perf_counter() - wall0,
+                time.process_time() - cpu0,
+                count,
+            )
+
+    def observe(self, name: str, wall_sec: float, cpu_sec: float = 0.0, count: int = 1) -> None:
+        with self._lock:
+            stat = self.stages.setdefault(name, StageStat())
+            stat.wall_sec += wall_sec
+            stat.cpu_sec += cpu_sec
+            stat.count += count
+
+    def incr(self, name: str, n: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "stages": {
+                    name: {
+                        "wall_sec": round(s.wall_sec, 6),
+                        "cpu_sec": round(s.cpu_sec, 6),
+                        "count": s.count,
+                    }
+                    for name, s in self.stages.items()
+                },
+                "counters": dict(self.counters),
+            }
+
+
+class PrometheusRegistry:
+    """
+    สะสมค่าจากทุกรอบใน process นี้ แล้ว render เป็น text format ของ Prometheus
+    (ทำเองแบบง่าย ไม่ต้องพึ่ง prometheus_client)
+    """
+
+    def __init__(self, prefix: str = "docver"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        # (metric name, labels) → value
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self._help: Dict[str, str] = {}
+
+    def inc(self, name: str, value: float = 1.0, help_text: str = "", **labels: str) -> None:
+        key = (f"{self.prefix}_{name}", tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+            if help_text:
+                self._help.setdefault(key[0], help_text)
+
+    def record_run(self, metrics: Metrics, kind: str = "compare") -> None:
+        data = metrics.to_dict()
+        for stage, s in data["stages"].items():
+            self.inc("stage_wall_seconds_total", s["wall_sec"], "เวลา wall สะสมต่อขั้น", kind=kind, stage=stage)
+            self.inc("stage_cpu_seconds_total", s["cpu_sec"], "เวลา CPU สะสมต่อขั้น", kind=kind, stage=stage)
+            self.inc("stage_items_total", s["count"], "จำนวนรายการที่ผ่านแต่ละขั้น", kind=kind, stage=stage)
+        for name, value in data["counters"].items():
+            self.inc("items_total", value, "ตัวนับของ pipeline", kind=kind, counter=name)
+
+    def render(self, extra: Optional[List[Tuple[str, Dict[str, str], float, str]]] = None) -> str:
+        """
+        extra: ค่า gauge ที่คำนวณตอน scrape [(ชื่อ, labels, ค่า, help)]
+        """
+        with self._lock:
+            items = sorted(self._counters.items())
+            helps = dict(self._help)
+
+        lines: List[str] = []
+        seen = set()
+        for (name, labels), value in items:
+            if name not in seen:
+                seen.add(name)
+                if name in helps:
+                    lines.append(f"# HELP {name} {helps[name]}")
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+
+        for name, labels, value, help_text in extra or []:
+            full = f"{self.prefix}_{name}"
+            if full not in seen:
+                seen.add(full)
+                lines.append(f"# HELP {full} {help_text}")
+                lines.append(f"# TYPE {full} gauge")
+            lines.append(f"{full}{_format_labels(tuple(sorted(labels.items())))} {value:g}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for k, v in labels:
+        v = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{k}="{v}"')
+    return "{" + ",".join(parts) + "}"
+
+
+# registry กลางของ process (API อ่านที่ /metrics)
+REGISTRY = PrometheusRegistry()
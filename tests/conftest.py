@@ -0,0 +1,27 @@
+# tests/conftest.py
+# โค้ดอยู่ใน src/ และ import แบบ absolute (from db.ops import ...) → ใส่ src ลง sys.path
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import pytest
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """
+    โฟลเดอร์ทำงานชั่วคราว + ฐานข้อมูล SQLite ใหม่ (path สัมพัทธ์ data/outputs, data/cache อยู่ใน tmp_path)
+    ไม่แตะ data/versioning.db ของ repo
+    """
+    from db.init_db import init_db
+    from db.session import SessionLocal, make_engine
+
+    monkeypatch.chdir(tmp_path)
+    engine = make_engine(f"sqlite:///{tmp_path / 'versioning.db'}")
+    old_bind = SessionLocal.kw["bind"]
+    SessionLocal.configure(bind=engine)
+    init_db(engine)
+    yield tmp_path
+    SessionLocal.configure(bind=old_bind)
+    engine.dispose()
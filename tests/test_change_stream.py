@@ -0,0 +1,82 @@
+# tests/test_change_stream.py
+
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import api.read_routes as read_routes
+from bench.synthetic import make_revision
+from bench.synthetic_pdf import write_pdf
+from db.models import ChangeItem
+from db.session import SessionLocal
+from service.compare_service import run_compare
+
+
+def _compare(workspace, **kw):
+    a, b = workspace / "a.pdf", workspace / "b.pdf"
+    if not a.exists():
+        old, new, _ = make_revision(40, seed=2, lang="mixed", modify_rate=0.2)
+        write_pdf(a, old)
+        write_pdf(b, new)
+    return run_compare("Doc", str(a), str(b), "v1", "v2", **kw)
+
+
+def _db_rows(comparison_id):
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(ChangeItem)
+            .filter(ChangeItem.comparison_id == comparison_id)
+            .order_by(ChangeItem.id)
+            .all()
+        )
+        return [read_routes.change_to_dict(ch) for ch in rows]
+    finally:
+        db.close()
+
+
+def test_ndjson_report_matches_json_report(workspace):
+    plain = _compare(workspace)
+    assert "ndjson_report_path" not in plain
+
+    # ผลเดิมไม่มี NDJSON → ขอ ndjson ต้องเปรียบเทียบใหม่ ไม่ใช่คืนผลที่ไม่มีไฟล์
+    result = _compare(workspace, ndjson=True)
+    assert not result["from_cache"]
+    with open(result["json_report_path"], encoding="utf-8") as f:
+        expected = json.load(f)["changes"]
+    with open(result["ndjson_report_path"], encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert result["changes_count"] > 0
+    assert lines == expected
+
+    again = _compare(workspace, ndjson=True)
+    assert again["from_cache"] and again["ndjson_report_path"] == result["ndjson_report_path"]
+
+
+def test_stream_endpoint_matches_db_rows(workspace, monkeypatch):
+    result = _compare(workspace)
+    run_id = result["run_id"]
+    expected = _db_rows(run_id)
+    assert len(expected) == result["changes_count"] > 0
+
+    monkeypatch.setattr(read_routes, "STREAM_BATCH_SIZE", 7)  # หลาย batch
+    app = FastAPI()
+    app.include_router(read_routes.router)
+    client = TestClient(app)
+
+    resp = client.get(f"/comparisons/{run_id}/changes/stream")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line) for line in resp.text.splitlines()] == expected
+
+    resp = client.get(f"/comparisons/{run_id}/changes/stream", params={"format": "json"})
+    assert resp.status_code == 200
+    assert resp.json() == {"comparison_id": run_id, "changes": expected}
+
+    resp = client.get(f"/comparisons/{run_id}/changes/stream", params={"change_type": "MODIFIED"})
+    assert [json.loads(line) for line in resp.text.splitlines()] == [
+        c for c in expected if c["change_type"] == "MODIFIED"
+    ]
+
+    assert client.get("/comparisons/999999/changes/stream").status_code == 404
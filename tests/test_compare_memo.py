@@ -0,0 +1,30 @@
+# tests/test_compare_memo.py
+
+import json
+
+from bench.synthetic import make_revision
+from bench.synthetic_pdf import write_pdf
+from service.compare_service import run_compare
+
+
+def _report_changes(result) -> int:
+    with open(result["json_report_path"], encoding="utf-8") as f:
+        return len(json.load(f)["changes"])
+
+
+def test_memo_hit_serves_its_own_report(workspace):
+    old, new, _ = make_revision(40, seed=1, lang="en")
+    a, b, c = workspace / "a.pdf", workspace / "b.pdf", workspace / "c.pdf"
+    write_pdf(a, old)
+    write_pdf(b, new)
+    write_pdf(c, old[:-1] + [old[-1] + " plus an amended clause"])
+
+    first = run_compare("Doc", str(a), str(b), "v1", "v2")
+    other = run_compare("Doc", str(a), str(c), "v1", "v2")
+    again = run_compare("Doc", str(a), str(b), "v1", "v2")
+
+    assert first["changes_count"] != other["changes_count"]
+    assert other["json_report_path"] != first["json_report_path"]
+    assert again["from_cache"] and again["run_id"] == first["run_id"]
+    assert again["changes_count"] == first["changes_count"] == _report_changes(again)
+    assert _report_changes(other) == other["changes_count"]
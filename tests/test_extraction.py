@@ -0,0 +1,71 @@
+# tests/test_extraction.py
+
+import threading
+
+import pytest
+
+import service.extraction as extraction
+from bench.synthetic import make_revision
+from bench.synthetic_pdf import write_pdf
+from ingestion.paragraph_splitter import ParagraphSplitter
+from ingestion.pdf_loader_ocr import PDFLoaderWithOCR
+from service.extraction import extract_pair, load_and_split
+
+
+class _FailingLoader(PDFLoaderWithOCR):
+    """
+    loader ที่ล้มหลังส่งหน้า fail_after หน้าของไฟล์ fail_path
+    """
+
+    def __init__(self, fail_path, fail_after):
+        super().__init__()
+        self.fail_path = fail_path
+        self.fail_after = fail_after
+
+    def iter_load(self, path):
+        for n, page in enumerate(super().iter_load(path)):
+            if path == self.fail_path and n == self.fail_after:
+                raise RuntimeError("หน้าเสีย")
+            yield page
+
+
+@pytest.fixture
+def pair(tmp_path):
+    old, new, _ = make_revision(60, seed=4, lang="mixed")
+    new = old[:12] + new[12:]  # ส่วนหัวเหมือนกัน 12 ย่อหน้าขึ้นไป
+    v1, v2 = tmp_path / "v1.pdf", tmp_path / "v2.pdf"
+    write_pdf(v1, old)
+    write_pdf(v2, new)
+    return str(v1), str(v2)
+
+
+def _signature(doc):
+    return [(p.page_number, p.index, p.text, p.bbox, p.section) for p in doc.paragraphs], doc.pages
+
+
+@pytest.mark.parametrize("queue_size", [1, 256])
+def test_extract_pair_matches_load_and_split(pair, monkeypatch, queue_size):
+    monkeypatch.setattr(extraction, "EXTRACT_QUEUE_SIZE", queue_size)
+    loader, splitter = PDFLoaderWithOCR(), ParagraphSplitter()
+    doc_v1, doc_v2, prefix = extract_pair(loader, splitter, *pair)
+    ref_v1, ref_v2 = load_and_split(loader, splitter, pair[0]), load_and_split(loader, splitter, pair[1])
+
+    assert _signature(doc_v1) == _signature(ref_v1)
+    assert _signature(doc_v2) == _signature(ref_v2)
+    expected = 0
+    for a, b in zip(ref_v1.paragraphs, ref_v2.paragraphs):
+        if a.text != b.text:
+            break
+        expected += 1
+    assert prefix == expected >= 12
+
+
+@pytest.mark.parametrize("failing_side", [0, 1])
+def test_extract_pair_raises_producer_error(pair, monkeypatch, failing_side):
+    monkeypatch.setattr(extraction, "EXTRACT_QUEUE_SIZE", 1)  # อีกฝั่งค้างที่คิวเต็มแน่นอน
+    loader = _FailingLoader(pair[failing_side], fail_after=3)
+    before = set(threading.enumerate())
+    with pytest.raises(RuntimeError, match="หน้าเสีย"):
+        extract_pair(loader, ParagraphSplitter(), *pair)
+    # thread ดึงข้อความทั้งสองฝั่งต้องจบแล้ว ไม่ค้างรอคิว
+    assert not [t for t in threading.enumerate() if t not in before and t.is_alive()]
@@ -0,0 +1,64 @@
+# tests/test_extraction_cache.py
+
+import sqlite3
+
+import pytest
+
+from cache.extraction_cache import EVICT_TO_RATIO, ExtractionCache
+
+
+def _sum(cache):
+    return cache._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+
+def test_running_total_tracks_put_and_replace(tmp_path):
+    with ExtractionCache(str(tmp_path / "c.db"), max_bytes=10**9) as cache:
+        for i in range(20):
+            cache.put("page", f"k{i}", "x" * i)
+        # เขียนทับ key เดิม (ขนาดเปลี่ยน) ต้องไม่นับซ้ำ
+        for i in range(0, 20, 3):
+            cache.put("page", f"k{i}", "y" * (100 + i))
+        assert cache._total == _sum(cache)
+
+    # เปิดใหม่ → อ่านขนาดรวมจากไฟล์
+    with ExtractionCache(str(tmp_path / "c.db"), max_bytes=10**9) as cache:
+        assert cache._total == _sum(cache) > 0
+
+
+def test_put_scans_only_when_over_budget(tmp_path, monkeypatch):
+    cache = ExtractionCache(str(tmp_path / "c.db"), max_bytes=2000)
+    scans = []
+    real_sum = cache._sum_size
+    monkeypatch.setattr(cache, "_sum_size", lambda: scans.append(1) or real_sum())
+
+    for i in range(100):
+        cache.put("page", f"k{i}", "x" * 98)  # 100 bytes ต่อรายการ (รวมเครื่องหมายคำพูด)
+        assert cache._total <= cache.max_bytes
+        assert cache._total == real_sum()
+
+    # ลบทีละ 10% → ไม่ต้องนับ SUM ใหม่ทุก put หลัง cache เต็ม
+    assert 0 < len(scans) <= 100 // 2
+    assert real_sum() <= cache.max_bytes
+    cache.close()
+
+
+def test_evict_drops_oldest_down_to_ratio(tmp_path):
+    with ExtractionCache(str(tmp_path / "c.db"), max_bytes=1000) as cache:
+        for i in range(10):
+            cache.put("page", f"k{i}", "x" * 98)
+        assert cache.get("page", "k0") is not None  # k0 ถูกใช้ล่าสุด → ไม่โดนลบ
+
+        cache.put("page", "k10", "x" * 98)
+
+        assert cache._total <= int(cache.max_bytes * EVICT_TO_RATIO)
+        assert cache.get("page", "k0") is not None
+        assert cache.get("page", "k1") is None
+        assert cache.get("page", "k10") is not None
+
+
+def test_context_manager_closes_on_error(tmp_path):
+    with pytest.raises(RuntimeError):
+        with ExtractionCache(str(tmp_path / "c.db")) as cache:
+            raise RuntimeError("ล้มกลางทาง")
+    with pytest.raises(sqlite3.ProgrammingError):
+        cache._conn.execute("SELECT 1")
@@ -0,0 +1,55 @@
+# tests/test_fingerprint.py
+
+import fitz  # PyMuPDF
+
+from cache.extraction_cache import ExtractionCache
+from ingestion.fingerprint import page_content_hash
+from ingestion.pdf_loader_ocr import PDFLoaderWithOCR
+
+
+def _form_pdf(path, text: str, nested: bool = False) -> str:
+    """
+    หน้าที่วาดข้อความผ่าน Form XObject ("/fzFrm0 Do") ด้วย show_pdf_page
+    nested → ฟอร์มซ้อนฟอร์มอีกชั้น
+    """
+    src = fitz.open()
+    page = src.new_page(width=595, height=842)
+    page.insert_text((72, 100), f"Payment is due within {text} of the invoice date.", fontsize=11)
+    for _ in range(2 if nested else 1):
+        out = fitz.open()
+        out.new_page(width=595, height=842).show_pdf_page(fitz.Rect(0, 0, 595, 842), src, 0)
+        src = out
+    src.save(str(path))
+    return str(path)
+
+
+def _hash(path: str) -> str:
+    with fitz.open(path) as doc:
+        return page_content_hash(doc[0])
+
+
+def test_form_xobject_content_changes_hash(tmp_path):
+    a = _form_pdf(tmp_path / "a.pdf", "30 days")
+    b = _form_pdf(tmp_path / "b.pdf", "90 days")
+    with fitz.open(a) as doc_a, fitz.open(b) as doc_b:
+        assert doc_a[0].read_contents() == doc_b[0].read_contents()
+    assert _hash(a) != _hash(b)
+
+
+def test_nested_form_xobject_content_changes_hash(tmp_path):
+    a = _form_pdf(tmp_path / "a.pdf", "30 days", nested=True)
+    b = _form_pdf(tmp_path / "b.pdf", "90 days", nested=True)
+    assert _hash(a) != _hash(b)
+
+
+def test_same_form_content_same_hash(tmp_path):
+    assert _hash(_form_pdf(tmp_path / "a.pdf", "30 days")) == _hash(_form_pdf(tmp_path / "b.pdf", "30 days"))
+
+
+def test_shared_cache_does_not_mix_form_documents(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "cache.db"))
+    loader = PDFLoaderWithOCR(cache=cache)
+    first = loader.load(_form_pdf(tmp_path / "a.pdf", "30 days"))
+    second = loader.load(_form_pdf(tmp_path / "b.pdf", "90 days"))
+    assert "30 days" in first[0]["text"]
+    assert "90 days" in second[0]["text"]
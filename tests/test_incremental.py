@@ -0,0 +1,57 @@
+# tests/test_incremental.py
+
+import json
+import random
+
+import pytest
+
+from bench.synthetic import make_revision
+from bench.synthetic_pdf import write_pdf
+from service.compare_service import run_compare
+
+
+def _changes(result):
+    with open(result["json_report_path"], encoding="utf-8") as f:
+        changes = json.load(f)["changes"]
+    return sorted(
+        (c["change_type"], c.get("old_text") or "", c.get("new_text") or "", c.get("similarity"))
+        for c in changes
+    )
+
+
+def _amend(texts, seed, count=4):
+    texts = list(texts)
+    for k in random.Random(seed).sample(range(len(texts)), count):
+        texts[k] = texts[k] + " plus an amended obligation of the supplier"
+    return texts
+
+
+@pytest.mark.parametrize("match_mode", ["indexed", "align"])
+@pytest.mark.parametrize("changed_side", ["new", "old"])
+def test_incremental_matches_full(workspace, match_mode, changed_side):
+    old, new, _ = make_revision(120, seed=1, lang="en")
+    v1, v2, v3 = workspace / "v1.pdf", workspace / "v2.pdf", workspace / "v3.pdf"
+    write_pdf(v1, old)
+    write_pdf(v2, new)
+    if changed_side == "new":
+        # v1→v2 แล้ว v1→v3 (ฝั่งเก่าเหมือนเดิม, v3 = v2 ที่แก้บางหน้า)
+        write_pdf(v3, _amend(new, seed=3))
+        pair = (v1, v3)
+    else:
+        # v1→v2 แล้ว v3→v2 (ฝั่งใหม่เหมือนเดิม, v3 = v1 ที่แก้บางหน้า)
+        write_pdf(v3, _amend(old, seed=3))
+        pair = (v3, v2)
+
+    def compare(a, b, **kw):
+        return run_compare(
+            "Doc", str(a), str(b), a.stem, b.stem, force=True, match_mode=match_mode, **kw
+        )
+
+    compare(v1, v2)
+    inc = compare(*pair, incremental=True)
+    full = compare(*pair)
+
+    assert inc["incremental"]
+    assert not full["incremental"]
+    assert inc["changes_count"] == full["changes_count"]
+    assert _changes(inc) == _changes(full)
@@ -0,0 +1,88 @@
+# tests/test_ocr_engine.py
+
+import sys
+import threading
+import types
+
+from PIL import Image
+
+import ingestion.ocr_engine as ocr_engine
+from ingestion.ocr_engine import OCREngine
+
+
+class _FakeTessAPI:
+    """
+    แทน tesserocr.PyTessBaseAPI — ล้มถ้าถูกเรียกจาก thread อื่นที่ไม่ใช่ thread ที่สร้าง
+    """
+
+    def __init__(self, **kwargs):
+        self.owner = threading.get_ident()
+        self.ended = False
+
+    def SetImage(self, image):
+        assert threading.get_ident() == self.owner, "PyTessBaseAPI ถูกใช้ข้าม thread"
+        self.image = image
+
+    def GetUTF8Text(self):
+        return f"w{self.image.size[0]}"
+
+    def End(self):
+        self.ended = True
+
+
+def test_tesserocr_api_per_thread(monkeypatch):
+    monkeypatch.setitem(sys.modules, "tesserocr", types.SimpleNamespace(PyTessBaseAPI=_FakeTessAPI))
+    engine = OCREngine(backend="tesserocr")
+    results = {}
+
+    def work(i):
+        results[i] = engine.ocr_images([Image.new("L", (10 + i, 5))] * 3)
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == {i: [f"w{10 + i}"] * 3 for i in range(4)}
+    apis = list(engine._apis)
+    assert len(apis) == 4
+    engine.close()
+    assert all(api.ended for api in apis)
+
+
+class _FakeRun:
+    """
+    แทน subprocess.run — จำ command ที่ถูกเรียกแล้วคืนผลว่างตามจำนวนรูป
+    """
+
+    def __init__(self):
+        self.cmds = []
+
+    def __call__(self, cmd, **kwargs):
+        self.cmds.append(cmd)
+        source = cmd[1]
+        n = sum(1 for _ in open(source, encoding="utf-8")) if source.endswith(".txt") else 1
+        return types.SimpleNamespace(returncode=0, stdout=("x\f" * n).encode(), stderr=b"")
+
+
+def test_tesseract_cmd_not_global(monkeypatch):
+    fake = _FakeRun()
+    monkeypatch.setattr(ocr_engine.subprocess, "run", fake)
+    a = OCREngine(backend="subprocess", tesseract_cmd="/opt/a/tesseract")
+    b = OCREngine(backend="batch", tesseract_cmd="/opt/b/tesseract")
+
+    assert a.ocr_images([Image.new("L", (4, 4))] * 2) == ["x", "x"]
+    assert b.ocr_images([Image.new("L", (4, 4))] * 2) == ["x", "x"]
+
+    # แต่ละ engine เรียกโปรแกรมของตัวเอง (subprocess ทีละรูป, batch ครั้งเดียวต่อชุด)
+    assert [c[0] for c in fake.cmds] == ["/opt/a/tesseract"] * 2 + ["/opt/b/tesseract"]
+    # ไม่พึ่ง pytesseract อีกแล้ว (ไม่อยู่ใน requirements.txt)
+    assert not hasattr(ocr_engine, "pytesseract")
+
+
+def test_auto_backend_falls_back_to_batch(monkeypatch):
+    monkeypatch.setattr(ocr_engine, "has_tesserocr", lambda: False)
+    assert OCREngine(backend="auto").backend == "batch"
+    monkeypatch.setattr(ocr_engine, "has_tesserocr", lambda: True)
+    assert OCREngine(backend="auto").backend == "tesserocr"
@@ -0,0 +1,63 @@
+# tests/test_paragraph_index.py
+
+from bench.synthetic import make_revision
+from bench.synthetic_pdf import write_pdf
+from db.models import DocumentVersion
+from db.ops import get_or_create_document, get_or_create_version
+from db.session import SessionLocal
+from search.paragraph_index import first_appearance, reindex_missing, search_similar, search_text
+from service.compare_service import run_compare
+from utils.hashing import sha256_file
+
+
+def _shared_paragraph(old, new):
+    """
+    ย่อหน้าที่เหมือนกันทั้งสอง version
+    """
+    return next(t for t in old if t in new)
+
+
+def test_same_file_indexed_once_across_documents(workspace):
+    old, new, _ = make_revision(30, seed=5, lang="en", min_words=10, max_words=20)
+    a, b, c = workspace / "a.pdf", workspace / "b.pdf", workspace / "c.pdf"
+    write_pdf(a, old)
+    write_pdf(b, new)
+    write_pdf(c, ["An unrelated paragraph about quarterly maintenance windows."])
+    para = _shared_paragraph(old, new)
+
+    run_compare("DocA", str(a), str(b), "v1", "v2")
+    # ไฟล์เดิมอัปโหลดซ้ำภายใต้เอกสารและ label อื่น
+    run_compare("DocB", str(a), str(b), "draft", "final")
+
+    db = SessionLocal()
+    try:
+        versions = db.query(DocumentVersion).order_by(DocumentVersion.id).all()
+        assert len(versions) == 4
+        assert [v.paragraphs_indexed > 0 for v in versions] == [True, True, False, False]
+
+        # v1 และ v2 ของ DocA มีย่อหน้านี้ → 2 hit ไม่ใช่ 4
+        hits = search_text(db, para, limit=50)
+        assert {h["document_name"] for h in hits} == {"DocA"}
+        assert len({h["version_id"] for h in hits}) == len(hits) == 2
+
+        similar = search_similar(db, para, limit=50, min_jaccard=0.8)
+        assert {h["document_name"] for h in similar} == {"DocA"}
+        assert len(similar) == 2
+
+        first = first_appearance(db, para)
+        assert len(first) == 1
+        assert first[0]["version_label"] == "v1" and first[0]["versions_with_match"] == 2
+
+        # version ที่ยังไม่ index: ไฟล์ซ้ำ (ไฟล์หายไปแล้วก็ไม่ต้องดึงใหม่) + ไฟล์ใหม่จริง
+        doc = get_or_create_document(db, "DocC")
+        twin = get_or_create_version(db, doc, "copy", str(workspace / "gone.pdf"), sha256_file(str(a)))
+        fresh = get_or_create_version(db, doc, "new", str(c), sha256_file(str(c)))
+        assert reindex_missing(db) == 2
+        db.refresh(twin)
+        db.refresh(fresh)
+        assert twin.paragraphs_indexed == 0
+        assert fresh.paragraphs_indexed > 0
+        assert len(search_similar(db, para, limit=50, min_jaccard=0.8)) == 2
+        assert {h["version_id"] for h in search_text(db, "quarterly maintenance")} == {fresh.id}
+    finally:
+        db.close()
@@ -0,0 +1,76 @@
+# tests/test_paragraph_matcher.py
+
+import random
+
+import pytest
+
+from bench.synthetic import make_paragraph_pair, make_revision, modify_paragraph
+from ingestion.paragraph_splitter import Paragraph
+from matching.paragraph_matcher import ParagraphMatcher
+
+
+def _signature(matches):
+    return [
+        (
+            (m.old.page_number, m.old.index) if m.old else None,
+            (m.new.page_number, m.new.index) if m.new else None,
+            m.similarity,
+        )
+        for m in matches
+    ]
+
+
+def _paras(texts):
+    return [Paragraph(page_number=i // 20 + 1, index=i % 20, text=t) for i, t in enumerate(texts)]
+
+
+@pytest.mark.parametrize("threshold", [0.4, 0.6, 0.8])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_indexed_matches_bruteforce(seed, threshold):
+    old, new = make_paragraph_pair(60, seed=seed, modify_rate=0.2, delete_rate=0.05, insert_rate=0.05)
+    fast = ParagraphMatcher(threshold=threshold, mode="indexed")
+    slow = ParagraphMatcher(threshold=threshold, mode="bruteforce")
+    assert _signature(fast.match(old, new)) == _signature(slow.match(old, new))
+    # ดัชนีต้องตัด candidate ได้จริง ไม่ใช่เทียบทุกคู่
+    assert fast.full_comparisons < slow.full_comparisons
+
+
+@pytest.mark.parametrize("lang", ["th", "en", "mixed"])
+def test_indexed_matches_bruteforce_revision(lang):
+    old_texts, new_texts, _ = make_revision(
+        50, seed=7, modify_rate=0.15, move_rate=0.05, lang=lang, min_words=8, max_words=25
+    )
+    # ย่อหน้าซ้ำ/เกือบซ้ำ → คะแนนเท่ากันหลายคู่ ลำดับการเลือกต้องเหมือนกัน
+    old_texts += old_texts[:5]
+    new_texts += new_texts[:5]
+    old, new = _paras(old_texts), _paras(new_texts)
+    fast = ParagraphMatcher(mode="indexed").match(old, new)
+    slow = ParagraphMatcher(mode="bruteforce").match(old, new)
+    assert _signature(fast) == _signature(slow)
+
+
+def _pairs(matches):
+    return sorted(
+        ((m.old.page_number, m.old.index), (m.new.page_number, m.new.index), m.similarity)
+        for m in matches
+        if m.old and m.new
+    )
+
+
+@pytest.mark.parametrize("max_gap", [20, 1000])
+def test_align_large_gap_falls_back_to_indexed(max_gap):
+    texts, _, _ = make_revision(80, seed=3, modify_rate=0.0, delete_rate=0.0, insert_rate=0.0,
+                                min_words=8, max_words=15)
+    # ช่วงกลาง 60 ย่อหน้าแก้หนักทุกย่อหน้า → ไม่มี anchor เลย (ช่องเดียวใหญ่กว่า max_gap=20)
+    rng = random.Random(3)
+    middle = [modify_paragraph(rng, t, edits=6) for t in texts[10:70]]
+    old = _paras(texts)
+    new = _paras(texts[:10] + middle + texts[70:])
+
+    aligned = ParagraphMatcher(mode="align", max_gap=max_gap).match(old, new)
+    indexed = ParagraphMatcher(mode="indexed").match(old, new)
+
+    assert _pairs(aligned) == _pairs(indexed)
+    # มีคู่ที่คล้ายต่ำกว่า move_threshold → ถ้าข้ามช่องใหญ่ไป คู่เหล่านี้จะหายเป็น REMOVED + ADDED
+    assert any(0.6 <= sim < 0.85 for _, _, sim in _pairs(aligned))
+    assert not any(m.moved for m in aligned)
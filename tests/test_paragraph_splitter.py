@@ -0,0 +1,53 @@
+# tests/test_paragraph_splitter.py
+
+import fitz  # PyMuPDF
+
+from ingestion.paragraph_splitter import ParagraphSplitter
+from ingestion.pdf_loader_ocr import PDFLoaderWithOCR
+
+
+def _fee_pdf(path, amount: str, page_number: bool = True) -> str:
+    doc = fitz.open()
+    page = doc.new_page(width=595, height=842)
+    y = 100
+    for i in range(30):
+        page.insert_text((72, y), f"Line {i} of the body text of this agreement continues here.", fontsize=11)
+        y += 20
+    # ยอดเงินแยกเป็นอีก text object แถวเดียวกัน (แบบตารางชิดขวา) ในแถบท้ายกระดาษ
+    page.insert_text((72, 760), "Total fee payable:", fontsize=11)
+    page.insert_text((400, 760), amount, fontsize=11)
+    if page_number:
+        page.insert_text((290, 815), "- 1 -", fontsize=11)
+    doc.save(str(path))
+    return str(path)
+
+
+def _texts(path: str):
+    pages = PDFLoaderWithOCR().load(path)
+    return [p.text for p in ParagraphSplitter().split(pages)]
+
+
+def test_number_in_footer_band_is_kept_when_not_alone(tmp_path):
+    texts_a = _texts(_fee_pdf(tmp_path / "a.pdf", "5000"))
+    texts_b = _texts(_fee_pdf(tmp_path / "b.pdf", "9000"))
+    assert any("5000" in t for t in texts_a)
+    assert any("9000" in t for t in texts_b)
+    assert texts_a != texts_b
+
+
+def test_lone_page_number_is_dropped(tmp_path):
+    texts = _texts(_fee_pdf(tmp_path / "a.pdf", "5000"))
+    assert not any(t.strip() == "- 1 -" for t in texts)
+
+
+def test_number_at_page_bottom_without_gap_is_body(tmp_path):
+    doc = fitz.open()
+    page = doc.new_page(width=595, height=842)
+    y = 100
+    while y < 800:
+        page.insert_text((72, y), "Body line of the agreement that runs to the bottom of the page.", fontsize=11)
+        y += 14
+    page.insert_text((72, y), "42", fontsize=11)
+    path = tmp_path / "dense.pdf"
+    doc.save(str(path))
+    assert any(t.endswith("42") for t in _texts(str(path)))
@@ -0,0 +1,42 @@
+# tests/test_report_builder.py
+
+import json
+
+from diff.diff_engine import DiffEngine
+from ingestion.paragraph_splitter import Paragraph
+from matching.paragraph_matcher import ParagraphMatch
+from report.report_builder import ReportBuilder
+from service.compare_service import change_rows
+
+
+def _changes():
+    section = 'ข้อ ๕ <script>alert("x")</script> & ค่าปรับ'
+    old = Paragraph(3, 0, "ค่าปรับวันละ 100 บาท", bbox=[72.0, 100.0, 500.0, 130.5], section=section)
+    new = Paragraph(3, 0, "ค่าปรับวันละ 500 บาท", bbox=[72.0, 101.0, 500.0, 131.5], section=section)
+    added = Paragraph(4, 1, "ข้อความใหม่จาก OCR")  # หน้า OCR → ไม่มี bbox
+    return DiffEngine().build_changes(
+        [ParagraphMatch(old, new, 0.8), ParagraphMatch(None, added, 0.0)]
+    )
+
+
+def test_static_html_escapes_section_label(tmp_path):
+    changes = _changes()
+    path = ReportBuilder(str(tmp_path)).save_html("Doc", "v1", "v2", changes, mode="static")
+    page = path.read_text(encoding="utf-8")
+    assert "<script>alert" not in page
+    assert "ข้อ ๕ &lt;script&gt;alert(&quot;x&quot;)&lt;/script&gt; &amp; ค่าปรับ (page 3)" in page
+
+
+def test_bbox_reaches_rows_and_reports(tmp_path):
+    modified, added = _changes()
+    assert (modified.old_bbox, modified.new_bbox) == ([72.0, 100.0, 500.0, 130.5], [72.0, 101.0, 500.0, 131.5])
+    assert (added.old_bbox, added.new_bbox) == (None, None)
+
+    rows = change_rows([modified, added])
+    assert json.loads(rows[0]["new_bbox"]) == modified.new_bbox
+    assert rows[1]["old_bbox"] is None and rows[1]["new_bbox"] is None
+
+    path = ReportBuilder(str(tmp_path)).save_json("Doc", "v1", "v2", [modified, added])
+    report = json.loads(path.read_text(encoding="utf-8"))["changes"]
+    assert report[0]["old_bbox"] == modified.old_bbox
+    assert report[1]["new_bbox"] is None
@@ -0,0 +1,74 @@
+# tests/test_risk_engine.py
+
+import json
+import os
+import random
+
+from analysis.risk_engine import DEFAULT_KEYWORDS, RiskEngine
+from diff.diff_engine import Change
+
+
+def _old_estimate_risk_level(changes):
+    """
+    ตัวประเมินเดิมของ summary_engine (ก่อนมี risk_engine): เช็ค `kw in text` ทีละคำ
+    """
+    text_all = " ".join((c.new_text or "") + " " + (c.old_text or "") for c in changes).lower()
+    high_hits = sum(kw.lower() in text_all for kw in DEFAULT_KEYWORDS["HIGH"])
+    med_hits = sum(kw.lower() in text_all for kw in DEFAULT_KEYWORDS["MEDIUM"])
+    if high_hits >= 2:
+        return "HIGH"
+    if high_hits == 1 or med_hits >= 2:
+        return "MEDIUM"
+    return "LOW"
+
+
+def _random_text(rng: random.Random) -> str:
+    keywords = DEFAULT_KEYWORDS["HIGH"] + DEFAULT_KEYWORDS["MEDIUM"]
+    filler = ["สัญญา", "นัด", "เงิน", "ผู้ว่าจ้าง", "the", "fee", "ion", "Level", "ค่า", "ใช้"]
+    parts = []
+    for _ in range(rng.randint(0, 6)):
+        word = rng.choice(keywords + filler)
+        if rng.random() < 0.3:
+            word = word[: rng.randint(1, len(word))]  # ตัดคำ → ชนกับคีย์เวิร์ดถัดไปแบบซ้อนกัน
+        parts.append(word.upper() if rng.random() < 0.1 else word)
+        parts.append(rng.choice(["", "", " "]))
+    # ขึ้นต้น/ลงท้ายด้วย "." → ตัวเดิมที่ต่อข้อความด้วย " " ไม่เกิดคำข้ามรอยต่อ
+    return "." + "".join(parts) + "."
+
+
+def _engine() -> RiskEngine:
+    return RiskEngine(keywords_file=None)
+
+
+def test_overlapping_keywords_are_all_counted():
+    engine = _engine()
+    assert engine.score_change(Change("ADDED", "p", None, "ค่าปรับผิดนัด")).level == "HIGH"
+    assert engine.score_change(Change("ADDED", "p", None, "ค่าใช้จ่ายเงิน")).level == "MEDIUM"
+
+
+def test_parity_with_old_scorer():
+    engine = _engine()
+    rng = random.Random(0)
+    for _ in range(2000):
+        changes = [
+            Change("MODIFIED", "p", _random_text(rng), _random_text(rng))
+            for _ in range(rng.randint(1, 3))
+        ]
+        overall, per_change = engine.assess(changes)
+        assert overall == _old_estimate_risk_level(changes), changes
+        for c, r in zip(changes, per_change):
+            assert r.level == _old_estimate_risk_level([c]), c
+
+
+def test_reload_swaps_keyword_set(tmp_path):
+    path = tmp_path / "risk_keywords.json"
+    path.write_text(json.dumps({"HIGH": ["foo"], "MEDIUM": []}), encoding="utf-8")
+    engine = RiskEngine(keywords_file=str(path))
+    assert engine.score_change(Change("ADDED", "p", None, "foo bar")).keywords == ["foo"]
+
+    path.write_text(json.dumps({"HIGH": ["bar"], "MEDIUM": ["baz"]}), encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+    assert engine.reload_if_changed()
+    assert engine.keywords == {"HIGH": ["bar"], "MEDIUM": ["baz"]}
+    assert engine.score_change(Change("ADDED", "p", None, "foo bar")).keywords == ["bar"]
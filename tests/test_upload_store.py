@@ -0,0 +1,101 @@
+# tests/test_upload_store.py
+
+import io
+import os
+
+from db.ops import create_job, get_or_create_document, get_or_create_version, list_referenced_file_paths
+from db.session import SessionLocal
+from storage.upload_store import UploadStore
+
+
+def _age(path, seconds):
+    t = os.path.getmtime(path) - seconds
+    os.utime(path, (t, t))
+
+
+def test_save_stream_dedup(tmp_path):
+    store = UploadStore(str(tmp_path / "uploads"))
+    first = store.save_stream(io.BytesIO(b"%PDF same"))
+    again = store.save_stream(io.BytesIO(b"%PDF same"))
+    assert (first.reused, again.reused) == (False, True)
+    assert again.path == first.path
+    # ไฟล์ชั่วคราวของไฟล์ซ้ำถูกลบทันที
+    assert sorted(p.name for p in store.root.iterdir()) == [first.path.name]
+
+
+def _old_uploads(store, n):
+    stored = [store.save_stream(io.BytesIO(f"%PDF {k}".encode() * 100)) for k in range(n)]
+    for k, s in enumerate(stored):
+        _age(s.path, 3600 * (n - k))  # ไฟล์แรกเก่าสุด
+    return stored
+
+
+def test_gc_evicts_old_versions_when_all_referenced(workspace, caplog):
+    db = SessionLocal()
+    store = UploadStore(
+        "data/uploads", max_bytes=0, min_age_sec=60,
+        in_use=lambda: list_referenced_file_paths(db, keep_versions=2),
+    )
+    try:
+        stored = _old_uploads(store, 6)
+        # ทุกไฟล์ถูกอ้างโดย version: contract มี 4 version, annex มี 1
+        contract = get_or_create_document(db, "contract")
+        for k in range(4):
+            get_or_create_version(db, contract, f"v{k + 1}", str(stored[k].path), stored[k].sha256)
+        annex = get_or_create_document(db, "annex")
+        get_or_create_version(db, annex, "v1", str(stored[4].path), stored[4].sha256)
+        # ไฟล์ของ version เก่าสุด + ไฟล์ที่ยังไม่มี version แต่อยู่ในงานที่ค้างในคิว
+        create_job(db, "job1", "compare", {"v1_path": str(stored[0].path), "v2_path": "x.pdf"})
+        create_job(db, "job2", "batch_compare", {"paths": [str(stored[5].path)]})
+
+        with caplog.at_level("WARNING"):
+            freed = store.gc()
+    finally:
+        db.close()
+
+    # v2 ของ contract ไม่อยู่ใน 2 version ล่าสุดและไม่มีงานไหนใช้ → ลบ
+    assert freed == stored[1].size
+    assert [s.path.exists() for s in stored] == [True, False, True, True, True, True]
+    # ที่เหลือลบไม่ได้แต่ยังเกิน max_bytes → เตือน
+    assert "ยังเกินขนาด" in caplog.text
+
+
+def test_gc_meets_budget_and_skips_scan_under_budget(workspace):
+    calls = []
+
+    def in_use():
+        calls.append(1)
+        return []
+
+    store = UploadStore("data/uploads", max_bytes=10**9, min_age_sec=60, in_use=in_use)
+    stored = _old_uploads(store, 3)
+    assert store.gc() == 0 and calls == []
+
+    store.max_bytes = stored[2].size
+    assert store.gc() == stored[0].size + stored[1].size
+    assert calls == [1]
+    assert [s.path.exists() for s in stored] == [False, False, True]
+
+
+def test_reupload_resolves_evicted_version_path(workspace):
+    db = SessionLocal()
+    try:
+        store = UploadStore("data/uploads")
+        first = store.save_stream(io.BytesIO(b"%PDF evicted"))
+        doc = get_or_create_document(db, "contract")
+        ver = get_or_create_version(db, doc, "v1", str(first.path), first.sha256)
+        first.path.unlink()
+
+        moved = UploadStore("data/uploads2").save_stream(io.BytesIO(b"%PDF evicted"))
+        again = get_or_create_version(db, doc, "v1", str(moved.path), moved.sha256)
+        assert again.id == ver.id
+        assert again.file_path == str(moved.path)
+    finally:
+        db.close()
+
+
+def test_gc_skips_young_files(tmp_path):
+    store = UploadStore(str(tmp_path / "uploads"), max_bytes=0, min_age_sec=60)
+    stored = store.save_stream(io.BytesIO(b"%PDF new"))
+    assert store.gc() == 0
+    assert stored.path.exists()